@@ -2,46 +2,58 @@
 Abstract Syntax Tree node definitions for Privvy.
 """
 
+import sys
 from dataclasses import dataclass
 from typing import Any, List, Optional, Union
 
+# Nodes are slotted where dataclasses support it (Python 3.10+): large
+# scripts hold hundreds of thousands of them, and a __dict__ per node
+# costs more than the node's own fields
+if sys.version_info >= (3, 10):
+    ast_node = dataclass(slots=True)
+else:
+    ast_node = dataclass
+
 
 # Base node
-@dataclass
+@ast_node
 class ASTNode:
     """Base class for all AST nodes."""
     pass
 
 
 # Literals
-@dataclass
+@ast_node
 class NumberLiteral(ASTNode):
     value: Union[float, int]
 
 
-@dataclass
+@ast_node
 class StringLiteral(ASTNode):
     value: str
 
 
-@dataclass
+@ast_node
 class BooleanLiteral(ASTNode):
     value: bool
 
 
-@dataclass
+@ast_node
 class NullLiteral(ASTNode):
     pass
 
 
 # Identifiers
-@dataclass
+@ast_node
 class Identifier(ASTNode):
     name: str
+    # Filled in by the resolver: environments outward and slot, None if global
+    depth: Optional[int] = None
+    slot: Optional[int] = None
 
 
 # Binary operations
-@dataclass
+@ast_node
 class BinaryOp(ASTNode):
     left: ASTNode
     operator: str
@@ -49,115 +61,131 @@ class BinaryOp(ASTNode):
 
 
 # Unary operations
-@dataclass
+@ast_node
 class UnaryOp(ASTNode):
     operator: str
     operand: ASTNode
 
 
 # Variable declaration
-@dataclass
+@ast_node
 class VarDeclaration(ASTNode):
     name: str
     initializer: Optional[ASTNode] = None
+    slot: Optional[int] = None
 
 
 # Assignment
-@dataclass
+@ast_node
 class Assignment(ASTNode):
     target: ASTNode  # Can be Identifier or MemberAccess
     value: ASTNode
+    depth: Optional[int] = None  # Resolved slot when target is an Identifier
+    slot: Optional[int] = None
 
 
 # Function call
-@dataclass
+@ast_node
 class FunctionCall(ASTNode):
     callee: ASTNode
     arguments: List[ASTNode]
+    line: int = 0  # Source line of the call, for the N+1 detector
 
 
 # Member access (e.g., obj.property)
-@dataclass
+@ast_node
 class MemberAccess(ASTNode):
     object: ASTNode
     property: str
+    cache: Optional['InlineCache'] = None  # Method lookup cache, filled at runtime
 
 
 # Array literal
-@dataclass
+@ast_node
 class ArrayLiteral(ASTNode):
     elements: List[ASTNode]
 
 
 # Array access (e.g., arr[0])
-@dataclass
+@ast_node
 class ArrayAccess(ASTNode):
     array: ASTNode
     index: ASTNode
 
 
 # Function declaration
-@dataclass
+@ast_node
 class FunctionDeclaration(ASTNode):
     name: str
     parameters: List[str]
     body: List[ASTNode]
+    slot: Optional[int] = None
+    scope: Optional['Scope'] = None  # Parameters and body variables
 
 
 # Class declaration
-@dataclass
+@ast_node
 class ClassDeclaration(ASTNode):
     name: str
     superclass: Optional[str]
     constructor: Optional['FunctionDeclaration']
     methods: List[FunctionDeclaration]
+    slot: Optional[int] = None
 
 
 # If statement
-@dataclass
+@ast_node
 class IfStatement(ASTNode):
     condition: ASTNode
     then_branch: List[ASTNode]
     else_branch: Optional[List[ASTNode]] = None
+    then_scope: Optional['Scope'] = None
+    else_scope: Optional['Scope'] = None
 
 
 # While loop
-@dataclass
+@ast_node
 class WhileStatement(ASTNode):
     condition: ASTNode
     body: List[ASTNode]
+    body_scope: Optional['Scope'] = None
 
 
 # For loop
-@dataclass
+@ast_node
 class ForStatement(ASTNode):
     initializer: Optional[ASTNode]
     condition: Optional[ASTNode]
     increment: Optional[ASTNode]
     body: List[ASTNode]
+    scope: Optional['Scope'] = None  # The initializer's loop variable
+    body_scope: Optional['Scope'] = None
 
 
 # Return statement
-@dataclass
+@ast_node
 class ReturnStatement(ASTNode):
     value: Optional[ASTNode] = None
 
 
 # This expression
-@dataclass
+@ast_node
 class ThisExpression(ASTNode):
-    pass
+    depth: Optional[int] = None
+    slot: Optional[int] = None
 
 
 # New expression (object instantiation)
-@dataclass
+@ast_node
 class NewExpression(ASTNode):
     class_name: str
     arguments: List[ASTNode]
+    depth: Optional[int] = None
+    slot: Optional[int] = None
 
 
 # Program (root node)
-@dataclass
+@ast_node
 class Program(ASTNode):
     statements: List[ASTNode]
 
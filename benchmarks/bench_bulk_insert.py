@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Model.createMany against one Model.create per row.
+Inserts the same seed rows into a fresh SQLite file both ways and
+reports rows/sec. create commits every row (one fsync each), while
+createMany inserts them with executemany in one transaction, so the
+per-row run uses fewer rows to keep it short.
+
+Usage: python3 benchmarks/bench_bulk_insert.py [rows]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false]))
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY AUTOINCREMENT", "username", "TEXT", "email", "TEXT", "age", "INTEGER"]))
+User.migrate(db)
+"""
+
+PER_ROW = """
+for (let i = 0; i < len(rows); i = i + 1) {
+    User.create(db, rows[i])
+}
+"""
+
+BULK = """
+let ids = User.createMany(db, rows)
+"""
+
+
+def make_rows(count):
+    return [{'username': f"user{n}", 'email': f"user{n}@example.com", 'age': n % 90}
+            for n in range(count)]
+
+
+def insert(path, source, rows):
+    """Seconds to run `source` against a fresh database holding `rows`."""
+    if os.path.exists(path):
+        os.remove(path)
+    interpreter = Interpreter()
+    interpreter.globals.define('rows', rows)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP % path))
+        program = pvcache.parse(source)
+        start = time.perf_counter()
+        interpreter.interpret(program)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'seed.db')
+        per_row_count = min(count, 2000)
+        per_row = insert(path, PER_ROW, make_rows(per_row_count))
+        bulk = insert(path, BULK, make_rows(count))
+        
+        per_row_rate = per_row_count / per_row
+        bulk_rate = count / bulk
+        print(f"create per row   {per_row_count:>7} rows  {per_row:7.2f}s  {per_row_rate:9.0f} rows/s")
+        print(f"createMany       {count:>7} rows  {bulk:7.2f}s  {bulk_rate:9.0f} rows/s  {bulk_rate / per_row_rate:5.1f}x")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: call-heavy Privvy code.
+First times the two ways of getting a value out of a function body in
+plain Python (raising an exception vs returning a signal object), then
+runs recursive fib and method-call loops under every engine.
+
+Run it before and after a change to compare:
+    python3 benchmarks/bench_calls.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter
+
+CALLS = 200000
+
+FIB_SOURCE = """
+fun fib(n) {
+    if (n < 2) {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}
+fib(20)
+"""
+
+METHOD_SOURCE = """
+class Counter {
+    constructor() {
+        this.count = 0
+    }
+    fun inc(step) {
+        this.count = this.count + step
+        return this.count
+    }
+}
+let counter = new Counter()
+for (let i = 0; i < 50000; i = i + 1) {
+    counter.inc(1)
+}
+"""
+
+INHERITED_SOURCE = """
+class Shape {
+    constructor() {
+        this.k = 1
+    }
+    fun area() {
+        return 0
+    }
+    fun scaled(f) {
+        return this.area() * f
+    }
+}
+class Square extends Shape {
+    constructor(side) {
+        this.side = side
+    }
+    fun area() {
+        return this.side * this.side
+    }
+}
+class BigSquare extends Square {
+    constructor(side) {
+        this.side = side
+    }
+}
+let shapes = [new Square(2), new BigSquare(3)]
+let total = 0
+for (let i = 0; i < 30000; i = i + 1) {
+    total = total + shapes[i % 2].scaled(2)
+}
+"""
+
+
+class Signal:
+    __slots__ = ('value',)
+    
+    def __init__(self, value):
+        self.value = value
+
+
+class Raised(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_mechanism():
+    """Time CALLS function returns by exception and by signal object."""
+    def body_raising(n):
+        raise Raised(n)
+    
+    def body_signalling(n):
+        return Signal(n)
+    
+    def by_exception():
+        for i in range(CALLS):
+            try:
+                body_raising(i)
+            except Raised as ret:
+                ret.value
+    
+    def by_signal():
+        for i in range(CALLS):
+            signal = body_signalling(i)
+            if signal is not None:
+                signal.value
+    
+    return best_of(by_exception), best_of(by_signal)
+
+
+def bench_program(program, engine):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            Interpreter(engine).interpret(program)
+    return best_of(run, repeat=3)
+
+
+def main():
+    by_exception, by_signal = bench_mechanism()
+    print(f"{CALLS} returns in plain Python")
+    print(f"  raise/except  {by_exception * 1000:8.1f} ms")
+    print(f"  return signal {by_signal * 1000:8.1f} ms  {by_exception / by_signal:5.2f}x")
+    
+    cases = [
+        ('recursive fib(20)', FIB_SOURCE),
+        ('50k method calls', METHOD_SOURCE),
+        ('30k inherited method calls, two classes per site', INHERITED_SOURCE),
+    ]
+    for name, source in cases:
+        program = Parser(Lexer(source).tokenize()).parse()
+        print()
+        print(name)
+        for engine in Interpreter.ENGINES[::-1]:
+            elapsed = bench_program(program, engine)
+            print(f"  {engine:<8} {elapsed * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: loading posts with their authors, one find() per post against
+Post.allWith(db, User, "user_id").
+Counts the SQL statements each way with SQLite's trace callback and times
+them against a SQLite file.
+
+Usage: python3 benchmarks/bench_eager_loading.py [posts]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false]))
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY", "username", "TEXT"]))
+let Post = Model("posts", dict(["id", "INTEGER PRIMARY KEY", "user_id", "INTEGER", "title", "TEXT"]))
+User.migrate(db)
+Post.migrate(db)
+fun seed() {
+    for (let i = 0; i < 100; i = i + 1) {
+        User.create(db, dict(["username", "user" + str(i)]))
+    }
+    for (let i = 0; i < posts; i = i + 1) {
+        Post.create(db, dict(["user_id", i %% 100 + 1, "title", "post" + str(i)]))
+    }
+}
+db.transaction(seed)
+"""
+
+FIND_PER_ROW = """
+let all = Post.all(db)
+for (let i = 0; i < len(all); i = i + 1) {
+    let author = User.find(db, all[i]["user_id"])
+    author["username"]
+}
+"""
+
+ALL_WITH = """
+let all = Post.allWith(db, User, "user_id")
+for (let i = 0; i < len(all); i = i + 1) {
+    all[i]["user"]["username"]
+}
+"""
+
+
+def run(path, source, posts):
+    """(seconds, SQL statements) to run `source` against a fresh database."""
+    if os.path.exists(path):
+        os.remove(path)
+    interpreter = Interpreter()
+    interpreter.globals.define('posts', posts)
+    statements = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP % path))
+        program = pvcache.parse(source)
+        interpreter.globals.get('db').connection.set_trace_callback(statements.append)
+        start = time.perf_counter()
+        interpreter.interpret(program)
+    return time.perf_counter() - start, len(statements)
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        print(f"{posts} posts by 100 users")
+        per_row, per_row_queries = run(path, FIND_PER_ROW, posts)
+        eager, eager_queries = run(path, ALL_WITH, posts)
+        print(f"  find per post  {per_row_queries:6d} queries  {per_row * 1000:8.1f} ms")
+        print(f"  allWith        {eager_queries:6d} queries  {eager * 1000:8.1f} ms  {per_row / eager:5.1f}x")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
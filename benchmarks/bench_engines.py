@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compare Privvy execution engines.
+Runs examples/loops.pv and a recursive fib under every engine.
+
+Usage: python3 benchmarks/bench_engines.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter
+
+
+FIB_SOURCE = """
+fun fib(n) {
+    if (n < 2) {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}
+fib(22)
+"""
+
+LOOP_SOURCE = """
+let total = 0
+for (let i = 0; i < 200000; i = i + 1) {
+    if (i % 3 == 0) {
+        total = total + i
+    }
+}
+"""
+
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def bench(program, engine, repeat):
+    """Best wall time of running a parsed program `repeat` times.
+    
+    Interpreter construction is excluded; compilation is included.
+    """
+    best = float('inf')
+    for _ in range(5):
+        interpreters = [Interpreter(engine) for _ in range(repeat)]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for interpreter in interpreters:
+                interpreter.interpret(program)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    with open(os.path.join(ROOT, 'examples', 'loops.pv')) as f:
+        loops = parse(f.read())
+    fib = parse(FIB_SOURCE)
+    loop = parse(LOOP_SOURCE)
+    
+    cases = [
+        ('examples/loops.pv x2000', loops, 2000),
+        ('recursive fib(22)', fib, 1),
+        ('for loop, 200k iterations', loop, 1),
+    ]
+    
+    for name, program, repeat in cases:
+        print(name)
+        baseline = None
+        for engine in Interpreter.ENGINES[::-1]:
+            elapsed = bench(program, engine, repeat)
+            baseline = baseline or elapsed
+            print(f"  {engine:<8} {elapsed * 1000:9.1f} ms  {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Model.findBy latency with and without a declared index.
+Seeds a SQLite file, times findBy(db, "email", ...) on the bare table,
+then migrates a Model that declares an index on email (timing the index
+build) and times findBy again.
+
+Usage: python3 benchmarks/bench_indexes.py [rows]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false]))
+let fields = dict(["id", "INTEGER PRIMARY KEY AUTOINCREMENT", "username", "TEXT", "email", "TEXT", "age", "INTEGER"])
+let User = Model("users", fields)
+let IndexedUser = Model("users", fields, dict(["indexes", ["email"]]))
+"""
+
+MIGRATE = """
+IndexedUser.migrate(db)
+"""
+
+LOOKUPS = """
+for (let i = 0; i < lookups; i = i + 1) {
+    len(User.findBy(db, "email", "user" + str((i * 7919) % rows) + "@example.com"))
+}
+"""
+
+
+def seed(path, count):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, email TEXT, age INTEGER)")
+    connection.executemany("INSERT INTO users (username, email, age) VALUES (?, ?, ?)",
+                           ((f"user{n}", f"user{n}@example.com", n % 90) for n in range(count)))
+    connection.commit()
+    connection.close()
+
+
+def timed(interpreter, source):
+    program = pvcache.parse(source)
+    start = time.perf_counter()
+    interpreter.interpret(program)
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        seed(path, rows)
+        interpreter = Interpreter()
+        interpreter.globals.define('rows', rows)
+        with contextlib.redirect_stdout(io.StringIO()):
+            interpreter.interpret(pvcache.parse(SETUP % path))
+            interpreter.globals.define('lookups', 20)
+            scan = timed(interpreter, LOOKUPS) / 20
+            build = timed(interpreter, MIGRATE)
+            interpreter.globals.define('lookups', 10000)
+            seek = timed(interpreter, LOOKUPS) / 10000
+        print(f"findBy email at {rows} rows")
+        print(f"  no index   {scan * 1000:9.3f} ms/lookup")
+        print(f"  index      {seek * 1000:9.3f} ms/lookup  {scan / seek:8.0f}x  (built in {build:.2f}s by migrate)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
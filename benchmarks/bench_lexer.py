@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: lexing time against file size.
+Tokenizes generated schema-style scripts of growing length and reports
+time per line, which should stay flat as files get bigger.
+
+Usage: python3 benchmarks/bench_lexer.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import Lexer
+
+SIZES = (1000, 10000, 50000)
+
+BLOCK = """// table {n}
+let Table{n} = Model("table_{n}", dict(["id", "INTEGER PRIMARY KEY", "name", "TEXT NOT NULL", "score", "REAL DEFAULT 0.5"]))
+Table{n}.migrate(db)
+let row{n} = Table{n}.create(db, dict(["name", "row \\"{n}\\"", "score", {n}.25]))
+"""
+
+
+def make_schema(lines):
+    """A generated schema file of roughly `lines` lines."""
+    per_block = BLOCK.count('\n')
+    return ''.join(BLOCK.format(n=n) for n in range(lines // per_block))
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    for lines in SIZES:
+        source = make_schema(lines)
+        count = len(Lexer(source).tokenize())
+        elapsed = best_of(lambda: Lexer(source).tokenize())
+        print(f"{lines:>6} lines, {count:>7} tokens: {elapsed * 1000:8.1f} ms  "
+              f"{elapsed / lines * 1e6:6.1f} us/line  {count / elapsed / 1e6:5.2f} M tokens/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: what the N+1 detector costs, off and on.
+Times a loop of Model.find calls, the pattern the detector looks for,
+against an in-memory SQLite database with the detector off and on,
+alternating the two to even out noise, then prints what it reported.
+
+Usage: python3 benchmarks/bench_n_plus_one.py [finds] [rounds]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database(":memory:")
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY", "username", "TEXT"]))
+User.migrate(db)
+for (let i = 0; i < 100; i = i + 1) {
+    User.create(db, dict(["username", "user" + str(i)]))
+}
+"""
+
+FINDS = """
+for (let i = 0; i < finds; i = i + 1) {
+    User.find(db, i % 100 + 1)
+}
+"""
+
+
+def run(interpreter, program, threshold):
+    """Seconds to run the find loop, compiled with the detector on or off."""
+    database.detect_n_plus_one(threshold)
+    start = time.perf_counter()
+    interpreter.interpret(program)
+    return time.perf_counter() - start
+
+
+def main():
+    finds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    interpreter = Interpreter()
+    interpreter.globals.define('finds', finds)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP))
+    program = pvcache.parse(FINDS)
+    
+    off = on = 0.0
+    for _ in range(rounds):
+        off += run(interpreter, program, None)
+        on += run(interpreter, program, database.N_PLUS_ONE_THRESHOLD)
+    log = database.QUERY_LOG
+    database.detect_n_plus_one(None)
+    
+    calls = finds * rounds
+    print(f"{finds} finds x {rounds} rounds")
+    print(f"  detector off  {off / calls * 1e6:6.2f} us/find")
+    print(f"  detector on   {on / calls * 1e6:6.2f} us/find  (+{(on - off) / off * 100:.0f}%)")
+    report = io.StringIO()
+    log.stream = report
+    log.report()
+    print(report.getvalue().rstrip())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the -O constant folding pass.
+Runs a loop full of constant expressions and `if (false)` debug blocks,
+as generated scripts tend to contain, with and without the optimizer,
+under every engine.
+
+Usage: python3 benchmarks/bench_optimizer.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+from optimizer import Optimizer
+
+SOURCE = """
+let total = 0
+let last = ""
+for (let i = 0; i < 50000; i = i + 1) {
+    if (false) {
+        print("row " + str(i))
+    }
+    let key = "prefix" + "_" + "users" + "_" + "suffix"
+    total = total + i * (60 * 60 * 24) % (1000 + 7)
+    if (not true) {
+        total = 0
+    }
+    if (1 + 1 == 2) {
+        last = key
+    }
+}
+"""
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'engine':<8} {'plain':>9} {'-O':>9}")
+    for engine in Interpreter.ENGINES:
+        # The resolver annotates programs in place, so each run parses afresh
+        plain = best_of(lambda: Interpreter(engine).interpret(pvcache.parse(SOURCE)))
+        optimized = best_of(lambda: Interpreter(engine).interpret(Optimizer().optimize(pvcache.parse(SOURCE))))
+        print(f"{engine:<8} {plain * 1000:7.1f}ms {optimized * 1000:7.1f}ms  {plain / optimized:4.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ORM call overhead with the SQL stubbed out.
+The database connection is swapped for a stub whose cursor does no work,
+so the timings are only what Privvy spends getting from `User.find(...)`
+or `db.query(...)` to the driver and back.
+
+Usage: python3 benchmarks/bench_orm.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import Lexer
+from parser import Parser
+from database import DatabaseConnection, ModelDefinition
+from interpreter import Interpreter
+
+CALLS = 20000
+
+ROW = {'id': 1, 'name': 'Alice', 'email': 'alice@example.com'}
+
+
+class StubCursor:
+    """A cursor that accepts any SQL and returns one canned row."""
+    description = (('id',), ('name',), ('email',))
+    rowcount = 1
+    lastrowid = 1
+    
+    def execute(self, sql, params=()):
+        pass
+    
+    def fetchone(self):
+        return ROW
+    
+    def fetchmany(self, size=1):
+        return [ROW]
+    
+    def fetchall(self):
+        return [ROW]
+    
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def cursor(self, *args, **kwargs):
+        return StubCursor()
+    
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        pass
+
+
+PROGRAMS = {
+    'User.find': "for (let i = 0; i < %d; i = i + 1) { User.find(db, i) }",
+    'User.create': "for (let i = 0; i < %d; i = i + 1) { User.create(db, row) }",
+    'db.query': "for (let i = 0; i < %d; i = i + 1) { db.query(\"SELECT * FROM users WHERE id = ?\", i) }",
+}
+
+
+def stub_database():
+    db = DatabaseConnection(':memory:')
+    db.connection = StubConnection()
+    return db
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_get():
+    """Time CALLS method lookups straight from Python."""
+    db = stub_database()
+    model = ModelDefinition('users', {'id': 'INTEGER PRIMARY KEY', 'name': 'TEXT', 'email': 'TEXT'})
+    
+    def lookups():
+        for _ in range(CALLS):
+            model.get('find')
+            db.get('query')
+    
+    return best_of(lookups)
+
+
+def bench_program(source, engine):
+    program = Parser(Lexer(source % CALLS).tokenize()).parse()
+    
+    def run():
+        interpreter = Interpreter(engine)
+        interpreter.globals.define('db', stub_database())
+        interpreter.globals.define('User', ModelDefinition('users', {'id': 'INTEGER PRIMARY KEY', 'name': 'TEXT', 'email': 'TEXT'}))
+        interpreter.globals.define('row', {'name': 'Alice', 'email': 'alice@example.com'})
+        interpreter.interpret(program)
+    
+    return best_of(run, repeat=3)
+
+
+def main():
+    elapsed = bench_get()
+    print(f"{CALLS} x (Model.get + Database.get) from Python: {elapsed * 1000:.1f} ms")
+    
+    for name, source in PROGRAMS.items():
+        print()
+        print(f"{CALLS} x {name} with stubbed SQL")
+        for engine in Interpreter.ENGINES[::-1]:
+            elapsed = bench_program(source, engine)
+            print(f"  {engine:<8} {elapsed * 1000:9.1f} ms  {elapsed / CALLS * 1e6:6.1f} us/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU time per Model.find, Model.create and Model.update call.
+Runs each in a Privvy loop against an in-memory SQLite database, where
+there is no disk or network to wait on, so the time is the interpreter,
+the ORM and the driver. create and update run inside db.transaction to
+leave commits out of it.
+
+Set PRIVVY_BENCH_POSTGRES to a postgresql:// URL to include PostgreSQL.
+
+Usage: python3 benchmarks/bench_orm_calls.py [calls]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false]))
+let User = Model("bench_users", dict(["id", "INTEGER PRIMARY KEY", "username", "TEXT", "email", "TEXT", "age", "INTEGER"]))
+User.drop(db)
+User.migrate(db)
+fun seed() {
+    for (let i = 0; i < 1000; i = i + 1) {
+        User.create(db, dict(["username", "user", "email", "user@example.com", "age", i]))
+    }
+}
+db.transaction(seed)
+"""
+
+CASES = {
+    'find': """
+for (let i = 0; i < calls; i = i + 1) {
+    User.find(db, i %% 1000 + 1)
+}
+""",
+    'create': """
+fun work() {
+    for (let i = 0; i < calls; i = i + 1) {
+        User.create(db, dict(["username", "user", "email", "user@example.com", "age", i]))
+    }
+}
+db.transaction(work)
+""",
+    'update': """
+fun work() {
+    for (let i = 0; i < calls; i = i + 1) {
+        User.update(db, i %% 1000 + 1, dict(["age", i]))
+    }
+}
+db.transaction(work)
+""",
+    'loop only': """
+for (let i = 0; i < calls; i = i + 1) {
+    i %% 1000 + 1
+}
+""",
+}
+
+
+def per_call(url, source, calls):
+    """CPU microseconds per iteration of `source`."""
+    interpreter = Interpreter()
+    interpreter.globals.define('calls', calls)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP % url))
+        program = pvcache.parse(source % ())
+        start = time.process_time()
+        interpreter.interpret(program)
+    return (time.process_time() - start) / calls * 1e6
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    urls = [':memory:']
+    if os.environ.get('PRIVVY_BENCH_POSTGRES'):
+        urls.append(os.environ['PRIVVY_BENCH_POSTGRES'])
+
+    for url in urls:
+        print(f"{'postgres' if url.startswith('postgres') else 'sqlite'}: {calls} calls")
+        for name, source in CASES.items():
+            print(f"  {name:<10} {per_call(url, source, calls):6.2f} us/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-page latency of Model.page against limit/offset.
+Fetches a page near the end of tables of growing size, by keyset
+(User.page(db, size, afterId)) and by all(db) with limit and offset.
+Keyset pages should cost the same at every table size; an OFFSET has to
+step over every earlier row.
+
+Usage: python3 benchmarks/bench_pagination.py [page size]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false]))
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY AUTOINCREMENT", "username", "TEXT", "age", "INTEGER"]))
+"""
+
+KEYSET = """
+for (let i = 0; i < 100; i = i + 1) {
+    len(User.page(db, size, start))
+}
+"""
+
+OFFSET = """
+for (let i = 0; i < 100; i = i + 1) {
+    len(User.all(db, dict(["orderBy", "id", "limit", size, "offset", start])))
+}
+"""
+
+SIZES = (10000, 100000, 1000000)
+
+
+def seed(path, count, existing):
+    """Grow the users table from `existing` rows to `count`."""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, age INTEGER)")
+    connection.executemany("INSERT INTO users (username, age) VALUES (?, ?)",
+                           ((f"user{n}", n % 90) for n in range(existing, count)))
+    connection.commit()
+    connection.close()
+
+
+def per_page(path, source, size, start):
+    """Milliseconds per page of running `source` 100 times."""
+    interpreter = Interpreter()
+    interpreter.globals.define('size', size)
+    interpreter.globals.define('start', start)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP % path))
+        program = pvcache.parse(source)
+        began = time.perf_counter()
+        interpreter.interpret(program)
+    return (time.perf_counter() - began) * 1000 / 100
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        existing = 0
+        print(f"{'rows':>9} {'page()':>10} {'offset':>10}   (last page of {size})")
+        for count in SIZES:
+            seed(path, count, existing)
+            existing = count
+            keyset = per_page(path, KEYSET, size, count - size)
+            offset = per_page(path, OFFSET, size, count - size)
+            print(f"{count:>9} {keyset:8.3f}ms {offset:8.3f}ms")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak memory of lexing + parsing a large seed script.
+Parses a generated db-seed style script twice, once from a fully built
+token list and once from the lexer's token stream, and reports the peak
+traced memory of each. The AST is the same either way, so the interesting
+column is the overhead on top of it: with the stream it stays flat as the
+script grows, with the list it grows with the token count.
+
+Usage: python3 benchmarks/bench_parse_memory.py [lines]
+"""
+
+import gc
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import Lexer
+from parser import Parser
+
+LINE = 'User.create(db, dict(["username", "user{n}", "email", "user{n}@example.com", "age", {age}]))\n'
+
+
+def make_seed(lines):
+    """A seed script with one insert per line."""
+    return ''.join(LINE.format(n=n, age=n % 90) for n in range(lines))
+
+
+def measure(source, make_tokens):
+    """Parse source, returning (peak bytes, AST bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    program = Parser(make_tokens(source)).parse()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del program
+    return peak, retained
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    sizes = sorted({largest // 10, largest // 2, largest})
+    ways = (
+        ('token list', lambda source: Lexer(source).tokenize()),
+        ('stream', lambda source: Lexer(source).stream()),
+    )
+    
+    print(f"{'lines':>7}  {'tokens from':<11} {'peak':>10} {'AST':>10} {'overhead':>10}")
+    for lines in sizes:
+        source = make_seed(lines)
+        for name, make_tokens in ways:
+            peak, retained = measure(source, make_tokens)
+            print(f"{lines:>7}  {name:<11} {peak / 2**20:8.1f}MB "
+                  f"{retained / 2**20:8.1f}MB {(peak - retained) / 2**20:8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
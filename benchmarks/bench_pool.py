@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: opening Database(...) with and without the connection pool.
+Runs a Privvy loop that opens a database, runs one query and closes it,
+the shape of a request handler, first with pooling turned off and then
+with the default pool, and prints the pool's counters.
+
+Set PRIVVY_BENCH_POSTGRES to a postgresql:// URL to include PostgreSQL,
+where connection setup is a network round trip and a login.
+
+Usage: python3 benchmarks/bench_pool.py [iterations]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+LOOP = """
+for (let i = 0; i < %(iterations)d; i = i + 1) {
+    let db = Database("%(url)s", dict(["pool", %(pool)s]))
+    db.query("SELECT 1")
+    db.close()
+}
+let db = Database("%(url)s")
+print(db.poolStats())
+db.close()
+"""
+
+
+def run(url, iterations, pool):
+    program = pvcache.parse(LOOP % {'url': url, 'iterations': iterations, 'pool': pool})
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        Interpreter().interpret(program)
+    return time.perf_counter() - start, output.getvalue().strip()
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workdir = tempfile.mkdtemp()
+    try:
+        urls = [os.path.join(workdir, 'bench.db')]
+        if os.environ.get('PRIVVY_BENCH_POSTGRES'):
+            urls.append(os.environ['PRIVVY_BENCH_POSTGRES'])
+
+        for url in urls:
+            kind = 'postgres' if url.startswith('postgres') else 'sqlite'
+            print(f"{kind}: {iterations} x open, query, close")
+            unpooled, _ = run(url, iterations, 'false')
+            pooled, stats = run(url, iterations, 'true')
+            print(f"  no pool   {unpooled * 1000:8.1f} ms  {unpooled / iterations * 1e6:7.1f} us/open")
+            print(f"  pool      {pooled * 1000:8.1f} ms  {pooled / iterations * 1e6:7.1f} us/open  {unpooled / pooled:4.1f}x")
+            print(f"  {stats}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
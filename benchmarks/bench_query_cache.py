@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dashboard-style db.query calls with and without queryCache.
+Runs the same few aggregate queries over a seeded SQLite file many times,
+with an order written every 50 rounds (which drops the cached queries that
+read the orders table), and prints the cache's counters.
+
+Usage: python3 benchmarks/bench_query_cache.py [rounds]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false, "queryCache", %d]))
+"""
+
+DASHBOARD = """
+for (let i = 0; i < rounds; i = i + 1) {
+    db.query("SELECT COUNT(*) AS n FROM orders")
+    db.query("SELECT status, COUNT(*) AS n, SUM(total) AS revenue FROM orders GROUP BY status")
+    db.query("SELECT * FROM orders WHERE customer_id = ? ORDER BY id DESC LIMIT 10", 42)
+    db.query("SELECT COUNT(*) AS n FROM customers")
+    db.query("SELECT c.name, COUNT(*) AS n FROM customers c JOIN orders o ON o.customer_id = c.id GROUP BY c.id ORDER BY n DESC LIMIT 5")
+    if (i % 50 == 49) {
+        db.execute("INSERT INTO orders (customer_id, status, total) VALUES (?, ?, ?)", 42, "new", 10)
+    }
+}
+print(db.queryCacheStats())
+"""
+
+
+def seed(path, orders):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)")
+    connection.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, status TEXT, total REAL)")
+    connection.executemany("INSERT INTO customers (id, name) VALUES (?, ?)",
+                           ((n, f"customer{n}") for n in range(1, 1001)))
+    connection.executemany("INSERT INTO orders (customer_id, status, total) VALUES (?, ?, ?)",
+                           ((n % 1000 + 1, ('new', 'paid', 'shipped')[n % 3], n % 97) for n in range(orders)))
+    connection.execute("CREATE INDEX orders_customer ON orders (customer_id)")
+    connection.commit()
+    connection.close()
+
+
+def run(path, rounds, cache):
+    interpreter = Interpreter()
+    interpreter.globals.define('rounds', rounds)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(pvcache.parse(SETUP % (path, cache)))
+        program = pvcache.parse(DASHBOARD)
+        start = time.perf_counter()
+        interpreter.interpret(program)
+    return time.perf_counter() - start, output.getvalue().strip()
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        seed(path, 100000)
+        print(f"{rounds} rounds of 5 dashboard queries over 100k orders")
+        uncached, _ = run(path, rounds, 0)
+        cached, stats = run(path, rounds, 100)
+        print(f"  no cache     {uncached:6.2f}s  {uncached / rounds * 1000:7.2f} ms/round")
+        print(f"  queryCache   {cached:6.2f}s  {cached / rounds * 1000:7.2f} ms/round  {uncached / cached:5.1f}x")
+        print(f"  {stats}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
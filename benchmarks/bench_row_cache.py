@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Model.find with and without the rowCache option.
+Looks up a small set of hot ids over and over, as handlers that load the
+current user or its account do, against a SQLite file, and prints the
+cache's counters.
+
+Set PRIVVY_BENCH_POSTGRES to a postgresql:// URL to include PostgreSQL,
+where every uncached find is a network round trip.
+
+Usage: python3 benchmarks/bench_row_cache.py [finds]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%(url)s", dict(["pool", false, "rowCache", %(cache)d]))
+let User = Model("bench_users", dict(["id", "INTEGER PRIMARY KEY", "username", "TEXT", "email", "TEXT"]))
+User.drop(db)
+User.migrate(db)
+fun seed() {
+    for (let i = 0; i < 1000; i = i + 1) {
+        User.create(db, dict(["username", "user", "email", "user@example.com"]))
+    }
+}
+db.transaction(seed)
+"""
+
+FINDS = """
+for (let i = 0; i < finds; i = i + 1) {
+    User.find(db, i % 50 + 1)
+}
+print(db.rowCacheStats())
+"""
+
+
+def run(url, finds, cache):
+    interpreter = Interpreter()
+    interpreter.globals.define('finds', finds)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(pvcache.parse(SETUP % {'url': url, 'cache': cache}))
+        program = pvcache.parse(FINDS)
+        start = time.perf_counter()
+        interpreter.interpret(program)
+    return time.perf_counter() - start, output.getvalue().strip()
+
+
+def main():
+    finds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workdir = tempfile.mkdtemp()
+    try:
+        urls = [os.path.join(workdir, 'bench.db')]
+        if os.environ.get('PRIVVY_BENCH_POSTGRES'):
+            urls.append(os.environ['PRIVVY_BENCH_POSTGRES'])
+
+        for url in urls:
+            kind = 'postgres' if url.startswith('postgres') else 'sqlite'
+            print(f"{kind}: {finds} finds over 50 ids")
+            uncached, _ = run(url, finds, 0)
+            cached, stats = run(url, finds, 1000)
+            print(f"  no cache   {uncached / finds * 1e6:6.2f} us/find")
+            print(f"  rowCache   {cached / finds * 1e6:6.2f} us/find  {uncached / cached:4.1f}x")
+            print(f"  {stats}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: variable lookup in deeply nested scopes.
+Compares walking Environment parents by name against the compiled
+(depth, slot) loads the closure engine uses, then runs a nested-block
+Privvy program under the tree-walker and the closure engine.
+
+Usage: python3 benchmarks/bench_scopes.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import Lexer
+from parser import Parser
+from compiler import ClosureCompiler
+from interpreter import Environment, Interpreter, SlotEnvironment
+from resolver import Scope
+
+LOOKUPS = 200000
+DEPTHS = (0, 2, 4, 8, 16)
+
+
+def nested_source(depth):
+    """A loop that reads and writes a variable declared `depth` blocks out."""
+    opening = "".join("if (true) {\n" for _ in range(depth))
+    closing = "".join("}\n" for _ in range(depth))
+    return f"""
+fun run() {{
+    let total = 0
+    for (let i = 0; i < 50000; i = i + 1) {{
+        {opening}total = total + i
+        {closing}
+    }}
+    return total
+}}
+run()
+"""
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_lookup(depth):
+    """Time LOOKUPS reads of a variable `depth` environments up."""
+    outer = Environment(Environment())
+    outer.define('x', 1)
+    env = outer
+    for _ in range(depth):
+        env = Environment(env)
+    
+    def by_name():
+        get = env.get
+        for _ in range(LOOKUPS):
+            get('x')
+    
+    scope = Scope(['x'])
+    slot_env = SlotEnvironment(scope, Environment(), [1])
+    for _ in range(depth):
+        slot_env = SlotEnvironment(Scope(), slot_env)
+    
+    load = ClosureCompiler(Interpreter()).compile_load('x', depth, 0)
+    
+    def by_slot():
+        for _ in range(LOOKUPS):
+            load(slot_env)
+    
+    return best_of(by_name), best_of(by_slot)
+
+
+def bench_program(program, engine):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            Interpreter(engine).interpret(program)
+    return best_of(run, repeat=3)
+
+
+def main():
+    print(f"Lookup of a variable N environments up, {LOOKUPS} reads")
+    for depth in DEPTHS:
+        by_name, by_slot = bench_lookup(depth)
+        print(f"  depth {depth:<3} by name {by_name * 1000:8.1f} ms   "
+              f"by slot {by_slot * 1000:8.1f} ms  {by_name / by_slot:5.2f}x")
+    
+    print()
+    print("Privvy loop updating a variable through N nested blocks")
+    for depth in DEPTHS:
+        program = Parser(Lexer(nested_source(depth)).tokenize()).parse()
+        tree = bench_program(program, 'tree')
+        closure = bench_program(program, 'closure')
+        print(f"  depth {depth:<3} tree {tree * 1000:8.1f} ms   "
+              f"closure {closure * 1000:8.1f} ms  {tree / closure:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
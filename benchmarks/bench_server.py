@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark: load test of the built-in Server.
+Starts a Privvy script that serves a small JSON API, drives it from
+keep-alive client threads for a few seconds and reports requests/sec and
+latency percentiles. For comparison it also times the old way of serving
+a request: starting `privvy.py` once per request.
+
+Usage: python3 benchmarks/bench_server.py [clients] [seconds]
+"""
+
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP = """
+let db = Database(":memory:")
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY", "name", "TEXT"]))
+User.migrate(db)
+User.create(db, dict(["name", "alice"]))
+
+fun showUser(req) {
+    return User.find(db, int(req["params"]["id"]))
+}
+
+fun health(req) {
+    return dict(["status", "ok"])
+}
+
+let app = Server(dict(["workers", %(workers)d]))
+app.get("/health", health)
+app.get("/users/:id", showUser)
+app.listen(%(port)d)
+"""
+
+# What a wrapper spawning one process per request runs
+ONE_SHOT = """
+let db = Database(":memory:")
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY", "name", "TEXT"]))
+User.migrate(db)
+User.create(db, dict(["name", "alice"]))
+print(User.find(db, 1))
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def load(port, clients, seconds, path):
+    """Run keep-alive clients against a path; return (requests, latencies)."""
+    latencies = [[] for _ in range(clients)]
+    stop = time.perf_counter() + seconds
+
+    def client(samples):
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            samples.append(time.perf_counter() - start)
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(samples,)) for samples in latencies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [latency for samples in latencies for latency in samples]
+
+
+def report(name, latencies, elapsed):
+    print(f"  {name:<22} {len(latencies) / elapsed:8.0f} req/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    workdir = tempfile.mkdtemp()
+    try:
+        port = free_port()
+        script = os.path.join(workdir, 'app.pv')
+        with open(script, 'w') as f:
+            f.write(APP % {'workers': clients, 'port': port})
+
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'privvy.py'), script],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            print(f"Server, {clients} keep-alive clients, {seconds:g}s per route")
+            for path in ('/health', '/users/1'):
+                latencies = load(port, clients, seconds, path)
+                report(f"GET {path}", latencies, seconds)
+        finally:
+            server.terminate()
+            server.wait()
+
+        one_shot = os.path.join(workdir, 'one_shot.pv')
+        with open(one_shot, 'w') as f:
+            f.write(ONE_SHOT)
+        command = [sys.executable, os.path.join(ROOT, 'privvy.py'), one_shot]
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(20):
+            began = time.perf_counter()
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            latencies.append(time.perf_counter() - began)
+        print()
+        print("Process per request, sequential")
+        report("privvy.py per request", latencies, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inserts/sec and reads/sec under each SQLite profile.
+For the default settings and each Database(path, dict(["profile", ...]))
+profile, inserts rows one Model.create (and so one commit) at a time,
+then runs Model.find on random ids, against a fresh database file.
+
+Usage: python3 benchmarks/bench_sqlite_profiles.py [inserts] [reads]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+from database import SQLITE_PROFILES
+
+SETUP = """
+let db = Database("%s", dict(["pool", false%s]))
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY AUTOINCREMENT", "username", "TEXT", "email", "TEXT", "age", "INTEGER"]))
+User.migrate(db)
+"""
+
+INSERTS = """
+for (let i = 0; i < inserts; i = i + 1) {
+    User.create(db, dict(["username", "user", "email", "user@example.com", "age", i]))
+}
+"""
+
+READS = """
+for (let i = 0; i < reads; i = i + 1) {
+    User.find(db, (i * 7919) % inserts + 1)
+}
+"""
+
+
+def run(path, profile, inserts, reads):
+    """(inserts/sec, reads/sec) for one profile on a fresh file."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    interpreter = Interpreter()
+    interpreter.globals.define('inserts', inserts)
+    interpreter.globals.define('reads', reads)
+    option = f', "profile", "{profile}"' if profile else ''
+    rates = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP % (path, option)))
+        for source, count in ((INSERTS, inserts), (READS, reads)):
+            program = pvcache.parse(source)
+            start = time.perf_counter()
+            interpreter.interpret(program)
+            rates.append(count / (time.perf_counter() - start))
+    return rates
+
+
+def main():
+    inserts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    reads = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        print(f"{'profile':<10} {'inserts/s':>10} {'reads/s':>10}")
+        for profile in (None, *SQLITE_PROFILES):
+            insert_rate, read_rate = run(path, profile, inserts, reads)
+            print(f"{profile or 'default':<10} {insert_rate:10.0f} {read_rate:10.0f}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold vs warm startup with the __pvcache__ AST cache.
+Runs `privvy.py` as a fresh process on a generated script, once with an
+empty cache (cold) and once with the cache filled (warm), and also times
+parsing against loading the cached AST inside one process.
+
+Usage: python3 benchmarks/bench_startup.py [functions]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+
+FUNCTION = """
+fun task{n}(items) {{
+    let total = 0
+    for (let i = 0; i < len(items); i = i + 1) {{
+        if (items[i] % 2 == 0) {{
+            total = total + items[i] * {n}
+        }} else {{
+            total = total - 1
+        }}
+    }}
+    return total
+}}
+"""
+
+
+def make_script(functions):
+    """A script that defines many functions but only runs one of them."""
+    parts = [FUNCTION.format(n=n) for n in range(functions)]
+    parts.append('print(task0([1, 2, 3, 4]))\n')
+    return ''.join(parts)
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    source = make_script(functions)
+    workdir = tempfile.mkdtemp()
+    try:
+        script = os.path.join(workdir, 'job.pv')
+        with open(script, 'w') as f:
+            f.write(source)
+        cache_dir = os.path.join(workdir, pvcache.CACHE_DIR)
+        command = [sys.executable, os.path.join(ROOT, 'privvy.py'), script]
+        
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        
+        def warm():
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        
+        def uncached():
+            subprocess.run(command + ['--no-cache'], check=True, stdout=subprocess.DEVNULL)
+        
+        def empty():
+            subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        
+        print(f"Script: {source.count(chr(10))} lines, {functions} functions")
+        print(f"  python3 -c pass      {best_of(empty) * 1000:8.1f} ms")
+        print(f"  --no-cache           {best_of(uncached) * 1000:8.1f} ms")
+        print(f"  cold (empty cache)   {best_of(cold) * 1000:8.1f} ms")
+        warm()
+        print(f"  warm (cache hit)     {best_of(warm) * 1000:8.1f} ms")
+        
+        parse_time = best_of(lambda: pvcache.parse(source))
+        load_time = best_of(lambda: pvcache.load(script, source))
+        print()
+        print("In process")
+        print(f"  lex + parse          {parse_time * 1000:8.1f} ms")
+        print(f"  load cached AST      {load_time * 1000:8.1f} ms  {parse_time / load_time:5.1f}x")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory and time of Model.all on a large table.
+Seeds a SQLite file, then runs Privvy scripts that read the first row of
+User.all(db), and that scan every row through len() and indexing,
+reporting time and peak Python memory (tracemalloc) for each. For
+comparison it also times the fetchall()-into-dicts approach all() used
+before results were streamed.
+
+Usage: python3 benchmarks/bench_streaming.py [rows]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false]))
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY AUTOINCREMENT", "username", "TEXT", "email", "TEXT", "age", "INTEGER"]))
+"""
+
+FIRST_ROW = """
+let first = User.all(db)[0]
+"""
+
+SCAN = """
+let rows = User.all(db)
+let total = 0
+for (let i = 0; i < len(rows); i = i + 1) {
+    total = total + rows[i]["age"]
+}
+"""
+
+
+def seed(path, count):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, email TEXT, age INTEGER)")
+    connection.executemany("INSERT INTO users (username, email, age) VALUES (?, ?, ?)",
+                           ((f"user{n}", f"user{n}@example.com", n % 90) for n in range(count)))
+    connection.commit()
+    connection.close()
+
+
+def measure(fn):
+    """(seconds, peak MB) of calling fn."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def run_privvy(path, source):
+    interpreter = Interpreter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP % path))
+        program = pvcache.parse(source)
+        return measure(lambda: interpreter.interpret(program))
+
+
+def fetch_all_dicts(path):
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    rows = [dict(row) for row in connection.execute("SELECT * FROM users").fetchall()]
+    connection.close()
+    return rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        seed(path, count)
+        print(f"{count} rows")
+        results = [
+            ("fetchall + dicts", measure(lambda: fetch_all_dicts(path))),
+            ("all(db)[0]", run_privvy(path, FIRST_ROW)),
+            ("all(db) full scan", run_privvy(path, SCAN)),
+        ]
+        for name, (elapsed, peak) in results:
+            print(f"  {name:<18} {elapsed:7.2f}s  peak {peak:8.1f} MB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a mix of writes with and without db.transaction.
+Runs the same creates, updates, raw db.execute deletes and Model.delete
+calls against a fresh SQLite file, first committing every write (one
+fsync each) and then wrapped in one db.transaction, and reports
+writes/sec.
+
+Usage: python3 benchmarks/bench_transactions.py [writes]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pvcache
+from interpreter import Interpreter
+
+SETUP = """
+let db = Database("%s", dict(["pool", false]))
+let User = Model("users", dict(["id", "INTEGER PRIMARY KEY AUTOINCREMENT", "username", "TEXT", "age", "INTEGER"]))
+User.migrate(db)
+
+fun work() {
+    let last = 0
+    for (let i = 0; i < writes; i = i + 1) {
+        let op = i %% 4
+        if (op < 2) {
+            last = User.create(db, dict(["username", "user", "age", i]))
+        }
+        if (op == 2) {
+            User.update(db, last, dict(["age", i + 1]))
+        }
+        if (i %% 8 == 3) {
+            db.execute("DELETE FROM users WHERE id = ?", last - 1)
+        }
+        if (i %% 8 == 7) {
+            User.delete(db, last)
+        }
+    }
+}
+"""
+
+PLAIN = """
+work()
+"""
+
+TRANSACTION = """
+db.transaction(work)
+"""
+
+
+def run(path, source, writes):
+    """Seconds to run `source` against a fresh database."""
+    if os.path.exists(path):
+        os.remove(path)
+    interpreter = Interpreter()
+    interpreter.globals.define('writes', writes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(pvcache.parse(SETUP % path))
+        program = pvcache.parse(source)
+        start = time.perf_counter()
+        interpreter.interpret(program)
+    return time.perf_counter() - start
+
+
+def main():
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        plain = run(path, PLAIN, writes)
+        batched = run(path, TRANSACTION, writes)
+        print(f"commit per write  {writes:>7} writes  {plain:7.2f}s  {writes / plain:9.0f} writes/s")
+        print(f"db.transaction    {writes:>7} writes  {batched:7.2f}s  {writes / batched:9.0f} writes/s  {plain / batched:5.1f}x")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
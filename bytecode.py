@@ -0,0 +1,731 @@
+"""
+Bytecode compiler and stack virtual machine for the Privvy programming language.
+Compiles the Abstract Syntax Tree into compact bytecode (opcodes plus a
+constant pool) and executes it without recursing through the AST.
+"""
+
+import operator
+from typing import Any, Dict, List, Optional
+import database
+from ast_nodes import *
+from database import DatabaseConnection, ModelDefinition, ResultSet
+from server import PrivvyServer
+from interpreter import (
+    Environment,
+    InlineCache,
+    PrivvyClass,
+    PrivvyFunction,
+    PrivvyInstance,
+    is_truthy,
+)
+
+
+# Opcodes. Every instruction is an opcode followed by one integer argument.
+LOAD_CONST = 0      # push constants[arg]
+LOAD_NAME = 1       # push the variable names[arg]
+STORE_NAME = 2      # assign the top of stack to names[arg], leave it on the stack
+DEFINE_NAME = 3     # pop a value and define names[arg] in the current environment
+POP = 4             # discard the top of stack
+BINARY_OP = 5       # pop two values, push BINARY_OPERATORS[arg](left, right)
+UNARY_OP = 6        # pop a value, push UNARY_OPERATORS[arg](value)
+JUMP = 7            # continue at arg
+JUMP_IF_FALSE = 8   # pop a value, continue at arg if it is falsy
+PUSH_ENV = 9        # enter a new block environment
+POP_ENV = 10        # leave the current block environment
+CALL = 11           # call with arg arguments: stack is callee, arg1..argN
+GET_ATTR = 12       # pop an object, push its property: constants[arg] is (name, InlineCache)
+SET_ATTR = 13       # pop an object, set property names[arg] to the top of stack
+GET_INDEX = 14      # pop index and array, push array[index]
+SET_INDEX = 15      # pop index and array, set array[index] to the top of stack
+BUILD_LIST = 16     # pop arg values, push them as a list
+MAKE_FUNCTION = 17  # push a function for the FunctionCode constants[arg]
+MAKE_CLASS = 18     # push a class for the ClassCode constants[arg]
+NEW = 19            # instantiate: constants[arg] is (class_name, argc)
+RETURN = 20         # pop a value and return it from the current function
+HALT = 21           # end of the program
+BINARY_OP_CONST = 22  # like BINARY_OP with constants[arg >> 4] as the right operand
+STORE_NAME_POP = 23   # STORE_NAME followed by POP, for assignment statements
+CLEAR_ENV = 24        # forget the current block's variables (reused loop bodies)
+SET_LINE = 25         # tell the N+1 detector the next call is on line arg (only emitted while it is on)
+
+OPCODE_NAMES = [
+    'LOAD_CONST', 'LOAD_NAME', 'STORE_NAME', 'DEFINE_NAME', 'POP',
+    'BINARY_OP', 'UNARY_OP', 'JUMP', 'JUMP_IF_FALSE', 'PUSH_ENV', 'POP_ENV',
+    'CALL', 'GET_ATTR', 'SET_ATTR', 'GET_INDEX', 'SET_INDEX', 'BUILD_LIST',
+    'MAKE_FUNCTION', 'MAKE_CLASS', 'NEW', 'RETURN', 'HALT',
+    'BINARY_OP_CONST', 'STORE_NAME_POP', 'CLEAR_ENV', 'SET_LINE',
+]
+
+
+def _divide(left, right):
+    if right == 0:
+        raise ZeroDivisionError("Division by zero")
+    return left / right
+
+
+# Operator tables, indexed by the BINARY_OP / UNARY_OP argument
+BINARY_OPERATORS = [
+    operator.add,
+    operator.sub,
+    operator.mul,
+    _divide,
+    operator.mod,
+    operator.eq,
+    operator.ne,
+    operator.lt,
+    operator.le,
+    operator.gt,
+    operator.ge,
+    lambda left, right: is_truthy(left) and is_truthy(right),
+    lambda left, right: left if is_truthy(left) else right,
+]
+BINARY_OPERATOR_INDEX = {
+    op: i for i, op in enumerate(['+', '-', '*', '/', '%', '==', '!=', '<', '<=', '>', '>=', 'and', 'or'])
+}
+
+UNARY_OPERATORS = [
+    operator.neg,
+    lambda value: not is_truthy(value),
+]
+UNARY_OPERATOR_INDEX = {'-': 0, 'not': 1, '!': 1}
+
+
+class CodeObject:
+    """A compiled unit of bytecode: a program or a function body."""
+    
+    def __init__(self, name: str, parameters: Optional[List[str]] = None):
+        self.name = name
+        self.parameters = parameters  # None for the top-level program
+        self.code: List[int] = []
+        self.constants: List[Any] = []
+        self.names: List[str] = []
+        
+        # Index of each constant and name, so adding one doesn't scan the lists
+        self.constant_index: Dict[Any, int] = {}
+        self.name_index: Dict[str, int] = {}
+    
+    def emit(self, opcode: int, arg: int = 0) -> int:
+        """Append an instruction and return its position."""
+        self.code.append(opcode)
+        self.code.append(arg)
+        return len(self.code) - 2
+    
+    def patch(self, position: int, target: int):
+        """Point the jump at `position` to `target`."""
+        self.code[position + 1] = target
+    
+    def add_constant(self, value: Any) -> int:
+        """Add a value to the constant pool and return its index.
+        
+        Numbers and strings are shared by type and value, so 1, 1.0 and
+        True stay distinct; anything else only by identity.
+        """
+        if value is None or isinstance(value, (int, float, str)):
+            key = (type(value), value)
+        else:
+            key = (object, id(value))
+        index = self.constant_index.get(key)
+        if index is None:
+            index = self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+    
+    def add_name(self, name: str) -> int:
+        """Add a name to the name table and return its index."""
+        index = self.name_index.get(name)
+        if index is None:
+            index = self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return index
+    
+    def disassemble(self) -> str:
+        """Return a human readable listing of the bytecode."""
+        lines = [f"<code {self.name}>"]
+        for pc in range(0, len(self.code), 2):
+            opcode, arg = self.code[pc], self.code[pc + 1]
+            detail = ''
+            if opcode in (LOAD_NAME, STORE_NAME, STORE_NAME_POP, DEFINE_NAME, SET_ATTR):
+                detail = self.names[arg]
+            elif opcode == GET_ATTR:
+                detail = self.constants[arg][0]
+            elif opcode in (LOAD_CONST, NEW, MAKE_FUNCTION, MAKE_CLASS):
+                detail = repr(self.constants[arg])
+            elif opcode == BINARY_OP_CONST:
+                detail = f"{arg & 15} {self.constants[arg >> 4]!r}"
+            lines.append(f"{pc:5d} {OPCODE_NAMES[opcode]:<16} {arg:<5d} {detail}")
+        return '\n'.join(lines)
+
+
+class FunctionCode:
+    """Constant pool entry for a function declaration."""
+    
+    def __init__(self, declaration: FunctionDeclaration, code: CodeObject):
+        self.declaration = declaration
+        self.code = code
+    
+    def __repr__(self):
+        return f"<function {self.declaration.name}>"
+
+
+class ClassCode:
+    """Constant pool entry for a class declaration."""
+    
+    def __init__(self, name: str, superclass: Optional[str],
+                 constructor: Optional[FunctionCode], methods: List[FunctionCode]):
+        self.name = name
+        self.superclass = superclass
+        self.constructor = constructor
+        self.methods = methods
+    
+    def __repr__(self):
+        return f"<class {self.name}>"
+
+
+class BytecodeCompiler:
+    """Compiles Privvy AST nodes into bytecode."""
+    
+    def __init__(self):
+        self.code: Optional[CodeObject] = None
+        self.expressions = {
+            NumberLiteral: self.compile_literal,
+            StringLiteral: self.compile_literal,
+            BooleanLiteral: self.compile_literal,
+            NullLiteral: self.compile_literal,
+            Identifier: self.compile_identifier,
+            BinaryOp: self.compile_binary_op,
+            UnaryOp: self.compile_unary_op,
+            Assignment: self.compile_assignment,
+            FunctionCall: self.compile_function_call,
+            MemberAccess: self.compile_member_access,
+            ArrayLiteral: self.compile_array_literal,
+            ArrayAccess: self.compile_array_access,
+            ThisExpression: self.compile_this_expression,
+            NewExpression: self.compile_new_expression,
+        }
+        self.statements = {
+            VarDeclaration: self.compile_var_declaration,
+            FunctionDeclaration: self.compile_function_declaration,
+            ClassDeclaration: self.compile_class_declaration,
+            IfStatement: self.compile_if_statement,
+            WhileStatement: self.compile_while_statement,
+            ForStatement: self.compile_for_statement,
+            ReturnStatement: self.compile_return_statement,
+        }
+    
+    def compile_program(self, program: Program) -> CodeObject:
+        """Compile a whole program."""
+        self.code = CodeObject('<program>')
+        self.compile_block(program.statements)
+        self.code.emit(HALT)
+        return self.code
+    
+    def compile_function(self, declaration: FunctionDeclaration) -> FunctionCode:
+        """Compile a function body into its own code object."""
+        enclosing = self.code
+        self.code = CodeObject(declaration.name, declaration.parameters)
+        try:
+            self.compile_block(declaration.body)
+            self.code.emit(LOAD_CONST, self.code.add_constant(None))
+            self.code.emit(RETURN)
+            return FunctionCode(declaration, self.code)
+        finally:
+            self.code = enclosing
+    
+    def compile_block(self, statements: List[ASTNode]):
+        for statement in statements:
+            self.compile_statement(statement)
+    
+    def compile_scoped_block(self, statements: List[ASTNode], scope):
+        """Compile a block that runs in its own environment if it declares anything."""
+        if scope is None:
+            self.compile_block(statements)
+            return
+        self.code.emit(PUSH_ENV)
+        self.compile_block(statements)
+        self.code.emit(POP_ENV)
+    
+    @staticmethod
+    def reuses_environment(scope) -> bool:
+        """Whether a loop body can run every iteration in one cleared environment."""
+        return scope is not None and not scope.captured
+    
+    def compile_statement(self, node: ASTNode):
+        compiler = self.statements.get(type(node))
+        if compiler is not None:
+            compiler(node)
+        elif isinstance(node, Assignment) and isinstance(node.target, Identifier):
+            self.compile_expression(node.value)
+            self.code.emit(STORE_NAME_POP, self.code.add_name(node.target.name))
+        else:
+            # Expression statement
+            self.compile_expression(node)
+            self.code.emit(POP)
+    
+    def compile_expression(self, node: ASTNode):
+        compiler = self.expressions.get(type(node))
+        if compiler is None:
+            raise RuntimeError(f"Unknown AST node type: {type(node).__name__}")
+        compiler(node)
+    
+    # Expressions
+    
+    def compile_literal(self, node: ASTNode):
+        value = None if isinstance(node, NullLiteral) else node.value
+        self.code.emit(LOAD_CONST, self.code.add_constant(value))
+    
+    def compile_identifier(self, node: Identifier):
+        self.code.emit(LOAD_NAME, self.code.add_name(node.name))
+    
+    def compile_binary_op(self, node: BinaryOp):
+        self.compile_expression(node.left)
+        
+        # Fold a literal right operand into the instruction ("i + 1", "n < 2")
+        if node.operator in BINARY_OPERATOR_INDEX and isinstance(node.right, (NumberLiteral, StringLiteral, BooleanLiteral)):
+            constant = self.code.add_constant(node.right.value)
+            self.code.emit(BINARY_OP_CONST, constant << 4 | BINARY_OPERATOR_INDEX[node.operator])
+            return
+        
+        self.compile_expression(node.right)
+        
+        if node.operator in BINARY_OPERATOR_INDEX:
+            self.code.emit(BINARY_OP, BINARY_OPERATOR_INDEX[node.operator])
+        else:
+            # Unknown operators evaluate both sides and produce null
+            self.code.emit(POP)
+            self.code.emit(POP)
+            self.code.emit(LOAD_CONST, self.code.add_constant(None))
+    
+    def compile_unary_op(self, node: UnaryOp):
+        self.compile_expression(node.operand)
+        
+        if node.operator in UNARY_OPERATOR_INDEX:
+            self.code.emit(UNARY_OP, UNARY_OPERATOR_INDEX[node.operator])
+        else:
+            self.code.emit(POP)
+            self.code.emit(LOAD_CONST, self.code.add_constant(None))
+    
+    def compile_assignment(self, node: Assignment):
+        self.compile_expression(node.value)
+        target = node.target
+        
+        if isinstance(target, Identifier):
+            self.code.emit(STORE_NAME, self.code.add_name(target.name))
+        elif isinstance(target, MemberAccess):
+            self.compile_expression(target.object)
+            self.code.emit(SET_ATTR, self.code.add_name(target.property))
+        elif isinstance(target, ArrayAccess):
+            self.compile_expression(target.array)
+            self.compile_expression(target.index)
+            self.code.emit(SET_INDEX)
+    
+    def compile_function_call(self, node: FunctionCall):
+        self.compile_expression(node.callee)
+        for arg in node.arguments:
+            self.compile_expression(arg)
+        if database.QUERY_LOG is not None:
+            self.code.emit(SET_LINE, node.line)
+        self.code.emit(CALL, len(node.arguments))
+    
+    def compile_member_access(self, node: MemberAccess):
+        self.compile_expression(node.object)
+        # Every access site gets its own method cache
+        self.code.emit(GET_ATTR, self.code.add_constant((node.property, InlineCache())))
+    
+    def compile_array_literal(self, node: ArrayLiteral):
+        for elem in node.elements:
+            self.compile_expression(elem)
+        self.code.emit(BUILD_LIST, len(node.elements))
+    
+    def compile_array_access(self, node: ArrayAccess):
+        self.compile_expression(node.array)
+        self.compile_expression(node.index)
+        self.code.emit(GET_INDEX)
+    
+    def compile_this_expression(self, node: ThisExpression):
+        self.code.emit(LOAD_NAME, self.code.add_name('this'))
+    
+    def compile_new_expression(self, node: NewExpression):
+        self.code.emit(LOAD_NAME, self.code.add_name(node.class_name))
+        for arg in node.arguments:
+            self.compile_expression(arg)
+        self.code.emit(NEW, self.code.add_constant((node.class_name, len(node.arguments))))
+    
+    # Statements
+    
+    def compile_var_declaration(self, node: VarDeclaration):
+        if node.initializer is not None:
+            self.compile_expression(node.initializer)
+        else:
+            self.code.emit(LOAD_CONST, self.code.add_constant(None))
+        self.code.emit(DEFINE_NAME, self.code.add_name(node.name))
+    
+    def compile_function_declaration(self, node: FunctionDeclaration):
+        function = self.compile_function(node)
+        self.code.emit(MAKE_FUNCTION, self.code.add_constant(function))
+        self.code.emit(DEFINE_NAME, self.code.add_name(node.name))
+    
+    def compile_class_declaration(self, node: ClassDeclaration):
+        constructor = self.compile_function(node.constructor) if node.constructor else None
+        methods = [self.compile_function(method) for method in node.methods]
+        klass = ClassCode(node.name, node.superclass, constructor, methods)
+        
+        self.code.emit(MAKE_CLASS, self.code.add_constant(klass))
+        self.code.emit(DEFINE_NAME, self.code.add_name(node.name))
+    
+    def compile_if_statement(self, node: IfStatement):
+        self.compile_expression(node.condition)
+        jump_to_else = self.code.emit(JUMP_IF_FALSE)
+        self.compile_scoped_block(node.then_branch, node.then_scope)
+        
+        if node.else_branch:
+            jump_to_end = self.code.emit(JUMP)
+            self.code.patch(jump_to_else, len(self.code.code))
+            self.compile_scoped_block(node.else_branch, node.else_scope)
+            self.code.patch(jump_to_end, len(self.code.code))
+        else:
+            self.code.patch(jump_to_else, len(self.code.code))
+    
+    def compile_while_statement(self, node: WhileStatement):
+        # A body no closure can capture keeps one environment for the whole
+        # loop and clears it after each iteration
+        reuse = self.reuses_environment(node.body_scope)
+        if reuse:
+            self.code.emit(PUSH_ENV)
+        
+        loop_start = len(self.code.code)
+        self.compile_expression(node.condition)
+        exit_jump = self.code.emit(JUMP_IF_FALSE)
+        
+        if reuse:
+            self.compile_block(node.body)
+            self.code.emit(CLEAR_ENV)
+        else:
+            self.compile_scoped_block(node.body, node.body_scope)
+        self.code.emit(JUMP, loop_start)
+        self.code.patch(exit_jump, len(self.code.code))
+        
+        if reuse:
+            self.code.emit(POP_ENV)
+    
+    def compile_for_statement(self, node: ForStatement):
+        # The loop variable lives in its own environment around the body's
+        if node.scope is not None:
+            self.code.emit(PUSH_ENV)
+        if node.initializer:
+            self.compile_statement(node.initializer)
+        
+        reuse = self.reuses_environment(node.body_scope)
+        if reuse:
+            self.code.emit(PUSH_ENV)
+        
+        loop_start = len(self.code.code)
+        exit_jump = None
+        if node.condition:
+            self.compile_expression(node.condition)
+            exit_jump = self.code.emit(JUMP_IF_FALSE)
+        
+        if reuse:
+            self.compile_block(node.body)
+            self.code.emit(CLEAR_ENV)
+        else:
+            self.compile_scoped_block(node.body, node.body_scope)
+        
+        if node.increment:
+            self.compile_expression(node.increment)
+            self.code.emit(POP)
+        self.code.emit(JUMP, loop_start)
+        
+        if exit_jump is not None:
+            self.code.patch(exit_jump, len(self.code.code))
+        if reuse:
+            self.code.emit(POP_ENV)
+        if node.scope is not None:
+            self.code.emit(POP_ENV)
+    
+    def compile_return_statement(self, node: ReturnStatement):
+        if node.value is not None:
+            self.compile_expression(node.value)
+        else:
+            self.code.emit(LOAD_CONST, self.code.add_constant(None))
+        self.code.emit(RETURN)
+
+
+class VMFunction(PrivvyFunction):
+    """A Privvy function whose body runs on the virtual machine."""
+    
+    def __init__(self, declaration: FunctionDeclaration, closure: Environment,
+                 code: CodeObject, vm: 'VirtualMachine'):
+        super().__init__(declaration, closure)
+        self.code = code
+        self.vm = vm
+    
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        """Execute the function."""
+        return self.vm.run(self.code, self.vm.function_environment(self, arguments))
+    
+    def bind(self, instance: PrivvyInstance) -> 'VMFunction':
+        """Return a copy of this function with 'this' bound to an instance."""
+        env = Environment(self.closure)
+        env.define('this', instance)
+        return VMFunction(self.declaration, env, self.code, self.vm)
+
+
+class VirtualMachine:
+    """Executes bytecode produced by the BytecodeCompiler."""
+    
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+    
+    def function_environment(self, function: VMFunction, arguments: List[Any]) -> Environment:
+        """Create the environment a function call runs in."""
+        parameters = function.code.parameters
+        if len(arguments) != len(parameters):
+            raise TypeError(f"Function {function.declaration.name} expects {len(parameters)} arguments, got {len(arguments)}")
+        
+        env = Environment(function.closure)
+        env.variables.update(zip(parameters, arguments))
+        return env
+    
+    def make_class(self, klass: ClassCode, env: Environment) -> PrivvyClass:
+        superclass = None
+        if klass.superclass:
+            superclass = env.get(klass.superclass)
+            if not isinstance(superclass, PrivvyClass):
+                raise TypeError("Superclass must be a class")
+        
+        constructor = None
+        if klass.constructor:
+            constructor = VMFunction(klass.constructor.declaration, env, klass.constructor.code, self)
+        
+        methods = {
+            method.declaration.name: VMFunction(method.declaration, env, method.code, self)
+            for method in klass.methods
+        }
+        
+        return PrivvyClass(klass.name, superclass, constructor, methods)
+    
+    def run(self, code_object: CodeObject, env: Environment) -> Any:
+        """Run a code object until it returns or halts."""
+        interpreter = self.interpreter
+        binary_operators = BINARY_OPERATORS
+        unary_operators = UNARY_OPERATORS
+        
+        # Opcodes as locals: comparing against globals costs a dict lookup
+        (_LOAD_CONST, _LOAD_NAME, _STORE_NAME, _DEFINE_NAME, _POP, _BINARY_OP,
+         _UNARY_OP, _JUMP, _JUMP_IF_FALSE, _PUSH_ENV, _POP_ENV, _CALL, _GET_ATTR,
+         _SET_ATTR, _GET_INDEX, _SET_INDEX, _BUILD_LIST, _MAKE_FUNCTION,
+         _MAKE_CLASS, _NEW, _RETURN, _HALT, _BINARY_OP_CONST, _STORE_NAME_POP,
+         _CLEAR_ENV, _SET_LINE) = range(26)
+        
+        code = code_object.code
+        constants = code_object.constants
+        names = code_object.names
+        stack: List[Any] = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        
+        # Caller state saved across Privvy-to-Privvy calls:
+        # (code_object, pc, env, stack, instance returned by a constructor)
+        frames = []
+        
+        while True:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+            
+            # Ordered roughly by how often each instruction runs
+            if op == _LOAD_NAME:
+                name = names[arg]
+                e = env
+                while e is not None:
+                    variables = e.variables
+                    if name in variables:
+                        push(variables[name])
+                        break
+                    e = e.parent
+                else:
+                    raise NameError(f"Undefined variable: {name}")
+            
+            elif op == _BINARY_OP_CONST:
+                stack[-1] = binary_operators[arg & 15](stack[-1], constants[arg >> 4])
+            
+            elif op == _LOAD_CONST:
+                push(constants[arg])
+            
+            elif op == _JUMP_IF_FALSE:
+                value = pop()
+                if value is not True and (value is None or value is False or value == 0 or value == ""):
+                    pc = arg
+            
+            elif op == _STORE_NAME_POP or op == _STORE_NAME:
+                name = names[arg]
+                value = pop() if op == _STORE_NAME_POP else stack[-1]
+                e = env
+                while e is not None:
+                    variables = e.variables
+                    if name in variables:
+                        variables[name] = value
+                        break
+                    e = e.parent
+                else:
+                    raise NameError(f"Undefined variable: {name}")
+            
+            elif op == _PUSH_ENV:
+                env = Environment(env)
+            
+            elif op == _POP_ENV:
+                env = env.parent
+            
+            elif op == _CLEAR_ENV:
+                env.variables.clear()
+            
+            elif op == _JUMP:
+                pc = arg
+            
+            elif op == _BINARY_OP:
+                right = pop()
+                stack[-1] = binary_operators[arg](stack[-1], right)
+            
+            elif op == _POP:
+                pop()
+            
+            elif op == _DEFINE_NAME:
+                env.variables[names[arg]] = pop()
+            
+            elif op == _CALL:
+                if arg:
+                    arguments = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    arguments = []
+                callee = pop()
+                
+                if type(callee) is VMFunction:
+                    # Privvy-to-Privvy call: switch frames instead of recursing
+                    frames.append((code_object, pc, env, stack, None))
+                    env = self.function_environment(callee, arguments)
+                    code_object = callee.code
+                    code = code_object.code
+                    constants = code_object.constants
+                    names = code_object.names
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                    pc = 0
+                elif hasattr(callee, 'call'):
+                    push(callee.call(interpreter, arguments))
+                else:
+                    raise TypeError(f"'{callee}' is not callable")
+            
+            elif op == _RETURN:
+                value = pop()
+                if not frames:
+                    if code_object.parameters is None:
+                        raise RuntimeError("Cannot use 'return' outside a function")
+                    return value
+                
+                code_object, pc, env, stack, instance = frames.pop()
+                code = code_object.code
+                constants = code_object.constants
+                names = code_object.names
+                push = stack.append
+                pop = stack.pop
+                push(value if instance is None else instance)
+            
+            elif op == _GET_ATTR:
+                obj = stack[-1]
+                name, cache = constants[arg]
+                if type(obj) is PrivvyInstance:
+                    stack[-1] = cache.get(obj, name)
+                elif isinstance(obj, (PrivvyInstance, DatabaseConnection, ModelDefinition, PrivvyServer)):
+                    stack[-1] = obj.get(name)
+                    # Don't keep a dropped Database (and its connection) alive
+                    obj = None
+                else:
+                    raise TypeError(f"Cannot access property on {type(obj).__name__}")
+            
+            elif op == _SET_ATTR:
+                obj = pop()
+                if isinstance(obj, PrivvyInstance):
+                    obj.set(names[arg], stack[-1])
+                else:
+                    raise TypeError("Cannot set property on non-object")
+            
+            elif op == _GET_INDEX:
+                index = pop()
+                array = stack[-1]
+                if isinstance(array, (list, str, ResultSet)):
+                    stack[-1] = array[int(index)]
+                elif isinstance(array, dict):
+                    stack[-1] = array[index]
+                else:
+                    raise TypeError("Cannot index non-array")
+            
+            elif op == _SET_INDEX:
+                index = pop()
+                array = pop()
+                if isinstance(array, (list, ResultSet)):
+                    array[int(index)] = stack[-1]
+                else:
+                    raise TypeError("Cannot index non-array")
+            
+            elif op == _UNARY_OP:
+                stack[-1] = unary_operators[arg](stack[-1])
+            
+            elif op == _BUILD_LIST:
+                if arg:
+                    elements = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    elements = []
+                push(elements)
+            
+            elif op == _NEW:
+                class_name, argc = constants[arg]
+                if argc:
+                    arguments = stack[-argc:]
+                    del stack[-argc:]
+                else:
+                    arguments = []
+                klass = pop()
+                
+                if not isinstance(klass, PrivvyClass):
+                    raise TypeError(f"'{class_name}' is not a class")
+                
+                constructor = klass.constructor
+                if type(constructor) is VMFunction:
+                    if len(arguments) != len(constructor.code.parameters):
+                        raise TypeError(f"Constructor expects {len(constructor.code.parameters)} arguments, got {len(arguments)}")
+                    
+                    instance = PrivvyInstance(klass)
+                    frames.append((code_object, pc, env, stack, instance))
+                    env = self.function_environment(constructor.bind(instance), arguments)
+                    code_object = constructor.code
+                    code = code_object.code
+                    constants = code_object.constants
+                    names = code_object.names
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                    pc = 0
+                else:
+                    push(klass.call(interpreter, arguments))
+            
+            elif op == _MAKE_FUNCTION:
+                function = constants[arg]
+                push(VMFunction(function.declaration, env, function.code, self))
+            
+            elif op == _MAKE_CLASS:
+                push(self.make_class(constants[arg], env))
+            
+            elif op == _HALT:
+                return None
+            
+            elif op == _SET_LINE:
+                query_log = database.QUERY_LOG
+                if query_log is not None:
+                    query_log.line = arg
+            
+            else:
+                raise RuntimeError(f"Unknown opcode: {op}")
@@ -0,0 +1,657 @@
+"""
+Closure compiler for the Privvy programming language.
+Turns the Abstract Syntax Tree into nested Python closures once, so that
+running a program no longer re-dispatches on node types. Variables are
+read and written by the (depth, slot) the resolver assigned them.
+"""
+
+import operator
+from typing import Any, Callable, List, Optional
+import database
+from ast_nodes import *
+from database import DatabaseConnection, ModelDefinition, ResultSet
+from server import PrivvyServer
+from interpreter import (
+    UNSET,
+    Environment,
+    InlineCache,
+    PrivvyClass,
+    PrivvyFunction,
+    PrivvyInstance,
+    ReturnValue,
+    SlotEnvironment,
+    is_truthy,
+)
+from resolver import THIS_SCOPE
+
+
+# A compiled node: takes the current environment, returns the node's value
+Code = Callable[[Environment], Any]
+
+
+def _divide(left, right):
+    if right == 0:
+        raise ZeroDivisionError("Division by zero")
+    return left / right
+
+
+def _and(left, right):
+    return is_truthy(left) and is_truthy(right)
+
+
+def _or(left, right):
+    return left if is_truthy(left) else right
+
+
+# Operator functions, chosen once when a BinaryOp is compiled
+BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': _divide,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'and': _and,
+    'or': _or,
+}
+
+# Operators that always produce a bool, so conditions can skip is_truthy()
+BOOLEAN_OPERATORS = {'==', '!=', '<', '<=', '>', '>=', 'and'}
+
+LITERALS = (NumberLiteral, StringLiteral, BooleanLiteral, NullLiteral)
+
+# Statements whose compiled code returns None or a ReturnValue signal;
+# everything else is an expression statement and returns its value
+STATEMENTS = (VarDeclaration, FunctionDeclaration, ClassDeclaration,
+              IfStatement, WhileStatement, ForStatement, ReturnStatement)
+
+
+def can_return(statements: List[ASTNode]) -> bool:
+    """Whether a block may end in a return (not counting nested functions)."""
+    for statement in statements:
+        if isinstance(statement, ReturnStatement):
+            return True
+        if isinstance(statement, IfStatement):
+            if can_return(statement.then_branch) or can_return(statement.else_branch or []):
+                return True
+        elif isinstance(statement, (WhileStatement, ForStatement)):
+            if can_return(statement.body):
+                return True
+    return False
+
+
+class CompiledFunction(PrivvyFunction):
+    """A Privvy function whose body has been compiled to a closure."""
+    
+    def __init__(self, declaration: FunctionDeclaration, closure, body: Code):
+        super().__init__(declaration, closure)
+        self.body = body
+        self.scope = declaration.scope
+        
+        # Parameters take the first slots unless a name is repeated
+        parameter_slots = [self.scope.index[param] for param in declaration.parameters]
+        self.parameter_slots = None if parameter_slots == list(range(len(parameter_slots))) else parameter_slots
+    
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        """Execute the function."""
+        parameters = self.declaration.parameters
+        if len(arguments) != len(parameters):
+            raise TypeError(f"Function {self.declaration.name} expects {len(parameters)} arguments, got {len(arguments)}")
+        
+        if self.parameter_slots is None:
+            values = arguments + [UNSET] * (self.scope.size - len(arguments))
+        else:
+            values = [UNSET] * self.scope.size
+            for slot, value in zip(self.parameter_slots, arguments):
+                values[slot] = value
+        
+        signal = self.body(SlotEnvironment(self.scope, self.closure, values))
+        if signal is not None:
+            return signal.value
+        
+        return None
+    
+    def bind(self, instance: PrivvyInstance) -> 'CompiledFunction':
+        """Return a copy of this function with 'this' bound to an instance."""
+        env = SlotEnvironment(THIS_SCOPE, self.closure, [instance])
+        return CompiledFunction(self.declaration, env, self.body)
+
+
+class ClosureCompiler:
+    """Compiles Privvy AST nodes into Python closures."""
+    
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.globals = interpreter.globals.variables
+        self.compilers = {
+            NumberLiteral: self.compile_literal,
+            StringLiteral: self.compile_literal,
+            BooleanLiteral: self.compile_literal,
+            NullLiteral: self.compile_literal,
+            Identifier: self.compile_identifier,
+            BinaryOp: self.compile_binary_op,
+            UnaryOp: self.compile_unary_op,
+            VarDeclaration: self.compile_var_declaration,
+            Assignment: self.compile_assignment,
+            FunctionCall: self.compile_function_call,
+            MemberAccess: self.compile_member_access,
+            ArrayLiteral: self.compile_array_literal,
+            ArrayAccess: self.compile_array_access,
+            FunctionDeclaration: self.compile_function_declaration,
+            ClassDeclaration: self.compile_class_declaration,
+            IfStatement: self.compile_if_statement,
+            WhileStatement: self.compile_while_statement,
+            ForStatement: self.compile_for_statement,
+            ReturnStatement: self.compile_return_statement,
+            ThisExpression: self.compile_this_expression,
+            NewExpression: self.compile_new_expression,
+        }
+    
+    def compile_program(self, program: Program) -> Code:
+        """Compile a whole (resolved) program into a single callable."""
+        return self.compile_block(program.statements)
+    
+    def compile(self, node: ASTNode) -> Code:
+        """Compile a statement or expression."""
+        compiler = self.compilers.get(type(node))
+        if compiler is None:
+            raise RuntimeError(f"Unknown AST node type: {type(node).__name__}")
+        return compiler(node)
+    
+    def compile_block(self, statements: List[ASTNode]) -> Code:
+        """Compile a list of statements, run in the given environment.
+        
+        The compiled block returns the ReturnValue of a return statement
+        that ended it early, or None if it ran to completion.
+        """
+        code = tuple(self.compile(statement) for statement in statements)
+        
+        if not code:
+            return lambda env: None
+        
+        if len(code) == 1:
+            if isinstance(statements[0], STATEMENTS):
+                return code[0]
+            expression = code[0]
+            
+            def expression_block(env):
+                expression(env)
+            return expression_block
+        
+        if not can_return(statements):
+            def block(env):
+                for statement in code:
+                    statement(env)
+            return block
+        
+        def returning_block(env):
+            for statement in code:
+                result = statement(env)
+                if result is not None and type(result) is ReturnValue:
+                    return result
+        return returning_block
+    
+    def compile_condition(self, node: ASTNode) -> Code:
+        """Compile an expression whose value is only used for its truthiness."""
+        code = self.compile(node)
+        
+        if isinstance(node, BinaryOp) and node.operator in BOOLEAN_OPERATORS:
+            return code
+        if isinstance(node, UnaryOp) and node.operator in ('not', '!'):
+            return code
+        
+        def condition(env):
+            return is_truthy(code(env))
+        return condition
+    
+    # Expressions
+    
+    def compile_literal(self, node: ASTNode) -> Code:
+        value = None if isinstance(node, NullLiteral) else node.value
+        return lambda env: value
+    
+    def compile_identifier(self, node: Identifier) -> Code:
+        return self.compile_load(node.name, node.depth, node.slot)
+    
+    def compile_load(self, name: str, depth: Optional[int], slot: Optional[int]) -> Code:
+        """Compile a read of a resolved variable."""
+        if depth is None:
+            variables = self.globals
+            
+            def load_global(env):
+                value = variables.get(name, UNSET)
+                if value is UNSET:
+                    raise NameError(f"Undefined variable: {name}")
+                return value
+            return load_global
+        
+        # A slot is UNSET until its declaration runs; until then the name
+        # still refers to an outer variable, so look it up from there
+        if depth == 0:
+            def load_local(env):
+                value = env.values[slot]
+                if value is UNSET:
+                    return env.parent.get(name)
+                return value
+            return load_local
+        
+        if depth == 1:
+            def load_enclosing(env):
+                env = env.parent
+                value = env.values[slot]
+                if value is UNSET:
+                    return env.parent.get(name)
+                return value
+            return load_enclosing
+        
+        def load_outer(env):
+            for _ in range(depth):
+                env = env.parent
+            value = env.values[slot]
+            if value is UNSET:
+                return env.parent.get(name)
+            return value
+        return load_outer
+    
+    def compile_store(self, name: str, depth: Optional[int], slot: Optional[int]) -> Callable[[Any, Any], None]:
+        """Compile an assignment to an existing resolved variable."""
+        if depth is None:
+            variables = self.globals
+            
+            def store_global(env, value):
+                if name not in variables:
+                    raise NameError(f"Undefined variable: {name}")
+                variables[name] = value
+            return store_global
+        
+        def store(env, value):
+            for _ in range(depth):
+                env = env.parent
+            values = env.values
+            if values[slot] is UNSET:
+                env.parent.set(name, value)
+            else:
+                values[slot] = value
+        return store
+    
+    def compile_define(self, name: str, slot: Optional[int]) -> Callable[[Any, Any], None]:
+        """Compile a declaration in the current block (or the globals)."""
+        if slot is None:
+            variables = self.globals
+            
+            def define_global(env, value):
+                variables[name] = value
+            return define_global
+        
+        def define(env, value):
+            env.values[slot] = value
+        return define
+    
+    def compile_binary_op(self, node: BinaryOp) -> Code:
+        op = BINARY_OPERATORS.get(node.operator)
+        left = self.compile(node.left)
+        
+        if op is None:
+            right = self.compile(node.right)
+            
+            def unknown(env):
+                left(env)
+                right(env)
+                return None
+            return unknown
+        
+        # Specialize the common "x + 1" / "i < 10" shape
+        if isinstance(node.right, LITERALS):
+            constant = None if isinstance(node.right, NullLiteral) else node.right.value
+            
+            def binary_constant(env):
+                return op(left(env), constant)
+            return binary_constant
+        
+        right = self.compile(node.right)
+        
+        def binary(env):
+            return op(left(env), right(env))
+        return binary
+    
+    def compile_unary_op(self, node: UnaryOp) -> Code:
+        operand = self.compile(node.operand)
+        
+        if node.operator == '-':
+            def negate(env):
+                return -operand(env)
+            return negate
+        
+        if node.operator in ('not', '!'):
+            def logical_not(env):
+                return not is_truthy(operand(env))
+            return logical_not
+        
+        def unknown(env):
+            operand(env)
+            return None
+        return unknown
+    
+    def compile_assignment(self, node: Assignment) -> Code:
+        value_code = self.compile(node.value)
+        target = node.target
+        
+        if isinstance(target, Identifier):
+            name, depth, slot = target.name, node.depth, node.slot
+            
+            if depth == 0:
+                def assign_local(env):
+                    value = value_code(env)
+                    values = env.values
+                    if values[slot] is UNSET:
+                        env.parent.set(name, value)
+                    else:
+                        values[slot] = value
+                    return value
+                return assign_local
+            
+            store = self.compile_store(name, depth, slot)
+            
+            def assign_variable(env):
+                value = value_code(env)
+                store(env, value)
+                return value
+            return assign_variable
+        
+        if isinstance(target, MemberAccess):
+            object_code = self.compile(target.object)
+            prop = target.property
+            
+            def assign_property(env):
+                value = value_code(env)
+                obj = object_code(env)
+                if isinstance(obj, PrivvyInstance):
+                    obj.set(prop, value)
+                else:
+                    raise TypeError("Cannot set property on non-object")
+                return value
+            return assign_property
+        
+        if isinstance(target, ArrayAccess):
+            array_code = self.compile(target.array)
+            index_code = self.compile(target.index)
+            
+            def assign_index(env):
+                value = value_code(env)
+                array = array_code(env)
+                index = index_code(env)
+                if isinstance(array, (list, ResultSet)):
+                    array[int(index)] = value
+                else:
+                    raise TypeError("Cannot index non-array")
+                return value
+            return assign_index
+        
+        return value_code
+    
+    def compile_function_call(self, node: FunctionCall) -> Code:
+        interpreter = self.interpreter
+        callee_code = self.compile(node.callee)
+        argument_codes = tuple(self.compile(arg) for arg in node.arguments)
+        
+        def call(callee, arguments):
+            if hasattr(callee, 'call'):
+                return callee.call(interpreter, arguments)
+            raise TypeError(f"'{callee}' is not callable")
+        
+        # With the N+1 detector on, each call first tells it its line
+        query_log = database.QUERY_LOG
+        if query_log is not None:
+            line = node.line
+            call_here = call
+            
+            def call(callee, arguments):
+                query_log.line = line
+                return call_here(callee, arguments)
+        
+        # Avoid building the argument list with a generator for short calls
+        if not argument_codes:
+            def call_0(env):
+                return call(callee_code(env), [])
+            return call_0
+        
+        if len(argument_codes) == 1:
+            arg0 = argument_codes[0]
+            
+            def call_1(env):
+                callee = callee_code(env)
+                return call(callee, [arg0(env)])
+            return call_1
+        
+        if len(argument_codes) == 2:
+            arg0, arg1 = argument_codes
+            
+            def call_2(env):
+                callee = callee_code(env)
+                return call(callee, [arg0(env), arg1(env)])
+            return call_2
+        
+        def call_n(env):
+            callee = callee_code(env)
+            return call(callee, [arg(env) for arg in argument_codes])
+        return call_n
+    
+    def compile_member_access(self, node: MemberAccess) -> Code:
+        object_code = self.compile(node.object)
+        prop = node.property
+        cache = node.cache = InlineCache()
+        cached_get = cache.get
+        
+        def member_access(env):
+            obj = object_code(env)
+            if type(obj) is PrivvyInstance:
+                return cached_get(obj, prop)
+            if isinstance(obj, (PrivvyInstance, DatabaseConnection, ModelDefinition, PrivvyServer)):
+                return obj.get(prop)
+            raise TypeError(f"Cannot access property on {type(obj).__name__}")
+        return member_access
+    
+    def compile_array_literal(self, node: ArrayLiteral) -> Code:
+        element_codes = tuple(self.compile(elem) for elem in node.elements)
+        
+        def array_literal(env):
+            return [elem(env) for elem in element_codes]
+        return array_literal
+    
+    def compile_array_access(self, node: ArrayAccess) -> Code:
+        array_code = self.compile(node.array)
+        index_code = self.compile(node.index)
+        
+        def array_access(env):
+            array = array_code(env)
+            index = index_code(env)
+            
+            if isinstance(array, (list, str, ResultSet)):
+                return array[int(index)]
+            elif isinstance(array, dict):
+                return array[index]
+            raise TypeError("Cannot index non-array")
+        return array_access
+    
+    def compile_this_expression(self, node: ThisExpression) -> Code:
+        return self.compile_load('this', node.depth, node.slot)
+    
+    def compile_new_expression(self, node: NewExpression) -> Code:
+        interpreter = self.interpreter
+        class_name = node.class_name
+        load_class = self.compile_load(class_name, node.depth, node.slot)
+        argument_codes = tuple(self.compile(arg) for arg in node.arguments)
+        
+        def new(env):
+            klass = load_class(env)
+            
+            if not isinstance(klass, PrivvyClass):
+                raise TypeError(f"'{class_name}' is not a class")
+            
+            return klass.call(interpreter, [arg(env) for arg in argument_codes])
+        return new
+    
+    # Statements
+    
+    def compile_var_declaration(self, node: VarDeclaration) -> Code:
+        slot = node.slot
+        initializer = self.compile(node.initializer) if node.initializer is not None else (lambda env: None)
+        
+        if slot is not None:
+            def declare_local(env):
+                env.values[slot] = initializer(env)
+            return declare_local
+        
+        define = self.compile_define(node.name, slot)
+        
+        def declare(env):
+            define(env, initializer(env))
+        return declare
+    
+    def compile_function_declaration(self, node: FunctionDeclaration) -> Code:
+        define = self.compile_define(node.name, node.slot)
+        body = self.compile_block(node.body)
+        
+        def declare_function(env):
+            define(env, CompiledFunction(node, env, body))
+        return declare_function
+    
+    def compile_class_declaration(self, node: ClassDeclaration) -> Code:
+        name = node.name
+        define = self.compile_define(name, node.slot)
+        superclass_name = node.superclass
+        constructor = node.constructor
+        constructor_body = self.compile_block(constructor.body) if constructor else None
+        methods = [(method, self.compile_block(method.body)) for method in node.methods]
+        
+        def declare_class(env):
+            superclass = None
+            if superclass_name:
+                superclass = env.get(superclass_name)
+                if not isinstance(superclass, PrivvyClass):
+                    raise TypeError("Superclass must be a class")
+            
+            compiled_constructor = None
+            if constructor:
+                compiled_constructor = CompiledFunction(constructor, env, constructor_body)
+            
+            compiled_methods = {
+                method.name: CompiledFunction(method, env, body)
+                for method, body in methods
+            }
+            
+            define(env, PrivvyClass(name, superclass, compiled_constructor, compiled_methods))
+        return declare_class
+    
+    def compile_scoped_block(self, statements: List[ASTNode], scope) -> Code:
+        """Compile a block that gets its own environment if it declares anything."""
+        block = self.compile_block(statements)
+        if scope is None:
+            return block
+        
+        def scoped_block(env):
+            return block(SlotEnvironment(scope, env))
+        return scoped_block
+    
+    def compile_if_statement(self, node: IfStatement) -> Code:
+        condition = self.compile_condition(node.condition)
+        then_branch = self.compile_scoped_block(node.then_branch, node.then_scope)
+        
+        if not node.else_branch:
+            def if_then(env):
+                if condition(env):
+                    return then_branch(env)
+            return if_then
+        
+        else_branch = self.compile_scoped_block(node.else_branch, node.else_scope)
+        
+        def if_then_else(env):
+            if condition(env):
+                return then_branch(env)
+            return else_branch(env)
+        return if_then_else
+    
+    def compile_while_statement(self, node: WhileStatement) -> Code:
+        condition = self.compile_condition(node.condition)
+        body_scope = node.body_scope
+        
+        # A body no closure can capture reuses one environment, reset each time
+        if body_scope is not None and not body_scope.captured:
+            body = self.compile_block(node.body)
+            blank = [UNSET] * body_scope.size
+            
+            def while_loop_reusing(env):
+                body_env = SlotEnvironment(body_scope, env)
+                values = body_env.values
+                while condition(env):
+                    values[:] = blank
+                    signal = body(body_env)
+                    if signal is not None:
+                        return signal
+            return while_loop_reusing
+        
+        body = self.compile_scoped_block(node.body, body_scope)
+        
+        def while_loop(env):
+            while condition(env):
+                signal = body(env)
+                if signal is not None:
+                    return signal
+        return while_loop
+    
+    def compile_for_statement(self, node: ForStatement) -> Code:
+        initializer = self.compile(node.initializer) if node.initializer else None
+        condition = self.compile_condition(node.condition) if node.condition else (lambda env: True)
+        increment = self.compile(node.increment) if node.increment else None
+        scope = node.scope
+        body_scope = node.body_scope
+        
+        if body_scope is not None and not body_scope.captured:
+            body = self.compile_block(node.body)
+            blank = [UNSET] * body_scope.size
+        else:
+            body = self.compile_scoped_block(node.body, body_scope)
+            blank = None
+        
+        def for_loop(env):
+            loop_env = SlotEnvironment(scope, env) if scope is not None else env
+            
+            if initializer:
+                initializer(loop_env)
+            
+            if blank is not None:
+                body_env = SlotEnvironment(body_scope, loop_env)
+                values = body_env.values
+                while condition(loop_env):
+                    values[:] = blank
+                    signal = body(body_env)
+                    if signal is not None:
+                        return signal
+                    if increment:
+                        increment(loop_env)
+                return None
+            
+            while condition(loop_env):
+                signal = body(loop_env)
+                if signal is not None:
+                    return signal
+                if increment:
+                    increment(loop_env)
+        return for_loop
+    
+    def compile_return_statement(self, node: ReturnStatement) -> Code:
+        if node.value is None:
+            def return_none(env):
+                return ReturnValue(None)
+            return return_none
+        
+        value_code = self.compile(node.value)
+        
+        def return_value(env):
+            return ReturnValue(value_code(env))
+        return return_value
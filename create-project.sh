@@ -24,6 +24,13 @@ cp privvy.py "$PROJECT_DIR/privvy-runtime/"
 cp lexer.py "$PROJECT_DIR/privvy-runtime/"
 cp parser.py "$PROJECT_DIR/privvy-runtime/"
 cp interpreter.py "$PROJECT_DIR/privvy-runtime/"
+cp compiler.py "$PROJECT_DIR/privvy-runtime/"
+cp bytecode.py "$PROJECT_DIR/privvy-runtime/"
+cp resolver.py "$PROJECT_DIR/privvy-runtime/"
+cp optimizer.py "$PROJECT_DIR/privvy-runtime/"
+cp database.py "$PROJECT_DIR/privvy-runtime/"
+cp server.py "$PROJECT_DIR/privvy-runtime/"
+cp pvcache.py "$PROJECT_DIR/privvy-runtime/"
 cp ast_nodes.py "$PROJECT_DIR/privvy-runtime/"
 cp token_types.py "$PROJECT_DIR/privvy-runtime/"
 
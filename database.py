@@ -0,0 +1,1729 @@
+"""
+Database support for the Privvy programming language.
+Connections to SQLite and PostgreSQL plus the Model ORM, exposed to Privvy
+code as built-in objects whose methods are created once per object.
+"""
+
+import atexit
+import itertools
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+
+class ClosedConnection:
+    """Stands in for the connection of a closed Database object."""
+    
+    def __getattr__(self, name):
+        raise RuntimeError("Database connection is closed")
+    
+    def __bool__(self):
+        return False
+
+
+CLOSED = ClosedConnection()
+
+# PostgreSQL named cursors need a name unique within their transaction
+CURSOR_IDS = itertools.count(1)
+
+# The EXECUTE statement for each SQL string PREPAREd on a PostgreSQL
+# connection; prepared statements live as long as the connection, which
+# may outlive many Database objects through the pool
+PREPARED = weakref.WeakKeyDictionary()
+
+# orderBy is spliced into SQL, so it may only name columns and directions
+ORDER_BY = re.compile(r'\s*\w+(\s+(asc|desc))?\s*(,\s*\w+(\s+(asc|desc))?\s*)*', re.IGNORECASE)
+
+# A table name after a keyword, maybe quoted or schema-qualified; the
+# group is the bare name
+TABLE_NAME = r'\s+(?:only\s+)?[`"\[]?(?:\w+[`"\]]?\.[`"\[]?)?(\w+)'
+
+# The table a statement writes to, in the forms the ORM and most scripts
+# use: INSERT [OR ...] INTO, REPLACE INTO, UPDATE [OR ...], DELETE FROM,
+# ALTER/DROP TABLE [IF EXISTS] and TRUNCATE [TABLE]
+WRITTEN_TABLE = re.compile(
+    r'\b(?:(?:insert|replace)(?:\s+or\s+\w+)?\s+into|update(?:\s+or\s+\w+)?|delete\s+from'
+    r'|(?:alter|drop)\s+table(?:\s+if\s+exists)?|truncate(?:\s+table)?)' + TABLE_NAME,
+    re.IGNORECASE)
+
+# The tables a query reads: the first of each FROM and every JOIN
+READ_TABLE = re.compile(r'\b(?:from|join)' + TABLE_NAME, re.IGNORECASE)
+
+# What READ_TABLE can miss: a table listed after a comma (FROM a, b or
+# FROM a x, b y), a subquery, or a WITH query's own names
+HIDDEN_TABLES = re.compile(
+    r'\b(?:from|join)' + TABLE_NAME + r'[`"\]]?(?:\s+(?:as\s+)?\w+)?\s*,|\(\s*select\b|^\s*with\b',
+    re.IGNORECASE)
+
+# Whitespace outside of string literals and quoted names
+SQL_WHITESPACE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|\s+""")
+
+
+# Literals and placeholders, which differ between runs of the same query
+SQL_VALUES = re.compile(r"'(?:[^']|'')*'|%s|\$\d+|\b\d+(?:\.\d+)?\b")
+
+# A parenthesized list of values, as in IN (?, ?, ?)
+SQL_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+
+
+def written_tables(sql: str) -> set:
+    """Lowercased names of the tables a statement writes to, as far as can be told."""
+    return {name.lower() for name in WRITTEN_TABLE.findall(sql)}
+
+
+def read_tables(sql: str) -> set:
+    """Lowercased names of the tables a query reads; none if they can't all be made out."""
+    if HIDDEN_TABLES.search(sql):
+        return set()
+    return {name.lower() for name in READ_TABLE.findall(sql)}
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with its whitespace collapsed, so reformatted copies compare equal."""
+    return SQL_WHITESPACE.sub(lambda m: m.group(1) or ' ', sql).strip().rstrip(';').rstrip()
+
+
+def fingerprint_sql(sql: str) -> str:
+    """Normalized SQL with every value as ? and every list of values as (?...)."""
+    return SQL_VALUE_LIST.sub('(?...)', SQL_VALUES.sub('?', normalize_sql(sql)))
+
+
+class ConnectionPool:
+    """Open connections to one database, reused across Database(...) calls.
+    
+    max_size is advisory: the pool keeps up to max_size connections,
+    counting both idle ones and ones in use, but a caller that finds it
+    full gets an extra (overflow) connection of its own, closed rather
+    than kept when it is returned. Callers never wait, since the script
+    asking may itself hold every connection in use, so there is no wait
+    time to report. Idle connections are closed after idle_timeout
+    seconds, and one that has sat idle for more than check_after seconds
+    is pinged before being handed out again.
+    """
+    
+    def __init__(self, connect, max_size: int = 5, idle_timeout: float = 300.0,
+                 check_after: float = 30.0):
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        
+        self.idle = []  # (connection, returned at), most recently returned last
+        self.size = 0
+        
+        # Re-entrant: a Database object collected by the garbage collector
+        # returns its connection from whatever code happened to be running
+        self.lock = threading.RLock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.overflows = 0
+        self.discarded = 0
+    
+    def acquire(self):
+        """Take an idle connection or open a new one."""
+        with self.lock:
+            self.close_expired()
+            
+            while self.idle:
+                connection, returned_at = self.idle.pop()
+                if time.monotonic() - returned_at > self.check_after and not self.is_healthy(connection):
+                    self.discard(connection)
+                    continue
+                self.hits += 1
+                return connection
+            
+            # Past max_size this is an overflow connection: size stays
+            # above max_size until one is returned and closed
+            if self.size >= self.max_size:
+                self.overflows += 1
+            self.size += 1
+            self.misses += 1
+        
+        try:
+            return self.connect()
+        except BaseException:
+            with self.lock:
+                self.size -= 1
+            raise
+    
+    def release(self, connection):
+        """Give a connection back, rolling back anything left uncommitted.
+        
+        While more than max_size are open, it is closed instead.
+        """
+        try:
+            connection.rollback()
+        except Exception:
+            with self.lock:
+                self.discard(connection)
+            return
+        
+        with self.lock:
+            if self.size > self.max_size:
+                self.discard(connection)
+                return
+            self.idle.append((connection, time.monotonic()))
+    
+    def discard(self, connection):
+        """Close a connection for good; the caller holds the lock."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self.size -= 1
+        self.discarded += 1
+    
+    def close_expired(self):
+        """Close connections idle for longer than idle_timeout."""
+        deadline = time.monotonic() - self.idle_timeout
+        while self.idle and self.idle[0][1] < deadline:
+            connection, _ = self.idle.pop(0)
+            self.discard(connection)
+    
+    @staticmethod
+    def is_healthy(connection) -> bool:
+        """Check that a connection still answers a trivial query."""
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def stats(self) -> dict:
+        """Counters for scripts: db.poolStats()."""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'overflows': self.overflows,
+                'discarded': self.discarded,
+                'open': self.size,
+                'idle': len(self.idle),
+                'inUse': self.size - len(self.idle),
+                'maxSize': self.max_size
+            }
+
+
+class RowCache:
+    """Rows found by id, kept for Model.find on one Database object.
+    
+    At most max_size rows are kept; the least recently used goes first.
+    Only what the Database object itself writes can invalidate a row, so
+    writes from other connections or processes aren't seen.
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.rows = OrderedDict()  # (table, id) -> row, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def key(table: str, record_id):
+        # find(db, 5) and find(db, "5") are the same row
+        return table.lower(), str(record_id)
+    
+    def get(self, table: str, record_id):
+        """The cached row, or None (counted as a miss)."""
+        key = self.key(table, record_id)
+        row = self.rows.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.rows.move_to_end(key)
+        self.hits += 1
+        return row
+    
+    def put(self, table: str, record_id, row: dict):
+        self.rows[self.key(table, record_id)] = row
+        if len(self.rows) > self.max_size:
+            self.rows.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, table: str, record_id):
+        self.rows.pop(self.key(table, record_id), None)
+    
+    def clear_tables(self, tables: set):
+        """Forget every row of the given (lowercased) tables."""
+        for key in [key for key in self.rows if key[0] in tables]:
+            del self.rows[key]
+    
+    def clear(self):
+        self.rows.clear()
+    
+    def stats(self) -> dict:
+        """Counters for scripts: db.rowCacheStats()."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.rows),
+            'maxSize': self.max_size
+        }
+
+
+class QueryCache:
+    """Rows of recent db.query calls on one Database object.
+    
+    Entries are keyed by whitespace-normalized SQL and parameters, expire
+    ttl seconds after they are stored, and the least recently used goes
+    first once there are max_size of them. Only SELECTs whose tables can
+    all be made out are cached, so that a write to any of them can drop
+    the entry.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires at, (columns, rows), tables, bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def key(self, sql: str, params):
+        """The cache key for a query, or None if it can't be cached."""
+        if sql.lstrip()[:6].upper() != 'SELECT':
+            return None
+        key = (normalize_sql(sql), tuple(params))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def get(self, key) -> list:
+        """A copy of the cached rows, or None (counted as a miss)."""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            self.remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        columns, rows = entry[1]
+        return ResultSet(None, None, columns=columns, rows=rows)
+    
+    def put(self, key, results: 'ResultSet') -> 'ResultSet':
+        """Cache a query's result, fetching all its rows; return a copy to hand out."""
+        tables = read_tables(key[0])
+        if not tables:
+            return results
+        
+        results.fetch_all()
+        rows = list(results.rows)
+        size = approximate_size(rows)
+        if key in self.entries:
+            self.remove(key)
+        self.entries[key] = (time.monotonic() + self.ttl, (results.columns, rows), tables, size)
+        self.bytes += size
+        if len(self.entries) > self.max_size:
+            self.remove(next(iter(self.entries)))
+            self.evictions += 1
+        return ResultSet(None, None, columns=results.columns, rows=rows)
+    
+    def remove(self, key):
+        self.bytes -= self.entries.pop(key)[3]
+    
+    def clear_tables(self, tables: set):
+        """Drop every entry that reads one of the given (lowercased) tables."""
+        for key in [key for key, entry in self.entries.items() if entry[2] & tables]:
+            self.remove(key)
+    
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+    
+    def stats(self) -> dict:
+        """Counters for scripts: db.queryCacheStats()."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'bytes': self.bytes,
+            'maxSize': self.max_size,
+            'ttl': self.ttl
+        }
+
+
+def approximate_size(rows: list) -> int:
+    """Roughly how many bytes a list of row tuples holds."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryLog:
+    """The N+1 detector: counts and times statements per call site.
+    
+    Statements are grouped by the Privvy line of the call that ran them,
+    which the engines set in `line` only while a log is active, and by
+    their fingerprint. A group with threshold or more statements is the
+    mark of an ORM call in a loop, and is reported when the process exits.
+    """
+    
+    def __init__(self, threshold: int, stream=None):
+        self.threshold = threshold
+        self.stream = stream
+        self.line = 0
+        self.fingerprints = {}  # SQL -> fingerprint
+        self.sites = {}  # (line, fingerprint) -> [statements, seconds]
+    
+    def execute(self, cursor, sql: str, params=(), statement: str = None):
+        """cursor.execute(statement or sql, params), recorded under sql."""
+        start = time.perf_counter()
+        try:
+            return cursor.execute(statement or sql, params)
+        finally:
+            self.record(sql, time.perf_counter() - start)
+    
+    def record(self, sql: str, seconds: float):
+        """Count a statement against the current call site."""
+        fingerprint = self.fingerprints.get(sql)
+        if fingerprint is None:
+            # Scripts that splice values into SQL make a new string each time
+            if len(self.fingerprints) >= 10000:
+                self.fingerprints.clear()
+            fingerprint = self.fingerprints[sql] = fingerprint_sql(sql)
+        
+        site = self.sites.get((self.line, fingerprint))
+        if site is None:
+            self.sites[(self.line, fingerprint)] = [1, seconds]
+        else:
+            site[0] += 1
+            site[1] += seconds
+    
+    def repeated(self) -> list:
+        """(line, fingerprint, statements, seconds) of each group at the threshold, slowest first."""
+        groups = [(line, fingerprint, count, seconds)
+                  for (line, fingerprint), (count, seconds) in self.sites.items()
+                  if count >= self.threshold]
+        return sorted(groups, key=lambda group: group[3], reverse=True)
+    
+    def report(self):
+        """Print the repeated groups, to stderr unless given another stream."""
+        stream = self.stream or sys.stderr
+        repeated = self.repeated()
+        if not repeated:
+            print(f"N+1 detector: no statement ran {self.threshold} times from one call site", file=stream)
+            return
+        
+        print(f"N+1 detector: {len(repeated)} statement(s) ran {self.threshold}+ times from one call site", file=stream)
+        for line, fingerprint, count, seconds in repeated:
+            site = f"line {line}" if line else "unknown line"
+            print(f"  {site}: {count} times, {seconds * 1000:.1f} ms total: {fingerprint}", file=stream)
+        print("  One statement can usually do the work of each group: Model.allWith/whereWith,"
+              " WHERE ... IN (...) or Model.createMany", file=stream)
+
+
+# Statements one call site may run before the detector reports it
+N_PLUS_ONE_THRESHOLD = 10
+
+# The active N+1 detector, or None (the default) for no instrumentation
+QUERY_LOG = None
+
+
+def n_plus_one_threshold(value: str):
+    """The threshold a PRIVVY_N_PLUS_ONE / --n-plus-one value asks for, or None for off.
+    
+    "1" (or any other on value) means the default threshold; a larger
+    number is the threshold itself.
+    """
+    value = value.strip().lower()
+    if value in ('', '0', 'false', 'no', 'off'):
+        return None
+    if value.isdigit() and int(value) > 1:
+        return int(value)
+    return N_PLUS_ONE_THRESHOLD
+
+
+def detect_n_plus_one(threshold: int):
+    """Turn the N+1 detector on with a threshold, or off with None.
+    
+    While on, it reports when the process exits. Engines only mark call
+    sites in code they compile while it is on.
+    """
+    global QUERY_LOG
+    if threshold is None:
+        QUERY_LOG = None
+    elif QUERY_LOG is None:
+        QUERY_LOG = QueryLog(threshold)
+    else:
+        QUERY_LOG.threshold = threshold
+
+
+def report_n_plus_one():
+    """Report what the N+1 detector found, if it is on."""
+    if QUERY_LOG is not None:
+        QUERY_LOG.report()
+
+
+atexit.register(report_n_plus_one)
+
+# PRIVVY_N_PLUS_ONE=1 (or a threshold) turns the detector on for a process
+detect_n_plus_one(n_plus_one_threshold(os.environ.get('PRIVVY_N_PLUS_ONE', '')))
+
+
+# One pool per connection string and SQLite settings, shared by the
+# whole process
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+
+def connection_pool(key, connect, options: dict) -> ConnectionPool:
+    """The pool for a connection string and settings, created on first use."""
+    with POOLS_LOCK:
+        pool = POOLS.get(key)
+        if pool is None:
+            pool = POOLS[key] = ConnectionPool(connect)
+        
+        # Settings given to any Database(...) call apply to the shared pool
+        if 'poolSize' in options:
+            pool.max_size = max(1, int(options['poolSize']))
+        if 'idleTimeout' in options:
+            pool.idle_timeout = float(options['idleTimeout'])
+        return pool
+
+
+# The pragmas each SQLite "profile" option sets. durable: WAL, and every
+# commit synced to disk. fast: WAL with syncs only at checkpoints (a power
+# cut can lose the last commits, never corrupt), a bigger cache and
+# memory-mapped reads. bulk-load: no syncs and the rollback journal in
+# memory, for loading data that can be loaded again if the machine dies.
+SQLITE_PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL', 'synchronous': 'FULL', 'cache_size': -16000,
+        'mmap_size': 0, 'temp_store': 'DEFAULT', 'busy_timeout': 5000
+    },
+    'fast': {
+        'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -64000,
+        'mmap_size': 268435456, 'temp_store': 'MEMORY', 'busy_timeout': 5000
+    },
+    'bulk-load': {
+        'journal_mode': 'MEMORY', 'synchronous': 'OFF', 'cache_size': -262144,
+        'mmap_size': 268435456, 'temp_store': 'MEMORY', 'busy_timeout': 30000
+    }
+}
+
+# Database(...) options that set one pragma, over the profile's value
+PRAGMA_OPTIONS = {
+    'journalMode': 'journal_mode',
+    'synchronous': 'synchronous',
+    'cacheSize': 'cache_size',
+    'mmapSize': 'mmap_size',
+    'tempStore': 'temp_store',
+    'busyTimeout': 'busy_timeout'
+}
+
+# Pragmas whose values are names, in the order of the numbers SQLite
+# reports them as (journal_mode is reported by name)
+PRAGMA_NAMES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY')
+}
+
+
+def sqlite_pragmas(options: dict) -> tuple:
+    """The (pragma, value) pairs a Database(...) call's options ask for."""
+    profile = options.get('profile')
+    if profile is not None and profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown profile '{profile}'. Use one of: {', '.join(SQLITE_PROFILES)}")
+    pragmas = dict(SQLITE_PROFILES.get(profile, {}))
+    
+    for option, pragma in PRAGMA_OPTIONS.items():
+        if option not in options:
+            continue
+        value = options[option]
+        names = PRAGMA_NAMES.get(pragma)
+        
+        # Values are spliced into the PRAGMA statement, so only known names
+        # and integers get through
+        if names is None:
+            value = int(value)
+        elif str(value).upper() in names:
+            value = str(value).upper()
+        else:
+            raise ValueError(f"Invalid {option} '{value}'. Use one of: {', '.join(names)}")
+        pragmas[pragma] = value
+    return tuple(pragmas.items())
+
+
+def connect_sqlite(connection_string: str, pragmas: tuple = ()):
+    """Connect to SQLite database."""
+    if connection_string.startswith('sqlite://'):
+        db_path = connection_string.replace('sqlite://', '')
+    else:
+        db_path = connection_string
+    
+    try:
+        # Server handlers use the connection from worker threads, one at a time
+        connection = sqlite3.connect(db_path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row  # Enable column name access
+        for pragma, value in pragmas:
+            connection.execute(f"PRAGMA {pragma} = {value}")
+        return connection
+    except Exception as e:
+        raise RuntimeError(f"Failed to connect to SQLite: {e}")
+
+
+def connect_postgres(connection_string: str):
+    """Connect to PostgreSQL database."""
+    try:
+        import psycopg2
+        import psycopg2.extras
+        return psycopg2.connect(connection_string)
+    except ImportError:
+        raise RuntimeError("PostgreSQL support requires psycopg2. Install it with: pip install psycopg2-binary")
+    except Exception as e:
+        raise RuntimeError(f"Failed to connect to PostgreSQL: {e}")
+
+
+class DatabaseConnection:
+    """Represents a database connection - supports PostgreSQL and SQLite.
+    
+    Connections come from a process-wide pool per connection string, and
+    close() hands them back to it. In-memory SQLite databases are never
+    pooled, since each Database(":memory:") must start out empty. Options:
+    "pool" (false to opt out), "poolSize", "idleTimeout",
+    "fetchSize", how many rows a query result fetches at a time,
+    "rowCache", how many rows Model.find may keep (default 0, off), and
+    "queryCache" and "queryCacheTTL", how many db.query results may be
+    kept and for how many seconds (default 0, off, and 60).
+    SQLite also takes "profile" ("durable", "fast" or "bulk-load") and
+    the single pragmas in PRAGMA_OPTIONS.
+    """
+    
+    def __init__(self, connection_string: str, options: dict = None):
+        """Initialize database connection from connection string."""
+        options = options or {}
+        self.connection_string = connection_string
+        self.connection = None
+        self.db_type = None
+        self.pool = None
+        self.release = None
+        
+        # Open begin()/transaction() levels; while any is open, writes are
+        # not committed one by one
+        self.transaction_depth = 0
+        
+        # Query results still reading from a cursor on this connection
+        self.fetch_size = int(options.get('fetchSize', 1000))
+        self.open_results = weakref.WeakValueDictionary()  # id -> ResultSet
+        self.shared_cursor = None
+        
+        row_cache_size = int(options.get('rowCache', 0))
+        self.row_cache = RowCache(row_cache_size) if row_cache_size > 0 else None
+        query_cache_size = int(options.get('queryCache', 0))
+        query_cache_ttl = float(options.get('queryCacheTTL', 60))
+        self.query_cache = QueryCache(query_cache_size, query_cache_ttl) if query_cache_size > 0 else None
+        
+        self.profile = options.get('profile')
+        pragmas = ()
+        
+        # Determine database type
+        if connection_string.startswith('sqlite://') or connection_string.endswith('.db') or connection_string == ':memory:':
+            self.db_type = 'sqlite'
+            pragmas = sqlite_pragmas(options)
+            connect = lambda: connect_sqlite(connection_string, pragmas)
+            poolable = ':memory:' not in connection_string
+        elif connection_string.startswith('postgresql://') or connection_string.startswith('postgres://'):
+            if self.profile is not None:
+                raise ValueError("The profile option is only for SQLite databases")
+            self.db_type = 'postgres'
+            connect = lambda: connect_postgres(connection_string)
+            poolable = True
+        else:
+            raise ValueError(f"Unsupported database type. Use 'sqlite://path.db' or 'postgresql://...'")
+        
+        if poolable and options.get('pool', True):
+            self.pool = connection_pool((connection_string, pragmas), connect, options)
+            self.connection = self.pool.acquire()
+            
+            # Also runs if the script drops the object without closing it
+            self.release = weakref.finalize(self, self.pool.release, self.connection)
+        else:
+            self.connection = connect()
+        
+        # Method objects are built once per connection, not on every access.
+        # They hold a weak proxy, so that the object isn't in a reference
+        # cycle and a script that drops it gives its connection back at once.
+        db = weakref.proxy(self)
+        self.methods = {
+            'query': QueryMethod(db),
+            'execute': ExecuteMethod(db),
+            'close': CloseMethod(db),
+            'commit': CommitMethod(db),
+            'rollback': RollbackMethod(db),
+            'begin': BeginMethod(db),
+            'transaction': TransactionMethod(db),
+            'poolStats': PoolStatsMethod(db),
+            'rowCacheStats': RowCacheStatsMethod(db),
+            'queryCacheStats': QueryCacheStatsMethod(db),
+            'settings': SettingsMethod(db)
+        }
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Return the connection to its pool, or close it if unpooled."""
+        self.finish_results()
+        if self.release is not None:
+            self.release()
+        elif self.connection:
+            self.connection.close()
+        self.connection = CLOSED
+        self.shared_cursor = None
+        self.transaction_depth = 0
+    
+    def autocommit(self):
+        """Commit a single write, unless an explicit transaction is open."""
+        if self.transaction_depth == 0:
+            self.connection.commit()
+    
+    def commit(self):
+        """Commit, or only close the innermost of nested transactions."""
+        if self.transaction_depth > 1:
+            self.transaction_depth -= 1
+        else:
+            self.transaction_depth = 0
+            self.finish_results()
+            self.connection.commit()
+    
+    def rollback(self):
+        """Roll back everything uncommitted, ending any open transaction."""
+        self.transaction_depth = 0
+        self.finish_results()
+        self.connection.rollback()
+        
+        # Rows read inside the transaction may be ones it wrote
+        self.invalidate(None)
+    
+    def select(self, sql: str, params=()):
+        """Run a query and return its rows as a ResultSet ([] if it has none)."""
+        # A named cursor leaves the result on the PostgreSQL server, which
+        # then sends it a batch at a time; only plain SELECTs can use one
+        named = self.db_type == 'postgres' and sql.lstrip()[:6].upper() == 'SELECT'
+        if named:
+            cursor = self.connection.cursor(f"privvy_{next(CURSOR_IDS)}")
+        else:
+            cursor = self.connection.cursor()
+            if self.db_type == 'sqlite':
+                cursor.row_factory = None
+        
+        if QUERY_LOG is None:
+            cursor.execute(sql, params)
+        else:
+            QUERY_LOG.execute(cursor, sql, params)
+        if not named and cursor.description is None:
+            return ResultSet(None, None)
+        return ResultSet(self, cursor, self.fetch_size)
+    
+    def cursor(self):
+        """The cursor reused by every statement that doesn't stream rows."""
+        if self.shared_cursor is None:
+            self.shared_cursor = self.connection.cursor()
+            if self.db_type == 'sqlite':
+                self.shared_cursor.row_factory = None
+        return self.shared_cursor
+    
+    def write_cursor(self):
+        """A cursor for a write, once every unfinished result is fetched.
+        
+        Results are meant to show the rows as they were when queried, and
+        neither SQLite's nor PostgreSQL's cursors promise that across
+        writes and commits on the same connection.
+        """
+        self.finish_results()
+        return self.cursor()
+    
+    def wrote(self, sql: str):
+        """Forget cached rows of the tables a raw statement writes to.
+        
+        If no table can be made out, everything cached is forgotten.
+        """
+        self.invalidate(written_tables(sql) or None)
+    
+    def wrote_rows(self, table: str, record_id=None):
+        """Forget cached data that a Model write to a table may change."""
+        if self.row_cache is not None and record_id is not None:
+            self.row_cache.invalidate(table, record_id)
+        if self.query_cache is not None:
+            self.query_cache.clear_tables({table.lower()})
+    
+    def invalidate(self, tables):
+        """Forget cached rows of a set of lowercased tables, or of all if None."""
+        for cache in (self.row_cache, self.query_cache):
+            if cache is None:
+                continue
+            if tables is None:
+                cache.clear()
+            else:
+                cache.clear_tables(tables)
+    
+    def run(self, cursor, sql: str, params):
+        """Execute an ORM statement, as a prepared statement on PostgreSQL.
+        
+        SQLite's driver already keeps its own cache of prepared statements
+        keyed by SQL string.
+        """
+        if self.db_type == 'sqlite':
+            if QUERY_LOG is None:
+                cursor.execute(sql, params)
+            else:
+                QUERY_LOG.execute(cursor, sql, params)
+            return
+        
+        prepared = PREPARED.setdefault(self.connection, {})
+        execute = prepared.get(sql)
+        if execute is None:
+            name = f"privvy_{len(prepared) + 1}"
+            cursor.execute(f"PREPARE {name} AS {sql}")
+            execute = prepared[sql] = f"EXECUTE {name} ({', '.join(['%s'] * len(params))})" if params else f"EXECUTE {name}"
+        if QUERY_LOG is None:
+            cursor.execute(execute, params)
+        else:
+            QUERY_LOG.execute(cursor, sql, params, execute)
+    
+    def forget_prepared(self):
+        """Drop PostgreSQL prepared statements, e.g. after a table changes."""
+        if self.db_type == 'postgres' and PREPARED.pop(self.connection, None):
+            self.cursor().execute("DEALLOCATE ALL")
+    
+    def finish_results(self):
+        """Fetch the remaining rows of every unfinished result."""
+        for results in list(self.open_results.values()):
+            results.fetch_all()
+    
+    def get(self, name: str):
+        """Get a method of the database connection."""
+        method = self.methods.get(name)
+        if method is not None:
+            return method
+        
+        raise AttributeError(f"Database has no attribute '{name}'")
+
+
+class ResultSet:
+    """The rows of a query, fetched from its cursor in batches as needed.
+    
+    Rows are kept as the driver's tuples, which take a fraction of the
+    memory, and turned into a dict when read (Privvy can't change a row in
+    place, so the dict isn't kept). Indexing fetches up to the row asked
+    for; len() fetches them all. Without a cursor it holds the columns and
+    rows it is given, as for cached and empty results.
+    
+    It stands in for a Privvy array: `+` gives an array of all the rows,
+    assigning to an index keeps the value in place of that row, and `==`
+    compares all the rows with another result or array. Like an array it
+    can't be hashed.
+    """
+    
+    def __init__(self, db: DatabaseConnection, cursor, batch_size: int = 0, columns=(), rows=()):
+        self.db = db
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.columns = list(columns)
+        self.rows = list(rows)
+        if cursor is None:
+            return
+        
+        self.fetch()
+        
+        # Named cursors only describe their columns after the first fetch
+        self.columns = [column[0] for column in cursor.description]
+        if self.cursor is not None:
+            db.open_results[id(self)] = self
+    
+    def fetch(self) -> bool:
+        """Fetch the next batch of rows; return False if there were none."""
+        if self.cursor is None:
+            return False
+        
+        batch = self.cursor.fetchmany(self.batch_size)
+        self.rows.extend(batch)
+        if len(batch) < self.batch_size:
+            self.cursor.close()
+            self.cursor = None
+            self.db.open_results.pop(id(self), None)
+            self.db = None
+        return bool(batch)
+    
+    def fetch_all(self):
+        """Fetch every remaining row."""
+        while self.fetch():
+            pass
+    
+    def fetch_to(self, index: int):
+        """Fetch rows until there is one at index (all of them if it is negative)."""
+        if index < 0:
+            self.fetch_all()
+        while index >= len(self.rows) and self.fetch():
+            pass
+    
+    def row(self, index: int):
+        row = self.rows[index]
+        # Anything but a driver tuple was put there by assignment
+        if type(row) is tuple:
+            return dict(zip(self.columns, row))
+        return row
+    
+    def __len__(self):
+        self.fetch_all()
+        return len(self.rows)
+    
+    def __getitem__(self, index: int):
+        self.fetch_to(index)
+        return self.row(index)
+    
+    def __setitem__(self, index: int, value):
+        self.fetch_to(index)
+        self.rows[index] = value
+    
+    def __add__(self, other):
+        if isinstance(other, (list, ResultSet)):
+            return list(self) + list(other)
+        return NotImplemented
+    
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return other + list(self)
+        return NotImplemented
+    
+    def __eq__(self, other):
+        if isinstance(other, (list, ResultSet)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __iter__(self):
+        index = 0
+        while index < len(self.rows) or self.fetch():
+            yield self.row(index)
+            index += 1
+    
+    def __repr__(self):
+        return repr(list(self))
+
+
+class QueryMethod:
+    """db.query(sql, ...params): run a query and return its rows."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) < 1:
+            raise TypeError("query() requires at least 1 argument (SQL query)")
+        
+        sql = arguments[0]
+        params = arguments[1:] if len(arguments) > 1 else []
+        
+        cache = self.db_conn.query_cache
+        key = cache.key(sql, params) if cache is not None else None
+        if key is not None:
+            rows = cache.get(key)
+            if rows is not None:
+                return rows
+        
+        try:
+            rows = self.db_conn.select(sql, params)
+        except Exception as e:
+            raise RuntimeError(f"Query failed: {e}")
+        
+        if key is not None:
+            return cache.put(key, rows)
+        return rows
+
+
+class ExecuteMethod:
+    """db.execute(sql, ...params): run an INSERT/UPDATE/DELETE and commit it.
+    
+    Inside a transaction the commit waits for the transaction's end.
+    """
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) < 1:
+            raise TypeError("execute() requires at least 1 argument (SQL statement)")
+        
+        sql = arguments[0]
+        params = arguments[1:] if len(arguments) > 1 else []
+        
+        try:
+            cursor = self.db_conn.write_cursor()
+            if QUERY_LOG is None:
+                cursor.execute(sql, params)
+            else:
+                QUERY_LOG.execute(cursor, sql, params)
+            self.db_conn.wrote(sql)
+            self.db_conn.autocommit()
+            return cursor.rowcount
+        except Exception as e:
+            self.db_conn.rollback()
+            raise RuntimeError(f"Execute failed: {e}")
+
+
+class CloseMethod:
+    """db.close(): close the connection."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        self.db_conn.close()
+        return None
+
+
+class CommitMethod:
+    """db.commit(): commit the current transaction."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        self.db_conn.commit()
+        return None
+
+
+class RollbackMethod:
+    """db.rollback(): roll back the current transaction."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        self.db_conn.rollback()
+        return None
+
+
+class BeginMethod:
+    """db.begin(): hold back per-write commits until the matching db.commit()."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        self.db_conn.transaction_depth += 1
+        return None
+
+
+class TransactionMethod:
+    """db.transaction(fn): call fn with writes committed once at the end.
+    
+    If fn fails, everything it wrote is rolled back and the error goes on
+    to the caller. Returns what fn returns.
+    """
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 1 or not hasattr(arguments[0], 'call'):
+            raise TypeError("transaction() requires 1 argument (a function)")
+        
+        self.db_conn.transaction_depth += 1
+        try:
+            result = arguments[0].call(interpreter, [])
+        except BaseException:
+            self.db_conn.rollback()
+            raise
+        self.db_conn.commit()
+        return result
+
+
+class SettingsMethod:
+    """db.settings(): the profile and the SQLite pragmas in effect."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        if self.db_conn.db_type != 'sqlite':
+            return None
+        
+        cursor = self.db_conn.cursor()
+        settings = {'profile': self.db_conn.profile}
+        for option, pragma in PRAGMA_OPTIONS.items():
+            # In-memory databases have no mmap_size, and report nothing
+            row = cursor.execute(f"PRAGMA {pragma}").fetchone()
+            value = row[0] if row else None
+            if value is not None and pragma in PRAGMA_NAMES:
+                value = PRAGMA_NAMES[pragma][value] if isinstance(value, int) else value.upper()
+            settings[option] = value
+        return settings
+
+
+class PoolStatsMethod:
+    """db.poolStats(): hits, misses, overflows and sizes of the connection pool."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        if self.db_conn.pool is None:
+            return None
+        return self.db_conn.pool.stats()
+
+
+class RowCacheStatsMethod:
+    """db.rowCacheStats(): hits, misses, evictions and size of the row cache."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        if self.db_conn.row_cache is None:
+            return None
+        return self.db_conn.row_cache.stats()
+
+
+class QueryCacheStatsMethod:
+    """db.queryCacheStats(): hits, hit ratio, bytes and size of the query cache."""
+    
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+    
+    def call(self, interpreter, arguments):
+        if self.db_conn.query_cache is None:
+            return None
+        return self.db_conn.query_cache.stats()
+
+
+class ModelDefinition:
+    """Represents a database model/table with ORM capabilities.
+    
+    Options: "indexes" and "unique", arrays of the indexes migrate()
+    creates, each a column name or an array of column names.
+    """
+    
+    def __init__(self, table_name: str, fields: dict, options: dict = None):
+        """Initialize a model with table name and field definitions."""
+        options = options or {}
+        self.table_name = table_name
+        self.fields = fields
+        
+        # (name, columns, unique) for each declared index
+        self.indexes = []
+        for unique, option in ((False, 'indexes'), (True, 'unique')):
+            for spec in options.get(option, []):
+                self.indexes.append(self.index(spec, unique))
+        
+        # Generated SQL by (operation, dialect, columns)
+        self.statements = {}
+        
+        # Method objects are built once per model, not on every access
+        self.methods = {
+            'migrate': MigrateMethod(self),
+            'create': CreateMethod(self),
+            'createMany': CreateManyMethod(self),
+            'find': FindMethod(self),
+            'findBy': FindByMethod(self),
+            'all': AllMethod(self),
+            'page': PageMethod(self),
+            'where': WhereMethod(self),
+            'allWith': AllWithMethod(self),
+            'whereWith': WhereWithMethod(self),
+            'update': UpdateMethod(self),
+            'delete': DeleteMethod(self),
+            'count': CountMethod(self),
+            'drop': DropMethod(self)
+        }
+    
+    def get(self, name: str):
+        """Get a method of the model."""
+        method = self.methods.get(name)
+        if method is not None:
+            return method
+        
+        raise AttributeError(f"Model has no attribute '{name}'")
+    
+    def index(self, spec, unique: bool) -> tuple:
+        """An index declaration: (name, columns, unique)."""
+        columns = tuple(spec) if isinstance(spec, list) else (spec,)
+        if not columns:
+            raise ValueError("An index needs at least one column")
+        for column in columns:
+            if column not in self.fields:
+                raise ValueError(f"Cannot index unknown column '{column}' of '{self.table_name}'")
+        
+        prefix = 'uniq' if unique else 'idx'
+        return f"{prefix}_{self.table_name}_{'_'.join(columns)}", columns, unique
+    
+    def statement(self, operation: str, db_type: str, columns: tuple = ()) -> str:
+        """The SQL for an ORM operation, built once per column list and dialect."""
+        key = (operation, db_type, columns)
+        sql = self.statements.get(key)
+        if sql is None:
+            sql = self.statements[key] = build_statement(self.table_name, operation, db_type, columns)
+        return sql
+
+
+def build_statement(table: str, operation: str, db_type: str, columns: tuple) -> str:
+    """Build the SQL for find, create, insert (create returning the id), update or delete on a table."""
+    if db_type == 'sqlite':
+        marks = ['?'] * (len(columns) + 1)
+    else:
+        # Numbered parameters, as PREPARE takes them
+        marks = [f"${n}" for n in range(1, len(columns) + 2)]
+    
+    if operation == 'find':
+        return f"SELECT * FROM {table} WHERE id = {marks[0]}"
+    if operation == 'create':
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(marks[:-1])})"
+    if operation == 'insert':
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(marks[:-1])}) RETURNING id"
+    if operation == 'update':
+        set_clauses = [f"{col} = {mark}" for col, mark in zip(columns, marks)]
+        return f"UPDATE {table} SET {', '.join(set_clauses)} WHERE id = {marks[-1]}"
+    if operation == 'delete':
+        return f"DELETE FROM {table} WHERE id = {marks[0]}"
+    raise ValueError(f"Unknown ORM operation '{operation}'")
+
+
+class MigrateMethod:
+    """Model.migrate(db): create the table and any missing indexes.
+    
+    Everything is created in one transaction; tables and indexes that
+    already exist are left alone.
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 1:
+            raise TypeError("migrate() requires 1 argument (database connection)")
+        
+        db = arguments[0]
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("migrate() requires a Database connection")
+        
+        # Build CREATE TABLE statement
+        field_defs = []
+        for field_name, field_type in self.model.fields.items():
+            field_defs.append(f"{field_name} {field_type}")
+        
+        fields_sql = ", ".join(field_defs)
+        statements = [f"CREATE TABLE IF NOT EXISTS {self.model.table_name} ({fields_sql})"]
+        
+        for name, columns, unique in self.model.indexes:
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            statements.append(f"CREATE {kind} IF NOT EXISTS {name} ON {self.model.table_name} ({', '.join(columns)})")
+        
+        cursor = db.write_cursor()
+        try:
+            # sqlite3 only opens a transaction by itself before DML, and
+            # would commit each CREATE on its own
+            if db.db_type == 'sqlite' and not db.connection.in_transaction:
+                cursor.execute("BEGIN")
+            for sql in statements:
+                cursor.execute(sql)
+            db.autocommit()
+        except Exception as e:
+            db.rollback()
+            raise RuntimeError(f"migrate failed: {e}")
+        
+        return None
+
+
+class CreateMethod:
+    """Model.create(db, data): insert a new record."""
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 2:
+            raise TypeError("create() requires 2 arguments (database, data)")
+        
+        db = arguments[0]
+        data = arguments[1]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        if not isinstance(data, dict):
+            raise TypeError("Second argument must be a dictionary")
+        
+        sql = self.model.statement('create', db.db_type, tuple(data))
+        
+        cursor = db.write_cursor()
+        db.run(cursor, sql, list(data.values()))
+        db.wrote_rows(self.model.table_name)
+        db.autocommit()
+        
+        # Return the inserted ID
+        if db.db_type == "sqlite":
+            return cursor.lastrowid
+        else:
+            return cursor.lastrowid if hasattr(cursor, 'lastrowid') else None
+
+
+class CreateManyMethod:
+    """Model.createMany(db, rows): insert many records in one transaction.
+    
+    Rows are grouped by their set of columns. On PostgreSQL each group is
+    inserted with a single execute_values; on SQLite every row is its own
+    INSERT, run through db.run, so that each reports its own id (rowids
+    of rows inserted together need not be consecutive). Returns the new
+    IDs in the order the rows were given.
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 2:
+            raise TypeError("createMany() requires 2 arguments (database, rows)")
+        
+        db = arguments[0]
+        rows = arguments[1]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        if not isinstance(rows, (list, ResultSet)) or not all(isinstance(row, dict) for row in rows):
+            raise TypeError("Second argument must be an array of dictionaries")
+        
+        # Row indexes by column set, keeping the first row's column order
+        groups = {}
+        for index, row in enumerate(rows):
+            groups.setdefault(frozenset(row), (list(row), []))[1].append(index)
+        
+        ids = [None] * len(rows)
+        cursor = db.write_cursor()
+        try:
+            for columns, indexes in groups.values():
+                values = [[rows[index][col] for col in columns] for index in indexes]
+                if db.db_type == 'sqlite':
+                    new_ids = self.insert_sqlite(db, cursor, tuple(columns), values)
+                else:
+                    new_ids = self.insert_postgres(cursor, columns, values)
+                for index, new_id in zip(indexes, new_ids):
+                    ids[index] = new_id
+            db.wrote_rows(self.model.table_name)
+            db.autocommit()
+        except Exception as e:
+            db.rollback()
+            raise RuntimeError(f"createMany failed: {e}")
+        
+        return ids
+    
+    def insert_sqlite(self, db, cursor, columns, values):
+        # INSERT ... RETURNING needs SQLite 3.35; before it, lastrowid
+        if sqlite3.sqlite_version_info >= (3, 35):
+            sql = self.model.statement('insert', 'sqlite', columns)
+            ids = []
+            for row in values:
+                db.run(cursor, sql, row)
+                ids.append(cursor.fetchone()[0])
+            return ids
+        
+        sql = self.model.statement('create', 'sqlite', columns)
+        ids = []
+        for row in values:
+            db.run(cursor, sql, row)
+            ids.append(cursor.lastrowid)
+        return ids
+    
+    def insert_postgres(self, cursor, columns, values):
+        import psycopg2.extras
+        sql = f"INSERT INTO {self.model.table_name} ({', '.join(columns)}) VALUES %s RETURNING id"
+        return [row[0] for row in psycopg2.extras.execute_values(cursor, sql, values, fetch=True)]
+
+
+class FindMethod:
+    """Model.find(db, id): find a record by ID."""
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 2:
+            raise TypeError("find() requires 2 arguments (database, id)")
+        
+        db = arguments[0]
+        record_id = arguments[1]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        
+        row_cache = db.row_cache
+        if row_cache is not None:
+            row = row_cache.get(self.model.table_name, record_id)
+            if row is not None:
+                return row
+        
+        sql = self.model.statement('find', db.db_type)
+        
+        cursor = db.cursor()
+        db.run(cursor, sql, (record_id,))
+        
+        # fetchall() runs the statement to its end, so SQLite doesn't hold
+        # a read lock on the file until the cursor's next use
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        row = dict(zip([column[0] for column in cursor.description], rows[0]))
+        
+        if row_cache is not None:
+            row_cache.put(self.model.table_name, record_id, row)
+        return row
+
+
+class FindByMethod:
+    """Model.findBy(db, field, value): find records by field value."""
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 3:
+            raise TypeError("findBy() requires 3 arguments (database, field, value)")
+        
+        db = arguments[0]
+        field = arguments[1]
+        value = arguments[2]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        
+        placeholder = "?" if db.db_type == "sqlite" else "%s"
+        sql = f"SELECT * FROM {self.model.table_name} WHERE {field} = {placeholder}"
+        
+        return db.select(sql, (value,))
+
+
+def query_options(db: DatabaseConnection, options: dict) -> str:
+    """The ORDER BY, LIMIT and OFFSET clauses for all() and where() options."""
+    clauses = ""
+    order_by = options.get('orderBy')
+    if order_by is not None:
+        if not isinstance(order_by, str) or not ORDER_BY.fullmatch(order_by):
+            raise ValueError(f"orderBy must be column names, each optionally ASC or DESC: {order_by!r}")
+        clauses += f" ORDER BY {order_by}"
+    
+    limit = options.get('limit')
+    offset = options.get('offset')
+    if limit is not None:
+        clauses += f" LIMIT {int(limit)}"
+    elif offset is not None:
+        # SQLite only takes OFFSET after a LIMIT
+        clauses += " LIMIT -1" if db.db_type == 'sqlite' else " LIMIT ALL"
+    if offset is not None:
+        clauses += f" OFFSET {int(offset)}"
+    return clauses
+
+
+class AllMethod:
+    """Model.all(db, options?): get all records.
+    
+    Options: "orderBy" (e.g. "age DESC, name"), "limit" and "offset".
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) not in (1, 2):
+            raise TypeError("all() requires 1 or 2 arguments (database, options)")
+        
+        db = arguments[0]
+        options = arguments[1] if len(arguments) == 2 else {}
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("Argument must be a Database connection")
+        if not isinstance(options, dict):
+            raise TypeError("all() options must be a dictionary")
+        
+        sql = f"SELECT * FROM {self.model.table_name}" + query_options(db, options)
+        
+        return db.select(sql)
+
+
+class PageMethod:
+    """Model.page(db, size, afterId?): the next size records by id after afterId.
+    
+    Keyset pagination: each page seeks straight to its first id through
+    the primary key, so late pages cost as little as the first, unlike
+    an OFFSET that reads and discards every earlier row.
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) not in (2, 3):
+            raise TypeError("page() requires 2 or 3 arguments (database, size, afterId)")
+        
+        db = arguments[0]
+        size = int(arguments[1])
+        after_id = arguments[2] if len(arguments) == 3 else None
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        
+        if after_id is None:
+            sql = f"SELECT * FROM {self.model.table_name} ORDER BY id LIMIT {size}"
+            return db.select(sql)
+        
+        placeholder = "?" if db.db_type == "sqlite" else "%s"
+        sql = f"SELECT * FROM {self.model.table_name} WHERE id > {placeholder} ORDER BY id LIMIT {size}"
+        return db.select(sql, (after_id,))
+
+
+class WhereMethod:
+    """Model.where(db, condition, ...params, options?): query with WHERE conditions.
+    
+    A dictionary after the parameters holds the same options as all().
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) < 2:
+            raise TypeError("where() requires at least 2 arguments (database, sql_condition, ...params)")
+        
+        db = arguments[0]
+        condition = arguments[1]
+        params = arguments[2:] if len(arguments) > 2 else []
+        
+        # SQL parameters are never dictionaries, so a trailing one is options
+        options = {}
+        if params and isinstance(params[-1], dict):
+            options = params.pop()
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        
+        sql = f"SELECT * FROM {self.model.table_name} WHERE {condition}" + query_options(db, options)
+        
+        return db.select(sql, params)
+
+
+# Ids per parent query; SQLite before 3.32 allows at most 999 parameters
+PARENTS_PER_QUERY = 500
+
+
+def attach_parents(db: DatabaseConnection, rows, parent: 'ModelDefinition', foreign_key: str, name: str) -> list:
+    """Put each row's parent record in row[name], looked up by row[foreign_key].
+    
+    The parents are fetched with one "WHERE id IN (...)" query (more for
+    very many distinct ids) rather than one find() per row. Rows whose key
+    is null or matches no parent get null.
+    """
+    rows = list(rows)
+    ids = list({row[foreign_key] for row in rows if row.get(foreign_key) is not None})
+    
+    placeholder = "?" if db.db_type == "sqlite" else "%s"
+    parents = {}
+    for start in range(0, len(ids), PARENTS_PER_QUERY):
+        chunk = ids[start:start + PARENTS_PER_QUERY]
+        sql = f"SELECT * FROM {parent.table_name} WHERE id IN ({', '.join([placeholder] * len(chunk))})"
+        for record in db.select(sql, chunk):
+            # A TEXT foreign key still finds an INTEGER id
+            parents[str(record['id'])] = record
+    
+    for row in rows:
+        key = row.get(foreign_key)
+        row[name] = parents.get(str(key)) if key is not None else None
+    return rows
+
+
+def relation_arguments(method: str, arguments: list) -> tuple:
+    """Check allWith/whereWith's (db, parent, foreignKey) and pick the name to attach as."""
+    db, parent, foreign_key = arguments[:3]
+    if not isinstance(db, DatabaseConnection):
+        raise TypeError("First argument must be a Database connection")
+    if not isinstance(parent, ModelDefinition):
+        raise TypeError(f"{method}() second argument must be a Model")
+    if not isinstance(foreign_key, str):
+        raise TypeError(f"{method}() third argument must be a column name")
+    
+    # "user_id" attaches as "user"; other keys as the parent's table name
+    name = foreign_key[:-3] if foreign_key.endswith('_id') and len(foreign_key) > 3 else parent.table_name
+    return db, parent, foreign_key, name
+
+
+class AllWithMethod:
+    """Model.allWith(db, Parent, foreignKey, options?): all records, each with its parent.
+    
+    Post.allWith(db, User, "user_id") gives every post a "user" entry
+    holding its User record, in two queries instead of one per post.
+    Takes all()'s options, plus "as" to name the entry.
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) not in (3, 4):
+            raise TypeError("allWith() requires 3 or 4 arguments (database, model, foreignKey, options)")
+        
+        db, parent, foreign_key, name = relation_arguments('allWith', arguments)
+        options = arguments[3] if len(arguments) == 4 else {}
+        if not isinstance(options, dict):
+            raise TypeError("allWith() options must be a dictionary")
+        
+        rows = self.model.get('all').call(interpreter, [db, options])
+        return attach_parents(db, rows, parent, foreign_key, options.get('as', name))
+
+
+class WhereWithMethod:
+    """Model.whereWith(db, Parent, foreignKey, condition, ...params, options?): where() plus parents.
+    
+    The matching records each get their parent record, as with allWith().
+    """
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) < 4:
+            raise TypeError("whereWith() requires at least 4 arguments (database, model, foreignKey, sql_condition, ...params)")
+        
+        db, parent, foreign_key, name = relation_arguments('whereWith', arguments)
+        options = arguments[-1] if len(arguments) > 4 and isinstance(arguments[-1], dict) else {}
+        
+        rows = self.model.get('where').call(interpreter, [db, *arguments[3:]])
+        return attach_parents(db, rows, parent, foreign_key, options.get('as', name))
+
+
+class UpdateMethod:
+    """Model.update(db, id, data): update a record by ID."""
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 3:
+            raise TypeError("update() requires 3 arguments (database, id, data)")
+        
+        db = arguments[0]
+        record_id = arguments[1]
+        data = arguments[2]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        if not isinstance(data, dict):
+            raise TypeError("Third argument must be a dictionary")
+        
+        sql = self.model.statement('update', db.db_type, tuple(data))
+        values = list(data.values())
+        values.append(record_id)
+        
+        cursor = db.write_cursor()
+        db.run(cursor, sql, values)
+        db.wrote_rows(self.model.table_name, record_id)
+        db.autocommit()
+        
+        return cursor.rowcount
+
+
+class DeleteMethod:
+    """Model.delete(db, id): delete a record by ID."""
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 2:
+            raise TypeError("delete() requires 2 arguments (database, id)")
+        
+        db = arguments[0]
+        record_id = arguments[1]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("First argument must be a Database connection")
+        
+        sql = self.model.statement('delete', db.db_type)
+        
+        cursor = db.write_cursor()
+        db.run(cursor, sql, (record_id,))
+        db.wrote_rows(self.model.table_name, record_id)
+        db.autocommit()
+        
+        return cursor.rowcount
+
+
+class CountMethod:
+    """Model.count(db): count records."""
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 1:
+            raise TypeError("count() requires 1 argument (database)")
+        
+        db = arguments[0]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("Argument must be a Database connection")
+        
+        sql = f"SELECT COUNT(*) as count FROM {self.model.table_name}"
+        
+        cursor = db.connection.cursor()
+        
+        if db.db_type == 'sqlite':
+            cursor.row_factory = sqlite3.Row
+        
+        if QUERY_LOG is None:
+            cursor.execute(sql)
+        else:
+            QUERY_LOG.execute(cursor, sql)
+        result = cursor.fetchone()
+        
+        if db.db_type == 'sqlite':
+            return dict(result)['count']
+        else:
+            return result[0]
+
+
+class DropMethod:
+    """Model.drop(db): drop the table."""
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 1:
+            raise TypeError("drop() requires 1 argument (database)")
+        
+        db = arguments[0]
+        
+        if not isinstance(db, DatabaseConnection):
+            raise TypeError("Argument must be a Database connection")
+        
+        sql = f"DROP TABLE IF EXISTS {self.model.table_name}"
+        
+        cursor = db.write_cursor()
+        cursor.execute(sql)
+        db.forget_prepared()
+        db.wrote(sql)
+        db.autocommit()
+        
+        return None
@@ -65,7 +65,7 @@ $SUDO mkdir -p "$SHARE_DIR"
 
 # Install Privvy files
 echo -e "${BLUE}Installing Privvy core files...${NC}"
-$SUDO cp privvy.py lexer.py parser.py interpreter.py ast_nodes.py token_types.py "$PRIVVY_DIR/"
+$SUDO cp privvy.py lexer.py parser.py interpreter.py compiler.py bytecode.py resolver.py optimizer.py database.py server.py pvcache.py ast_nodes.py token_types.py "$PRIVVY_DIR/"
 
 echo -e "${BLUE}Installing CLI tools...${NC}"
 $SUDO cp privvy-cli.py privvy-db.py "$PRIVVY_DIR/"
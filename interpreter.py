@@ -4,524 +4,32 @@ Executes the Abstract Syntax Tree.
 """
 
 from typing import Any, Dict, List, Optional
+import database
 from ast_nodes import *
-import sqlite3
+from database import DatabaseConnection, ModelDefinition, ResultSet
+from server import PrivvyServer
 import sys
 
 
-class ReturnValue(Exception):
-    """Exception used to handle return statements."""
+class ReturnValue:
+    """Completion signal of a return statement.
+    
+    Returned (not raised) by the statement and passed back up through
+    execute_block until the enclosing function call unwraps it.
+    """
+    __slots__ = ('value',)
+    
     def __init__(self, value):
         self.value = value
 
 
-class DatabaseConnection:
-    """Represents a database connection - supports PostgreSQL and SQLite."""
-    
-    def __init__(self, connection_string: str):
-        """Initialize database connection from connection string."""
-        self.connection_string = connection_string
-        self.connection = None
-        self.db_type = None
-        
-        # Determine database type and connect
-        if connection_string.startswith('sqlite://') or connection_string.endswith('.db') or connection_string == ':memory:':
-            self._connect_sqlite(connection_string)
-        elif connection_string.startswith('postgresql://') or connection_string.startswith('postgres://'):
-            self._connect_postgres(connection_string)
-        else:
-            raise ValueError(f"Unsupported database type. Use 'sqlite://path.db' or 'postgresql://...'")
-    
-    def _connect_sqlite(self, connection_string: str):
-        """Connect to SQLite database."""
-        self.db_type = 'sqlite'
-        if connection_string.startswith('sqlite://'):
-            db_path = connection_string.replace('sqlite://', '')
-        else:
-            db_path = connection_string
-        
-        try:
-            self.connection = sqlite3.connect(db_path)
-            self.connection.row_factory = sqlite3.Row  # Enable column name access
-        except Exception as e:
-            raise RuntimeError(f"Failed to connect to SQLite: {e}")
-    
-    def _connect_postgres(self, connection_string: str):
-        """Connect to PostgreSQL database."""
-        self.db_type = 'postgres'
-        try:
-            import psycopg2
-            import psycopg2.extras
-            self.connection = psycopg2.connect(connection_string)
-        except ImportError:
-            raise RuntimeError("PostgreSQL support requires psycopg2. Install it with: pip install psycopg2-binary")
-        except Exception as e:
-            raise RuntimeError(f"Failed to connect to PostgreSQL: {e}")
-    
-    def get(self, name: str):
-        """Get a method of the database connection."""
-        methods = {
-            'query': self._query_method,
-            'execute': self._execute_method,
-            'close': self._close_method,
-            'commit': self._commit_method,
-            'rollback': self._rollback_method
-        }
-        
-        if name in methods:
-            return methods[name]()
-        
-        raise AttributeError(f"Database has no attribute '{name}'")
-    
-    def _query_method(self):
-        """Return the query method."""
-        class QueryMethod:
-            def __init__(self, db_conn):
-                self.db_conn = db_conn
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) < 1:
-                    raise TypeError("query() requires at least 1 argument (SQL query)")
-                
-                sql = arguments[0]
-                params = arguments[1:] if len(arguments) > 1 else []
-                
-                try:
-                    cursor = self.db_conn.connection.cursor()
-                    
-                    if self.db_conn.db_type == 'postgres':
-                        import psycopg2.extras
-                        cursor = self.db_conn.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                    
-                    cursor.execute(sql, params)
-                    
-                    # Fetch all results and convert to list of dicts
-                    if cursor.description:
-                        if self.db_conn.db_type == 'sqlite':
-                            rows = cursor.fetchall()
-                            return [dict(row) for row in rows]
-                        else:
-                            return cursor.fetchall()
-                    
-                    return []
-                except Exception as e:
-                    raise RuntimeError(f"Query failed: {e}")
-        
-        return QueryMethod(self)
-    
-    def _execute_method(self):
-        """Return the execute method for INSERT/UPDATE/DELETE."""
-        class ExecuteMethod:
-            def __init__(self, db_conn):
-                self.db_conn = db_conn
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) < 1:
-                    raise TypeError("execute() requires at least 1 argument (SQL statement)")
-                
-                sql = arguments[0]
-                params = arguments[1:] if len(arguments) > 1 else []
-                
-                try:
-                    cursor = self.db_conn.connection.cursor()
-                    cursor.execute(sql, params)
-                    self.db_conn.connection.commit()
-                    return cursor.rowcount
-                except Exception as e:
-                    self.db_conn.connection.rollback()
-                    raise RuntimeError(f"Execute failed: {e}")
-        
-        return ExecuteMethod(self)
-    
-    def _close_method(self):
-        """Return the close method."""
-        class CloseMethod:
-            def __init__(self, db_conn):
-                self.db_conn = db_conn
-            
-            def call(self, interpreter, arguments):
-                if self.db_conn.connection:
-                    self.db_conn.connection.close()
-                return None
-        
-        return CloseMethod(self)
-    
-    def _commit_method(self):
-        """Return the commit method."""
-        class CommitMethod:
-            def __init__(self, db_conn):
-                self.db_conn = db_conn
-            
-            def call(self, interpreter, arguments):
-                self.db_conn.connection.commit()
-                return None
-        
-        return CommitMethod(self)
-    
-    def _rollback_method(self):
-        """Return the rollback method."""
-        class RollbackMethod:
-            def __init__(self, db_conn):
-                self.db_conn = db_conn
-            
-            def call(self, interpreter, arguments):
-                self.db_conn.connection.rollback()
-                return None
-        
-        return RollbackMethod(self)
-
-
-class ModelDefinition:
-    """Represents a database model/table with ORM capabilities."""
-    
-    def __init__(self, table_name: str, fields: dict):
-        """Initialize a model with table name and field definitions."""
-        self.table_name = table_name
-        self.fields = fields
-    
-    def get(self, name: str):
-        """Get a method of the model."""
-        methods = {
-            'migrate': self._migrate_method,
-            'create': self._create_method,
-            'find': self._find_method,
-            'findBy': self._find_by_method,
-            'all': self._all_method,
-            'where': self._where_method,
-            'update': self._update_method,
-            'delete': self._delete_method,
-            'count': self._count_method,
-            'drop': self._drop_method
-        }
-        
-        if name in methods:
-            return methods[name]()
-        
-        raise AttributeError(f"Model has no attribute '{name}'")
-    
-    def _migrate_method(self):
-        """Create the table in the database."""
-        class MigrateMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 1:
-                    raise TypeError("migrate() requires 1 argument (database connection)")
-                
-                db = arguments[0]
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("migrate() requires a Database connection")
-                
-                # Build CREATE TABLE statement
-                field_defs = []
-                for field_name, field_type in self.model.fields.items():
-                    field_defs.append(f"{field_name} {field_type}")
-                
-                fields_sql = ", ".join(field_defs)
-                sql = f"CREATE TABLE IF NOT EXISTS {self.model.table_name} ({fields_sql})"
-                
-                db.connection.cursor().execute(sql)
-                db.connection.commit()
-                
-                return None
-        
-        return MigrateMethod(self)
-    
-    def _create_method(self):
-        """Insert a new record."""
-        class CreateMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 2:
-                    raise TypeError("create() requires 2 arguments (database, data)")
-                
-                db = arguments[0]
-                data = arguments[1]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("First argument must be a Database connection")
-                if not isinstance(data, dict):
-                    raise TypeError("Second argument must be a dictionary")
-                
-                # Build INSERT statement
-                columns = list(data.keys())
-                placeholders = ["?" if db.db_type == "sqlite" else "%s"] * len(columns)
-                values = [data[col] for col in columns]
-                
-                sql = f"INSERT INTO {self.model.table_name} ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-                
-                cursor = db.connection.cursor()
-                cursor.execute(sql, values)
-                db.connection.commit()
-                
-                # Return the inserted ID
-                if db.db_type == "sqlite":
-                    return cursor.lastrowid
-                else:
-                    return cursor.lastrowid if hasattr(cursor, 'lastrowid') else None
-        
-        return CreateMethod(self)
-    
-    def _find_method(self):
-        """Find a record by ID."""
-        class FindMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 2:
-                    raise TypeError("find() requires 2 arguments (database, id)")
-                
-                db = arguments[0]
-                record_id = arguments[1]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("First argument must be a Database connection")
-                
-                # Query for the record
-                placeholder = "?" if db.db_type == "sqlite" else "%s"
-                sql = f"SELECT * FROM {self.model.table_name} WHERE id = {placeholder}"
-                
-                cursor = db.connection.cursor()
-                
-                if db.db_type == 'postgres':
-                    import psycopg2.extras
-                    cursor = db.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                
-                cursor.execute(sql, (record_id,))
-                
-                if db.db_type == 'sqlite':
-                    row = cursor.fetchone()
-                    return dict(row) if row else None
-                else:
-                    return cursor.fetchone()
-        
-        return FindMethod(self)
-    
-    def _find_by_method(self):
-        """Find records by field value."""
-        class FindByMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 3:
-                    raise TypeError("findBy() requires 3 arguments (database, field, value)")
-                
-                db = arguments[0]
-                field = arguments[1]
-                value = arguments[2]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("First argument must be a Database connection")
-                
-                placeholder = "?" if db.db_type == "sqlite" else "%s"
-                sql = f"SELECT * FROM {self.model.table_name} WHERE {field} = {placeholder}"
-                
-                cursor = db.connection.cursor()
-                
-                if db.db_type == 'postgres':
-                    import psycopg2.extras
-                    cursor = db.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                
-                cursor.execute(sql, (value,))
-                
-                if db.db_type == 'sqlite':
-                    rows = cursor.fetchall()
-                    return [dict(row) for row in rows]
-                else:
-                    return cursor.fetchall()
-        
-        return FindByMethod(self)
-    
-    def _all_method(self):
-        """Get all records."""
-        class AllMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 1:
-                    raise TypeError("all() requires 1 argument (database)")
-                
-                db = arguments[0]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("Argument must be a Database connection")
-                
-                sql = f"SELECT * FROM {self.model.table_name}"
-                
-                cursor = db.connection.cursor()
-                
-                if db.db_type == 'postgres':
-                    import psycopg2.extras
-                    cursor = db.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                
-                cursor.execute(sql)
-                
-                if db.db_type == 'sqlite':
-                    rows = cursor.fetchall()
-                    return [dict(row) for row in rows]
-                else:
-                    return cursor.fetchall()
-        
-        return AllMethod(self)
-    
-    def _where_method(self):
-        """Query with WHERE conditions."""
-        class WhereMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) < 2:
-                    raise TypeError("where() requires at least 2 arguments (database, sql_condition, ...params)")
-                
-                db = arguments[0]
-                condition = arguments[1]
-                params = arguments[2:] if len(arguments) > 2 else []
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("First argument must be a Database connection")
-                
-                sql = f"SELECT * FROM {self.model.table_name} WHERE {condition}"
-                
-                cursor = db.connection.cursor()
-                
-                if db.db_type == 'postgres':
-                    import psycopg2.extras
-                    cursor = db.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                
-                cursor.execute(sql, params)
-                
-                if db.db_type == 'sqlite':
-                    rows = cursor.fetchall()
-                    return [dict(row) for row in rows]
-                else:
-                    return cursor.fetchall()
-        
-        return WhereMethod(self)
-    
-    def _update_method(self):
-        """Update a record by ID."""
-        class UpdateMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 3:
-                    raise TypeError("update() requires 3 arguments (database, id, data)")
-                
-                db = arguments[0]
-                record_id = arguments[1]
-                data = arguments[2]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("First argument must be a Database connection")
-                if not isinstance(data, dict):
-                    raise TypeError("Third argument must be a dictionary")
-                
-                # Build UPDATE statement
-                placeholder = "?" if db.db_type == "sqlite" else "%s"
-                set_clauses = [f"{col} = {placeholder}" for col in data.keys()]
-                values = list(data.values()) + [record_id]
-                
-                sql = f"UPDATE {self.model.table_name} SET {', '.join(set_clauses)} WHERE id = {placeholder}"
-                
-                cursor = db.connection.cursor()
-                cursor.execute(sql, values)
-                db.connection.commit()
-                
-                return cursor.rowcount
-        
-        return UpdateMethod(self)
-    
-    def _delete_method(self):
-        """Delete a record by ID."""
-        class DeleteMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 2:
-                    raise TypeError("delete() requires 2 arguments (database, id)")
-                
-                db = arguments[0]
-                record_id = arguments[1]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("First argument must be a Database connection")
-                
-                placeholder = "?" if db.db_type == "sqlite" else "%s"
-                sql = f"DELETE FROM {self.model.table_name} WHERE id = {placeholder}"
-                
-                cursor = db.connection.cursor()
-                cursor.execute(sql, (record_id,))
-                db.connection.commit()
-                
-                return cursor.rowcount
-        
-        return DeleteMethod(self)
-    
-    def _count_method(self):
-        """Count records."""
-        class CountMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 1:
-                    raise TypeError("count() requires 1 argument (database)")
-                
-                db = arguments[0]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("Argument must be a Database connection")
-                
-                sql = f"SELECT COUNT(*) as count FROM {self.model.table_name}"
-                
-                cursor = db.connection.cursor()
-                
-                if db.db_type == 'sqlite':
-                    cursor.row_factory = sqlite3.Row
-                
-                cursor.execute(sql)
-                result = cursor.fetchone()
-                
-                if db.db_type == 'sqlite':
-                    return dict(result)['count']
-                else:
-                    return result[0]
-        
-        return CountMethod(self)
-    
-    def _drop_method(self):
-        """Drop the table."""
-        class DropMethod:
-            def __init__(self, model):
-                self.model = model
-            
-            def call(self, interpreter, arguments):
-                if len(arguments) != 1:
-                    raise TypeError("drop() requires 1 argument (database)")
-                
-                db = arguments[0]
-                
-                if not isinstance(db, DatabaseConnection):
-                    raise TypeError("Argument must be a Database connection")
-                
-                sql = f"DROP TABLE IF EXISTS {self.model.table_name}"
-                
-                cursor = db.connection.cursor()
-                cursor.execute(sql)
-                db.connection.commit()
-                
-                return None
-        
-        return DropMethod(self)
+def is_truthy(value: Any) -> bool:
+    """Determine if a value is truthy."""
+    if value is None or value is False:
+        return False
+    if value == 0 or value == "":
+        return False
+    return True
 
 
 class Environment:
@@ -554,6 +62,53 @@ class Environment:
             raise NameError(f"Undefined variable: {name}")
 
 
+class Unset:
+    """Marker for a slot whose variable has not been declared yet."""
+    
+    def __repr__(self):
+        return 'UNSET'
+
+
+UNSET = Unset()
+
+
+class SlotEnvironment:
+    """A lexical environment whose variables live in a list, one per slot.
+    
+    Slots come from the resolver's Scope for the block. Code compiled
+    against the resolved AST indexes `values` directly; get() and set()
+    are the by-name fallback used for slots that are still UNSET.
+    """
+    
+    __slots__ = ('scope', 'parent', 'values')
+    
+    def __init__(self, scope, parent, values: Optional[List[Any]] = None):
+        self.scope = scope
+        self.parent = parent
+        self.values = values if values is not None else [UNSET] * scope.size
+    
+    def define(self, name: str, value: Any):
+        """Define a new variable in this environment."""
+        self.values[self.scope.index[name]] = value
+    
+    def get(self, name: str) -> Any:
+        """Get a variable value."""
+        slot = self.scope.index.get(name)
+        if slot is not None:
+            value = self.values[slot]
+            if value is not UNSET:
+                return value
+        return self.parent.get(name)
+    
+    def set(self, name: str, value: Any):
+        """Set a variable value."""
+        slot = self.scope.index.get(name)
+        if slot is not None and self.values[slot] is not UNSET:
+            self.values[slot] = value
+        else:
+            self.parent.set(name, value)
+
+
 class PrivvyFunction:
     """Represents a Privvy function."""
     
@@ -574,12 +129,17 @@ class PrivvyFunction:
             env.define(param, arguments[i])
         
         # Execute function body
-        try:
-            interpreter.execute_block(self.declaration.body, env)
-        except ReturnValue as ret:
-            return ret.value
+        signal = interpreter.execute_block(self.declaration.body, env)
+        if signal is not None:
+            return signal.value
         
         return None
+    
+    def bind(self, instance: 'PrivvyInstance') -> 'PrivvyFunction':
+        """Return a copy of this function with 'this' bound to an instance."""
+        env = Environment(self.closure)
+        env.define('this', instance)
+        return PrivvyFunction(self.declaration, env)
 
 
 class PrivvyClass:
@@ -591,6 +151,11 @@ class PrivvyClass:
         self.superclass = superclass
         self.constructor = constructor
         self.methods = methods
+        
+        # Every method this class answers to, inherited ones included, so a
+        # lookup is one dict access however deep the hierarchy is
+        self.method_table: Dict[str, PrivvyFunction] = dict(superclass.method_table) if superclass else {}
+        self.method_table.update(methods)
     
     def call(self, interpreter: 'Interpreter', arguments: List[Any]) -> 'PrivvyInstance':
         """Instantiate the class."""
@@ -598,30 +163,17 @@ class PrivvyClass:
         
         # Call constructor if it exists
         if self.constructor:
-            # Bind 'this' to the instance
-            bound_env = Environment(self.constructor.closure)
-            bound_env.define('this', instance)
-            
             if len(arguments) != len(self.constructor.declaration.parameters):
                 raise TypeError(f"Constructor expects {len(self.constructor.declaration.parameters)} arguments, got {len(arguments)}")
             
-            for i, param in enumerate(self.constructor.declaration.parameters):
-                bound_env.define(param, arguments[i])
-            
-            try:
-                interpreter.execute_block(self.constructor.declaration.body, bound_env)
-            except ReturnValue:
-                pass  # Constructors don't return values
+            # Bind 'this' to the instance; constructors don't return values
+            self.constructor.bind(instance).call(interpreter, arguments)
         
         return instance
     
     def find_method(self, name: str) -> Optional[PrivvyFunction]:
         """Find a method in this class or superclass."""
-        if name in self.methods:
-            return self.methods[name]
-        elif self.superclass:
-            return self.superclass.find_method(name)
-        return None
+        return self.method_table.get(name)
 
 
 class PrivvyInstance:
@@ -630,6 +182,7 @@ class PrivvyInstance:
     def __init__(self, klass: PrivvyClass):
         self.klass = klass
         self.fields: Dict[str, Any] = {}
+        self.bound_methods: Dict[str, PrivvyFunction] = {}
     
     def get(self, name: str) -> Any:
         """Get a property or method."""
@@ -638,7 +191,7 @@ class PrivvyInstance:
         
         method = self.klass.find_method(name)
         if method:
-            return self.bind_method(method)
+            return self.bound_method(name, method)
         
         raise AttributeError(f"Undefined property: {name}")
     
@@ -648,16 +201,58 @@ class PrivvyInstance:
     
     def bind_method(self, method: PrivvyFunction) -> PrivvyFunction:
         """Bind a method to this instance."""
-        # Create a new environment with 'this' bound to this instance
-        env = Environment(method.closure)
-        env.define('this', self)
-        return PrivvyFunction(method.declaration, env)
+        return method.bind(self)
+    
+    def bound_method(self, name: str, method: PrivvyFunction) -> PrivvyFunction:
+        """Bind a method to this instance once and reuse it afterwards."""
+        bound = self.bound_methods.get(name)
+        if bound is None:
+            bound = self.bound_methods[name] = self.bind_method(method)
+        return bound
+
+
+class InlineCache:
+    """Remembers which method a property access site found, keyed by class.
+    
+    Each MemberAccess gets its own cache; while the site keeps seeing
+    instances of the same class it skips the method table lookup.
+    """
+    __slots__ = ('klass', 'method')
+    
+    def __init__(self):
+        self.klass = None
+        self.method = None
+    
+    def get(self, instance: PrivvyInstance, name: str) -> Any:
+        """Get a property or method of an instance through the cache."""
+        fields = instance.fields
+        if name in fields:
+            return fields[name]
+        
+        klass = instance.klass
+        if klass is not self.klass:
+            method = klass.method_table.get(name)
+            if method is None:
+                raise AttributeError(f"Undefined property: {name}")
+            self.klass = klass
+            self.method = method
+        
+        return instance.bound_method(name, self.method)
 
 
 class Interpreter:
     """Interprets and executes Privvy AST."""
     
-    def __init__(self):
+    VERSION = '1.0.0'
+    
+    # Execution engines accepted by the constructor
+    ENGINES = ('closure', 'vm', 'tree')
+    
+    def __init__(self, engine: str = 'closure'):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'. Use one of: {', '.join(self.ENGINES)}")
+        
+        self.engine = engine
         self.globals = Environment()
         self.environment = self.globals
         
@@ -681,7 +276,7 @@ class Interpreter:
                 if len(arguments) != 1:
                     raise TypeError("len() takes exactly 1 argument")
                 arg = arguments[0]
-                if isinstance(arg, (list, str)):
+                if isinstance(arg, (list, str, ResultSet)):
                     return len(arg)
                 raise TypeError(f"len() not supported for {type(arg).__name__}")
         
@@ -727,7 +322,7 @@ class Interpreter:
                     raise TypeError("dict() takes exactly 1 argument (array of key-value pairs)")
                 
                 arr = arguments[0]
-                if not isinstance(arr, list):
+                if not isinstance(arr, (list, ResultSet)):
                     raise TypeError("dict() argument must be an array")
                 
                 if len(arr) % 2 != 0:
@@ -747,9 +342,11 @@ class Interpreter:
         class DatabaseClass:
             """Built-in Database class for easy database access."""
             def call(self, interpreter, arguments):
-                if len(arguments) != 1:
-                    raise TypeError("Database() takes exactly 1 argument (connection string)")
-                return DatabaseConnection(arguments[0])
+                if len(arguments) not in (1, 2):
+                    raise TypeError("Database() takes 1 or 2 arguments (connection string, options)")
+                if len(arguments) == 2 and not isinstance(arguments[1], dict):
+                    raise TypeError("Database() options must be a dictionary")
+                return DatabaseConnection(*arguments)
         
         self.globals.define('Database', DatabaseClass())
         
@@ -757,27 +354,57 @@ class Interpreter:
         class ModelFunction:
             """Built-in Model function for ORM."""
             def call(self, interpreter, arguments):
-                if len(arguments) != 2:
-                    raise TypeError("Model() takes exactly 2 arguments (table_name, fields)")
+                if len(arguments) not in (2, 3):
+                    raise TypeError("Model() takes 2 or 3 arguments (table_name, fields, options)")
                 
                 table_name = arguments[0]
                 fields = arguments[1]
+                options = arguments[2] if len(arguments) == 3 else None
                 
                 if not isinstance(table_name, str):
                     raise TypeError("First argument must be a string (table name)")
                 if not isinstance(fields, dict):
                     raise TypeError("Second argument must be a dictionary (field definitions)")
+                if options is not None and not isinstance(options, dict):
+                    raise TypeError("Third argument must be a dictionary (options)")
                 
-                return ModelDefinition(table_name, fields)
+                return ModelDefinition(table_name, fields, options)
         
         self.globals.define('Model', ModelFunction())
+        
+        # Server class
+        class ServerClass:
+            """Built-in Server class for serving HTTP requests."""
+            def call(self, interpreter, arguments):
+                if len(arguments) > 1:
+                    raise TypeError("Server() takes at most 1 argument (options)")
+                if arguments and not isinstance(arguments[0], dict):
+                    raise TypeError("Server() options must be a dictionary")
+                return PrivvyServer(arguments[0] if arguments else None)
+        
+        self.globals.define('Server', ServerClass())
     
     def interpret(self, program: Program):
         """Interpret a program."""
-        try:
-            for statement in program.statements:
-                self.execute(statement)
-        except ReturnValue as ret:
+        from resolver import Resolver
+        Resolver().resolve(program)
+        
+        if self.engine == 'closure':
+            from compiler import ClosureCompiler
+            code = ClosureCompiler(self).compile_program(program)
+        elif self.engine == 'vm':
+            from bytecode import BytecodeCompiler, VirtualMachine
+            code_object = BytecodeCompiler().compile_program(program)
+            code = lambda env: VirtualMachine(self).run(code_object, env)
+        else:
+            code = None
+        
+        if code is not None:
+            signal = code(self.globals)
+        else:
+            signal = self.execute_block(program.statements, self.globals)
+        
+        if signal is not None:
             raise RuntimeError("Cannot use 'return' outside a function")
     
     def execute(self, node: ASTNode) -> Any:
@@ -866,7 +493,7 @@ class Interpreter:
             elif isinstance(node.target, ArrayAccess):
                 array = self.execute(node.target.array)
                 index = self.execute(node.target.index)
-                if isinstance(array, list):
+                if isinstance(array, (list, ResultSet)):
                     array[int(index)] = value
                 else:
                     raise TypeError("Cannot index non-array")
@@ -878,6 +505,9 @@ class Interpreter:
             callee = self.execute(node.callee)
             arguments = [self.execute(arg) for arg in node.arguments]
             
+            if database.QUERY_LOG is not None:
+                database.QUERY_LOG.line = node.line
+            
             if hasattr(callee, 'call'):
                 return callee.call(self, arguments)
             else:
@@ -888,11 +518,15 @@ class Interpreter:
             obj = self.execute(node.object)
             
             if isinstance(obj, PrivvyInstance):
-                return obj.get(node.property)
+                if node.cache is None:
+                    node.cache = InlineCache()
+                return node.cache.get(obj, node.property)
             elif isinstance(obj, DatabaseConnection):
                 return obj.get(node.property)
             elif isinstance(obj, ModelDefinition):
                 return obj.get(node.property)
+            elif isinstance(obj, PrivvyServer):
+                return obj.get(node.property)
             else:
                 raise TypeError(f"Cannot access property on {type(obj).__name__}")
         
@@ -905,7 +539,7 @@ class Interpreter:
             array = self.execute(node.array)
             index = self.execute(node.index)
             
-            if isinstance(array, list):
+            if isinstance(array, (list, ResultSet)):
                 return array[int(index)]
             elif isinstance(array, str):
                 return array[int(index)]
@@ -947,21 +581,34 @@ class Interpreter:
             condition = self.execute(node.condition)
             
             if self.is_truthy(condition):
-                self.execute_block(node.then_branch, Environment(self.environment))
+                return self.execute_block(node.then_branch, self.block_environment(node.then_scope))
             elif node.else_branch:
-                self.execute_block(node.else_branch, Environment(self.environment))
+                return self.execute_block(node.else_branch, self.block_environment(node.else_scope))
             
             return None
         
         # While loop
         elif isinstance(node, WhileStatement):
+            # One environment serves every iteration unless a closure may keep it
+            scope = node.body_scope
+            body_env = self.block_environment(scope)
+            
             while self.is_truthy(self.execute(node.condition)):
-                self.execute_block(node.body, Environment(self.environment))
+                if scope is not None:
+                    if scope.captured:
+                        body_env = Environment(self.environment)
+                    else:
+                        body_env.variables.clear()
+                signal = self.execute_block(node.body, body_env)
+                if signal is not None:
+                    return signal
             return None
         
         # For loop
         elif isinstance(node, ForStatement):
-            loop_env = Environment(self.environment)
+            loop_env = self.block_environment(node.scope)
+            scope = node.body_scope
+            body_env = self.block_environment(scope, loop_env)
             
             # Initializer
             if node.initializer:
@@ -983,7 +630,14 @@ class Interpreter:
                         break
                 
                 # Execute body
-                self.execute_block(node.body, Environment(loop_env))
+                if scope is not None:
+                    if scope.captured:
+                        body_env = Environment(loop_env)
+                    else:
+                        body_env.variables.clear()
+                signal = self.execute_block(node.body, body_env)
+                if signal is not None:
+                    return signal
                 
                 # Increment
                 if node.increment:
@@ -999,7 +653,7 @@ class Interpreter:
             value = None
             if node.value:
                 value = self.execute(node.value)
-            raise ReturnValue(value)
+            return ReturnValue(value)
         
         # This expression
         elif isinstance(node, ThisExpression):
@@ -1018,21 +672,32 @@ class Interpreter:
         else:
             raise RuntimeError(f"Unknown AST node type: {type(node).__name__}")
     
-    def execute_block(self, statements: List[ASTNode], environment: Environment):
-        """Execute a block of statements in a given environment."""
+    def block_environment(self, scope, enclosing: Optional[Environment] = None) -> Environment:
+        """Environment for a block: blocks that declare nothing share the enclosing one."""
+        if enclosing is None:
+            enclosing = self.environment
+        if scope is None:
+            return enclosing
+        return Environment(enclosing)
+    
+    def execute_block(self, statements: List[ASTNode], environment: Environment) -> Optional[ReturnValue]:
+        """Execute a block of statements in a given environment.
+        
+        Returns the ReturnValue of a return statement that ended the block
+        early, or None if it ran to completion.
+        """
         previous = self.environment
         try:
             self.environment = environment
             for statement in statements:
-                self.execute(statement)
+                result = self.execute(statement)
+                if type(result) is ReturnValue:
+                    return result
+            return None
         finally:
             self.environment = previous
     
     def is_truthy(self, value: Any) -> bool:
         """Determine if a value is truthy."""
-        if value is None or value is False:
-            return False
-        if value == 0 or value == "":
-            return False
-        return True
+        return is_truthy(value)
 
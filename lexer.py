@@ -3,6 +3,8 @@ Lexer/Tokenizer for the Privvy programming language.
 Converts source code into a stream of tokens.
 """
 
+import re
+from typing import Iterator
 from token_types import Token, TokenType
 
 
@@ -32,6 +34,57 @@ class Lexer:
         'export': TokenType.EXPORT,
     }
     
+    # Two-character operators come before their one-character prefixes
+    OPERATORS = {
+        '->': TokenType.ARROW,
+        '==': TokenType.EQUAL,
+        '!=': TokenType.NOT_EQUAL,
+        '<=': TokenType.LESS_EQUAL,
+        '>=': TokenType.GREATER_EQUAL,
+        '+': TokenType.PLUS,
+        '-': TokenType.MINUS,
+        '*': TokenType.MULTIPLY,
+        '/': TokenType.DIVIDE,
+        '%': TokenType.MODULO,
+        '=': TokenType.ASSIGN,
+        '!': TokenType.NOT,
+        '<': TokenType.LESS_THAN,
+        '>': TokenType.GREATER_THAN,
+        '(': TokenType.LEFT_PAREN,
+        ')': TokenType.RIGHT_PAREN,
+        '{': TokenType.LEFT_BRACE,
+        '}': TokenType.RIGHT_BRACE,
+        '[': TokenType.LEFT_BRACKET,
+        ']': TokenType.RIGHT_BRACKET,
+        ',': TokenType.COMMA,
+        '.': TokenType.DOT,
+        ';': TokenType.SEMICOLON,
+        ':': TokenType.COLON,
+    }
+    
+    ESCAPES = {
+        'n': '\n',
+        't': '\t',
+        'r': '\r',
+        '\\': '\\',
+        '"': '"',
+        "'": "'"
+    }
+    
+    # One pattern for the whole language; the name of the group that
+    # matched says what kind of token was found
+    TOKEN_PATTERN = re.compile('|'.join([
+        r'(?P<SKIP>[ \t\r]+|//[^\n]*)',
+        r'(?P<NEWLINE>\n)',
+        r'(?P<NUMBER>\d[\d.]*)',
+        r'(?P<NAME>[^\W\d]\w*)',
+        r'(?P<STRING>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')',
+        '(?P<OPERATOR>' + '|'.join(re.escape(op) for op in OPERATORS) + ')',
+        r'(?P<ERROR>.)',
+    ]), re.DOTALL)
+    
+    ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+    
     def __init__(self, source: str):
         self.source = source
         self.pos = 0
@@ -42,241 +95,89 @@ class Lexer:
     def error(self, message: str):
         raise SyntaxError(f"Lexer error at {self.line}:{self.column}: {message}")
     
-    def peek(self, offset: int = 0) -> str:
-        """Look ahead at character without consuming it."""
-        pos = self.pos + offset
-        if pos < len(self.source):
-            return self.source[pos]
-        return '\0'
+    def move_to(self, pos: int):
+        """Set pos, line and column for an offset into the source."""
+        self.pos = pos
+        self.line = self.source.count('\n', 0, pos) + 1
+        self.column = pos - self.source.rfind('\n', 0, pos)
     
-    def advance(self) -> str:
-        """Consume and return current character."""
-        if self.pos >= len(self.source):
-            return '\0'
-        
-        char = self.source[self.pos]
-        self.pos += 1
-        
-        if char == '\n':
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-        
-        return char
-    
-    def skip_whitespace(self):
-        """Skip whitespace except newlines (they can be significant)."""
-        while self.peek() in ' \t\r':
-            self.advance()
-    
-    def skip_comment(self):
-        """Skip single-line comments starting with //"""
-        if self.peek() == '/' and self.peek(1) == '/':
-            while self.peek() not in '\n\0':
-                self.advance()
-    
-    def read_number(self) -> Token:
-        """Read a number literal."""
-        start_line = self.line
-        start_column = self.column
-        num_str = ''
-        
-        while self.peek().isdigit() or self.peek() == '.':
-            num_str += self.advance()
-        
-        # Convert to appropriate type
-        if '.' in num_str:
-            value = float(num_str)
-        else:
-            value = int(num_str)
-        
-        return Token(TokenType.NUMBER, value, start_line, start_column)
+    def unescape(self, text: str) -> str:
+        """Replace the escape sequences in a string literal's body."""
+        escapes = self.ESCAPES
+        return self.ESCAPE_PATTERN.sub(lambda m: escapes.get(m.group(1), m.group(1)), text)
     
-    def read_string(self) -> Token:
-        """Read a string literal."""
-        start_line = self.line
-        start_column = self.column
-        quote_char = self.advance()  # Consume opening quote
-        string_value = ''
-        
-        while self.peek() != quote_char and self.peek() != '\0':
-            if self.peek() == '\\':
-                self.advance()  # Consume backslash
-                next_char = self.advance()
-                # Handle escape sequences
-                escape_map = {
-                    'n': '\n',
-                    't': '\t',
-                    'r': '\r',
-                    '\\': '\\',
-                    '"': '"',
-                    "'": "'"
-                }
-                string_value += escape_map.get(next_char, next_char)
-            else:
-                string_value += self.advance()
-        
-        if self.peek() == '\0':
-            self.error("Unterminated string")
-        
-        self.advance()  # Consume closing quote
-        return Token(TokenType.STRING, string_value, start_line, start_column)
+    def tokenize(self) -> list[Token]:
+        """Tokenize the entire source code."""
+        self.tokens.extend(self.stream())
+        return self.tokens
     
-    def read_identifier(self) -> Token:
-        """Read an identifier or keyword."""
-        start_line = self.line
-        start_column = self.column
-        identifier = ''
+    def stream(self) -> Iterator[Token]:
+        """Generate tokens one at a time, ending with EOF.
         
-        while self.peek().isalnum() or self.peek() == '_':
-            identifier += self.advance()
+        Nothing is kept once a token has been handed out, so a consumer
+        such as the parser holds only the tokens it is looking at.
+        """
+        source = self.source
+        keywords = self.KEYWORDS
+        operators = self.OPERATORS
         
-        # Check if it's a keyword
-        token_type = self.KEYWORDS.get(identifier, TokenType.IDENTIFIER)
+        # Columns are offsets from the start of the current line, which
+        # only moves on newlines (including those inside strings)
+        line = 1
+        line_start = 0
         
-        # For boolean and null keywords, set appropriate values
-        if token_type == TokenType.TRUE:
-            value = True
-        elif token_type == TokenType.FALSE:
-            value = False
-        elif token_type == TokenType.NULL:
-            value = None
-        else:
-            value = identifier
-        
-        return Token(token_type, value, start_line, start_column)
-    
-    def tokenize(self) -> list[Token]:
-        """Tokenize the entire source code."""
-        while self.pos < len(self.source):
-            self.skip_whitespace()
-            self.skip_comment()
-            
-            if self.pos >= len(self.source):
-                break
-            
-            char = self.peek()
-            start_line = self.line
-            start_column = self.column
-            
-            # Numbers
-            if char.isdigit():
-                self.tokens.append(self.read_number())
-            
-            # Strings
-            elif char in '"\'':
-                self.tokens.append(self.read_string())
-            
-            # Identifiers and keywords
-            elif char.isalpha() or char == '_':
-                self.tokens.append(self.read_identifier())
-            
-            # Operators and punctuation
-            elif char == '+':
-                self.advance()
-                self.tokens.append(Token(TokenType.PLUS, '+', start_line, start_column))
-            
-            elif char == '-':
-                self.advance()
-                if self.peek() == '>':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.ARROW, '->', start_line, start_column))
-                else:
-                    self.tokens.append(Token(TokenType.MINUS, '-', start_line, start_column))
-            
-            elif char == '*':
-                self.advance()
-                self.tokens.append(Token(TokenType.MULTIPLY, '*', start_line, start_column))
-            
-            elif char == '/':
-                self.advance()
-                self.tokens.append(Token(TokenType.DIVIDE, '/', start_line, start_column))
-            
-            elif char == '%':
-                self.advance()
-                self.tokens.append(Token(TokenType.MODULO, '%', start_line, start_column))
-            
-            elif char == '=':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.EQUAL, '==', start_line, start_column))
-                else:
-                    self.tokens.append(Token(TokenType.ASSIGN, '=', start_line, start_column))
-            
-            elif char == '!':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.NOT_EQUAL, '!=', start_line, start_column))
-                else:
-                    self.tokens.append(Token(TokenType.NOT, '!', start_line, start_column))
-            
-            elif char == '<':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.LESS_EQUAL, '<=', start_line, start_column))
-                else:
-                    self.tokens.append(Token(TokenType.LESS_THAN, '<', start_line, start_column))
-            
-            elif char == '>':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.GREATER_EQUAL, '>=', start_line, start_column))
+        for match in self.TOKEN_PATTERN.finditer(source):
+            kind = match.lastgroup
+            
+            if kind == 'SKIP':
+                continue
+            
+            text = match.group()
+            start = match.start()
+            column = start - line_start + 1
+            
+            if kind == 'NAME':
+                token_type = keywords.get(text, TokenType.IDENTIFIER)
+                if token_type is TokenType.TRUE:
+                    value = True
+                elif token_type is TokenType.FALSE:
+                    value = False
+                elif token_type is TokenType.NULL:
+                    value = None
                 else:
-                    self.tokens.append(Token(TokenType.GREATER_THAN, '>', start_line, start_column))
-            
-            elif char == '(':
-                self.advance()
-                self.tokens.append(Token(TokenType.LEFT_PAREN, '(', start_line, start_column))
-            
-            elif char == ')':
-                self.advance()
-                self.tokens.append(Token(TokenType.RIGHT_PAREN, ')', start_line, start_column))
-            
-            elif char == '{':
-                self.advance()
-                self.tokens.append(Token(TokenType.LEFT_BRACE, '{', start_line, start_column))
-            
-            elif char == '}':
-                self.advance()
-                self.tokens.append(Token(TokenType.RIGHT_BRACE, '}', start_line, start_column))
-            
-            elif char == '[':
-                self.advance()
-                self.tokens.append(Token(TokenType.LEFT_BRACKET, '[', start_line, start_column))
-            
-            elif char == ']':
-                self.advance()
-                self.tokens.append(Token(TokenType.RIGHT_BRACKET, ']', start_line, start_column))
-            
-            elif char == ',':
-                self.advance()
-                self.tokens.append(Token(TokenType.COMMA, ',', start_line, start_column))
-            
-            elif char == '.':
-                self.advance()
-                self.tokens.append(Token(TokenType.DOT, '.', start_line, start_column))
-            
-            elif char == ';':
-                self.advance()
-                self.tokens.append(Token(TokenType.SEMICOLON, ';', start_line, start_column))
-            
-            elif char == ':':
-                self.advance()
-                self.tokens.append(Token(TokenType.COLON, ':', start_line, start_column))
-            
-            elif char == '\n':
-                self.advance()
-                self.tokens.append(Token(TokenType.NEWLINE, '\n', start_line, start_column))
+                    value = text
+                yield Token(token_type, value, line, column)
+            
+            elif kind == 'OPERATOR':
+                yield Token(operators[text], text, line, column)
+            
+            elif kind == 'NEWLINE':
+                yield Token(TokenType.NEWLINE, text, line, column)
+                line += 1
+                line_start = start + 1
+            
+            elif kind == 'NUMBER':
+                value = float(text) if '.' in text else int(text)
+                yield Token(TokenType.NUMBER, value, line, column)
+            
+            elif kind == 'STRING':
+                body = text[1:-1]
+                if '\\' in body:
+                    body = self.unescape(body)
+                yield Token(TokenType.STRING, body, line, column)
+                
+                newlines = text.count('\n')
+                if newlines:
+                    line += newlines
+                    line_start = start + text.rfind('\n') + 1
             
             else:
-                self.error(f"Unexpected character: {char}")
+                if text in '"\'':
+                    self.move_to(len(source))
+                    self.error("Unterminated string")
+                self.move_to(start)
+                self.error(f"Unexpected character: {text}")
         
         # Add EOF token
-        self.tokens.append(Token(TokenType.EOF, None, self.line, self.column))
-        return self.tokens
-
+        self.move_to(len(source))
+        yield Token(TokenType.EOF, None, self.line, self.column)
@@ -0,0 +1,212 @@
+"""
+AST optimizer for the Privvy programming language.
+Folds operators over literals into literals and drops branches and loops
+whose condition is a constant, before the resolver and engines see the
+program. Enabled with `privvy.py -O`.
+"""
+
+import operator
+from typing import Any, List, Optional
+from ast_nodes import *
+from interpreter import is_truthy
+from resolver import declared_names
+
+# Folded strings longer than this stay as expressions, so a small
+# `"-" * 100000` in the source does not become a huge literal in the AST
+MAX_FOLDED_STRING = 4096
+
+LITERALS = (NumberLiteral, StringLiteral, BooleanLiteral, NullLiteral)
+
+# Same meaning as the interpreter's, including evaluating both operands
+# of and/or; anything that raises is left for the program to raise
+BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'and': lambda left, right: is_truthy(left) and is_truthy(right),
+    'or': lambda left, right: left if is_truthy(left) else right,
+}
+
+UNARY_OPERATORS = {
+    '-': operator.neg,
+    'not': lambda operand: not is_truthy(operand),
+    '!': lambda operand: not is_truthy(operand),
+}
+
+
+def literal_value(node: ASTNode) -> Any:
+    """The value of a literal node."""
+    if isinstance(node, NullLiteral):
+        return None
+    return node.value
+
+
+def make_literal(value: Any) -> Optional[ASTNode]:
+    """A literal node for a value, or None if it has no literal form."""
+    if value is None:
+        return NullLiteral()
+    if isinstance(value, bool):
+        return BooleanLiteral(value)
+    if isinstance(value, (int, float)):
+        return NumberLiteral(value)
+    if isinstance(value, str) and len(value) <= MAX_FOLDED_STRING:
+        return StringLiteral(value)
+    return None
+
+
+class Optimizer:
+    """Rewrites an AST in place into a cheaper equivalent one.
+    
+    Operators whose operands are all literals are evaluated once here.
+    An `if` or `while` whose condition is a literal keeps only the code
+    that can run: a dead branch or loop disappears, and a live branch is
+    spliced into the enclosing block. A branch that declares variables
+    stays an `if (true)` so its declarations keep their own block scope.
+    """
+    
+    def optimize(self, program: Program) -> Program:
+        """Optimize every statement of a program in place."""
+        program.statements = self.optimize_block(program.statements)
+        return program
+    
+    def optimize_block(self, statements: List[ASTNode]) -> List[ASTNode]:
+        """Optimize a block, returning its new list of statements."""
+        result = []
+        for statement in statements:
+            optimized = self.optimize_statement(statement)
+            if isinstance(optimized, list):
+                result.extend(optimized)
+            elif optimized is not None:
+                result.append(optimized)
+        return result
+    
+    def optimize_function(self, node: FunctionDeclaration):
+        node.body = self.optimize_block(node.body)
+    
+    def optimize_statement(self, node: ASTNode):
+        """Optimize a statement; returns a node, a list to splice in, or None."""
+        if isinstance(node, IfStatement):
+            node.condition = self.optimize_node(node.condition)
+            node.then_branch = self.optimize_block(node.then_branch)
+            if node.else_branch:
+                node.else_branch = self.optimize_block(node.else_branch)
+            
+            if not isinstance(node.condition, LITERALS):
+                return node
+            
+            branch = node.then_branch if is_truthy(literal_value(node.condition)) else node.else_branch
+            if not branch:
+                return None
+            if declared_names(branch):
+                return IfStatement(BooleanLiteral(True), branch)
+            return branch
+        
+        elif isinstance(node, WhileStatement):
+            node.condition = self.optimize_node(node.condition)
+            node.body = self.optimize_block(node.body)
+            if isinstance(node.condition, LITERALS) and not is_truthy(literal_value(node.condition)):
+                return None
+            return node
+        
+        elif isinstance(node, ForStatement):
+            node.initializer = self.optimize_node(node.initializer)
+            node.condition = self.optimize_node(node.condition)
+            node.increment = self.optimize_node(node.increment)
+            node.body = self.optimize_block(node.body)
+            return node
+        
+        elif isinstance(node, FunctionDeclaration):
+            self.optimize_function(node)
+            return node
+        
+        elif isinstance(node, ClassDeclaration):
+            if node.constructor:
+                self.optimize_function(node.constructor)
+            for method in node.methods:
+                self.optimize_function(method)
+            return node
+        
+        return self.optimize_node(node)
+    
+    def optimize_node(self, node: Optional[ASTNode]) -> Optional[ASTNode]:
+        """Optimize an expression (or simple statement), returning its replacement."""
+        if node is None:
+            return None
+        
+        if isinstance(node, BinaryOp):
+            node.left = self.optimize_node(node.left)
+            node.right = self.optimize_node(node.right)
+            if isinstance(node.left, LITERALS) and isinstance(node.right, LITERALS):
+                return self.fold_binary(node)
+        
+        elif isinstance(node, UnaryOp):
+            node.operand = self.optimize_node(node.operand)
+            if isinstance(node.operand, LITERALS):
+                return self.fold_unary(node)
+        
+        elif isinstance(node, VarDeclaration):
+            node.initializer = self.optimize_node(node.initializer)
+        
+        elif isinstance(node, Assignment):
+            node.value = self.optimize_node(node.value)
+            node.target = self.optimize_node(node.target)
+        
+        elif isinstance(node, FunctionCall):
+            node.callee = self.optimize_node(node.callee)
+            node.arguments = [self.optimize_node(arg) for arg in node.arguments]
+        
+        elif isinstance(node, MemberAccess):
+            node.object = self.optimize_node(node.object)
+        
+        elif isinstance(node, ArrayLiteral):
+            node.elements = [self.optimize_node(elem) for elem in node.elements]
+        
+        elif isinstance(node, ArrayAccess):
+            node.array = self.optimize_node(node.array)
+            node.index = self.optimize_node(node.index)
+        
+        elif isinstance(node, ReturnStatement):
+            node.value = self.optimize_node(node.value)
+        
+        elif isinstance(node, NewExpression):
+            node.arguments = [self.optimize_node(arg) for arg in node.arguments]
+        
+        return node
+    
+    def fold_binary(self, node: BinaryOp) -> ASTNode:
+        function = BINARY_OPERATORS.get(node.operator)
+        if function is None:
+            return node
+        left = literal_value(node.left)
+        right = literal_value(node.right)
+        
+        # Refuse to build a huge repeated string at all
+        if node.operator == '*':
+            for text, count in ((left, right), (right, left)):
+                if (isinstance(text, str) and isinstance(count, int)
+                        and len(text) * count > MAX_FOLDED_STRING):
+                    return node
+        
+        try:
+            value = function(left, right)
+        except Exception:
+            return node
+        return make_literal(value) or node
+    
+    def fold_unary(self, node: UnaryOp) -> ASTNode:
+        function = UNARY_OPERATORS.get(node.operator)
+        if function is None:
+            return node
+        try:
+            value = function(literal_value(node.operand))
+        except Exception:
+            return node
+        return make_literal(value) or node
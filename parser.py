@@ -3,7 +3,8 @@ Parser for the Privvy programming language.
 Converts tokens into an Abstract Syntax Tree (AST).
 """
 
-from typing import List, Optional
+from collections import deque
+from typing import Iterable, List, Optional
 from token_types import Token, TokenType
 from ast_nodes import *
 
@@ -11,9 +12,12 @@ from ast_nodes import *
 class Parser:
     """Parses tokens into an Abstract Syntax Tree."""
     
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
-        self.pos = 0
+    def __init__(self, tokens: Iterable[Token]):
+        # Tokens are pulled from the stream as parsing goes; only the
+        # current token and any peeked ones are held
+        self.tokens = iter(tokens)
+        self.token = next(self.tokens)
+        self.lookahead = deque()
     
     def error(self, message: str):
         current = self.current()
@@ -21,22 +25,25 @@ class Parser:
     
     def current(self) -> Token:
         """Get current token without consuming it."""
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
-        return self.tokens[-1]  # EOF
+        return self.token
     
     def peek(self, offset: int = 1) -> Token:
         """Look ahead at token."""
-        pos = self.pos + offset
-        if pos < len(self.tokens):
-            return self.tokens[pos]
-        return self.tokens[-1]  # EOF
+        if offset == 0:
+            return self.token
+        lookahead = self.lookahead
+        while len(lookahead) < offset:
+            last = lookahead[-1] if lookahead else self.token
+            if last.type == TokenType.EOF:
+                return last
+            lookahead.append(next(self.tokens))
+        return lookahead[offset - 1]
     
     def advance(self) -> Token:
         """Consume and return current token."""
-        token = self.current()
+        token = self.token
         if token.type != TokenType.EOF:
-            self.pos += 1
+            self.token = self.lookahead.popleft() if self.lookahead else next(self.tokens)
         return token
     
     def match(self, *types: TokenType) -> bool:
@@ -390,7 +397,7 @@ class Parser:
         
         while True:
             if self.match(TokenType.LEFT_PAREN):
-                self.advance()
+                line = self.advance().line
                 arguments = []
                 
                 if not self.match(TokenType.RIGHT_PAREN):
@@ -401,7 +408,7 @@ class Parser:
                         arguments.append(self.parse_expression())
                 
                 self.consume(TokenType.RIGHT_PAREN, "Expected ')' after arguments")
-                expr = FunctionCall(expr, arguments)
+                expr = FunctionCall(expr, arguments, line)
             
             elif self.match(TokenType.DOT):
                 self.advance()
@@ -70,6 +70,13 @@ def create_project(project_name, template="auth"):
         'lexer.py',
         'parser.py',
         'interpreter.py',
+        'compiler.py',
+        'bytecode.py',
+        'resolver.py',
+        'optimizer.py',
+        'database.py',
+        'server.py',
+        'pvcache.py',
         'ast_nodes.py',
         'token_types.py'
     ]
@@ -228,6 +235,7 @@ app.db
 
 # Python
 __pycache__/
+__pvcache__/
 *.pyc
 *.pyo
 *.pyd
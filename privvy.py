@@ -5,18 +5,24 @@ Main entry point for running Privvy programs.
 """
 
 import sys
+from typing import Optional
+import pvcache
+import database
 from lexer import Lexer
 from parser import Parser
-from interpreter import Interpreter
+from interpreter import Interpreter, ReturnValue
+from resolver import Resolver
+from optimizer import Optimizer
 
 
-def run_file(filepath: str):
-    """Run a Privvy source file."""
+def run_file(filepath: str, engine: str = 'closure', use_cache: bool = True,
+             optimize: bool = False):
+    """Run a Privvy source file, caching its AST in __pvcache__."""
     try:
         with open(filepath, 'r') as f:
             source = f.read()
         
-        run(source)
+        run(source, engine, filepath if use_cache else None, optimize)
     except FileNotFoundError:
         print(f"Error: File '{filepath}' not found")
         sys.exit(1)
@@ -25,21 +31,27 @@ def run_file(filepath: str):
         sys.exit(1)
 
 
-def run(source: str):
-    """Run Privvy source code."""
+def run(source: str, engine: str = 'closure', filepath: Optional[str] = None,
+        optimize: bool = False):
+    """Run Privvy source code.
+    
+    With a filepath, the parsed AST is cached next to that file. With
+    optimize, constant expressions and dead branches are folded away first.
+    """
     try:
-        # Tokenize
-        lexer = Lexer(source)
-        tokens = lexer.tokenize()
+        # Tokenize and parse, or reuse a cached AST
+        if filepath:
+            ast = pvcache.load(filepath, source)
+        else:
+            ast = pvcache.parse(source)
         
-        # Parse
-        parser = Parser(tokens)
-        ast = parser.parse()
+        if optimize:
+            ast = Optimizer().optimize(ast)
         
         # Interpret
-        interpreter = Interpreter()
+        interpreter = Interpreter(engine)
         interpreter.interpret(ast)
-        
+    
     except SyntaxError as e:
         print(f"Syntax Error: {e}")
         sys.exit(1)
@@ -76,10 +88,13 @@ def run_repl():
             # Parse
             parser = Parser(tokens)
             ast = parser.parse()
+            Resolver().resolve(ast)
             
             # Interpret
             for statement in ast.statements:
                 result = interpreter.execute(statement)
+                if isinstance(result, ReturnValue):
+                    raise RuntimeError("Cannot use 'return' outside a function")
                 # Print non-None expression results
                 if result is not None and not line.strip().startswith(('let', 'fun', 'class', 'if', 'while', 'for')):
                     print(result)
@@ -96,9 +111,33 @@ def run_repl():
 
 def main():
     """Main entry point."""
-    if len(sys.argv) > 1:
+    args = sys.argv[1:]
+    engine = 'closure'
+    use_cache = True
+    optimize = False
+    
+    # Options: --engine=closure|vm|tree, --no-cache, -O, --n-plus-one[=threshold]
+    for arg in list(args):
+        if arg.startswith('--engine='):
+            engine = arg.split('=', 1)[1]
+            args.remove(arg)
+        elif arg == '--no-cache':
+            use_cache = False
+            args.remove(arg)
+        elif arg == '-O':
+            optimize = True
+            args.remove(arg)
+        elif arg == '--n-plus-one' or arg.startswith('--n-plus-one='):
+            database.detect_n_plus_one(database.n_plus_one_threshold(arg.partition('=')[2] or '1'))
+            args.remove(arg)
+    
+    if engine not in Interpreter.ENGINES:
+        print(f"Error: Unknown engine '{engine}'. Use one of: {', '.join(Interpreter.ENGINES)}")
+        sys.exit(1)
+    
+    if args:
         # Run file
-        run_file(sys.argv[1])
+        run_file(args[0], engine, use_cache, optimize)
     else:
         # Run REPL
         run_repl()
@@ -14,7 +14,7 @@ class Privvy < Formula
 
   def install
     # Install Python files to libexec
-    libexec.install "privvy.py", "lexer.py", "parser.py", "interpreter.py", "ast_nodes.py", "token_types.py"
+    libexec.install "privvy.py", "lexer.py", "parser.py", "interpreter.py", "compiler.py", "bytecode.py", "resolver.py", "optimizer.py", "database.py", "server.py", "pvcache.py", "ast_nodes.py", "token_types.py"
     
     # Install CLI scripts
     libexec.install "privvy-cli.py", "privvy-db.py"
@@ -0,0 +1,94 @@
+"""
+Parsed-AST cache for the Privvy programming language.
+Like Python's __pycache__: the AST of `dir/app.pv` is pickled to
+`dir/__pvcache__/app.pv.pvc` and reused while neither the source file
+nor the interpreter has changed.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from lexer import Lexer
+from parser import Parser
+from ast_nodes import Program
+from interpreter import Interpreter
+
+CACHE_DIR = '__pvcache__'
+
+# Modules whose code decides what AST a source file parses to
+FRONT_END = ('lexer.py', 'parser.py', 'ast_nodes.py', 'token_types.py')
+
+
+def _interpreter_tag() -> str:
+    """Identify this interpreter: its version plus a hash of its front end.
+    
+    Hashing the front end's source means a changed lexer, parser or AST
+    definition invalidates old entries without anyone bumping a number.
+    """
+    digest = hashlib.sha256(f"{Interpreter.VERSION} {sys.implementation.cache_tag}".encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in FRONT_END:
+        try:
+            with open(os.path.join(here, name), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(name.encode())
+    return digest.hexdigest()
+
+
+INTERPRETER_TAG = _interpreter_tag()
+
+
+def parse(source: str) -> Program:
+    """Tokenize and parse source code, streaming tokens into the parser."""
+    lexer = Lexer(source)
+    parser = Parser(lexer.stream())
+    return parser.parse()
+
+
+def cache_path(filepath: str) -> str:
+    """Where the cached AST of a source file lives."""
+    directory, name = os.path.split(os.path.abspath(filepath))
+    return os.path.join(directory, CACHE_DIR, name + '.pvc')
+
+
+def load(filepath: str, source: str) -> Program:
+    """Parse a source file, reusing its cached AST when still valid.
+    
+    The cache entry is keyed by a hash of the source text and by the
+    interpreter tag; a mismatch (or an unreadable entry) just means the
+    file is parsed again and the entry rewritten. Failing to write the
+    cache, e.g. in a read-only directory, is not an error.
+    """
+    source_hash = hashlib.sha256(source.encode()).hexdigest()
+    path = cache_path(filepath)
+    
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+        if entry['source'] == source_hash and entry['interpreter'] == INTERPRETER_TAG:
+            return entry['program']
+    except Exception:
+        pass
+    
+    program = parse(source)
+    
+    entry = {'source': source_hash, 'interpreter': INTERPRETER_TAG, 'program': program}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Write to a temporary file first so readers never see half an entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except Exception:
+        pass
+    
+    return program
@@ -0,0 +1,210 @@
+"""
+Static scope resolver for the Privvy programming language.
+Works out, before a program runs, which block declares every variable it
+uses, so the closure compiler can read variables by (depth, slot) instead
+of searching environments by name.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from ast_nodes import *
+
+
+class Scope:
+    """The variables declared directly in one block, in slot order.
+    
+    `captured` is set when a function or class is declared anywhere inside
+    the block, since its closure may keep the block's environment alive.
+    """
+    
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.captured = False
+        for name in names:
+            self.declare(name)
+    
+    @property
+    def size(self) -> int:
+        return len(self.names)
+    
+    def declare(self, name: str) -> int:
+        """Give a name a slot in this scope (once) and return the slot."""
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        return self.index[name]
+    
+    def __repr__(self):
+        return f"Scope({self.names!r})"
+
+
+# The environment a bound method adds between its closure and its body
+THIS_SCOPE = Scope(['this'])
+
+
+def declared_names(statements: List[ASTNode]) -> List[str]:
+    """Names a block declares directly (not inside nested blocks)."""
+    names = []
+    for statement in statements:
+        if isinstance(statement, (VarDeclaration, FunctionDeclaration, ClassDeclaration)):
+            names.append(statement.name)
+    return names
+
+
+class Resolver:
+    """Annotates an AST with the slot of every variable access.
+    
+    A name resolves to the innermost enclosing block that declares it
+    anywhere, with (depth, slot) counting block environments outward from
+    the use. Blocks that declare nothing get no scope (None) and no
+    environment of their own, so they do not count towards depth. Names
+    no block declares resolve to depth None and are looked up in the
+    globals dict. At runtime a slot that has not been assigned yet falls
+    back to a lookup by name further out, which keeps the dynamic scoping
+    rules of the tree-walking interpreter.
+    """
+    
+    def __init__(self):
+        self.scopes: List[Scope] = []
+    
+    def resolve(self, program: Program) -> Program:
+        """Resolve every statement of a program in place."""
+        self.scopes = []
+        for statement in program.statements:
+            self.resolve_node(statement)
+        return program
+    
+    def lookup(self, name: str) -> Tuple[Optional[int], Optional[int]]:
+        """Return (depth, slot) for a name, or (None, None) for a global."""
+        for depth, scope in enumerate(reversed(self.scopes)):
+            slot = scope.index.get(name)
+            if slot is not None:
+                return depth, slot
+        return None, None
+    
+    def declare(self, name: str) -> Optional[int]:
+        """Slot of a name declared in the current block; None at top level."""
+        if not self.scopes:
+            return None
+        return self.scopes[-1].declare(name)
+    
+    def resolve_block(self, statements: List[ASTNode], parameters: Iterable[str] = (),
+                      function: bool = False) -> Optional[Scope]:
+        """Resolve a block; only function bodies always get an environment."""
+        scope = Scope(list(parameters) + declared_names(statements))
+        if scope.size == 0 and not function:
+            for statement in statements:
+                self.resolve_node(statement)
+            return None
+        
+        self.scopes.append(scope)
+        try:
+            for statement in statements:
+                self.resolve_node(statement)
+        finally:
+            self.scopes.pop()
+        return scope
+    
+    def resolve_function(self, node: FunctionDeclaration):
+        node.scope = self.resolve_block(node.body, node.parameters, function=True)
+    
+    def mark_captured(self):
+        """Every enclosing block may now outlive its own execution."""
+        for scope in self.scopes:
+            scope.captured = True
+    
+    def resolve_node(self, node: Optional[ASTNode]):
+        if node is None:
+            return
+        
+        if isinstance(node, Identifier):
+            node.depth, node.slot = self.lookup(node.name)
+        
+        elif isinstance(node, BinaryOp):
+            self.resolve_node(node.left)
+            self.resolve_node(node.right)
+        
+        elif isinstance(node, UnaryOp):
+            self.resolve_node(node.operand)
+        
+        elif isinstance(node, VarDeclaration):
+            self.resolve_node(node.initializer)
+            node.slot = self.declare(node.name)
+        
+        elif isinstance(node, Assignment):
+            self.resolve_node(node.value)
+            if isinstance(node.target, Identifier):
+                node.depth, node.slot = self.lookup(node.target.name)
+            else:
+                self.resolve_node(node.target)
+        
+        elif isinstance(node, FunctionCall):
+            self.resolve_node(node.callee)
+            for arg in node.arguments:
+                self.resolve_node(arg)
+        
+        elif isinstance(node, MemberAccess):
+            self.resolve_node(node.object)
+        
+        elif isinstance(node, ArrayLiteral):
+            for elem in node.elements:
+                self.resolve_node(elem)
+        
+        elif isinstance(node, ArrayAccess):
+            self.resolve_node(node.array)
+            self.resolve_node(node.index)
+        
+        elif isinstance(node, FunctionDeclaration):
+            node.slot = self.declare(node.name)
+            self.mark_captured()
+            self.resolve_function(node)
+        
+        elif isinstance(node, ClassDeclaration):
+            node.slot = self.declare(node.name)
+            self.mark_captured()
+            
+            # Methods run in their own environment below one binding 'this'
+            self.scopes.append(THIS_SCOPE)
+            try:
+                if node.constructor:
+                    self.resolve_function(node.constructor)
+                for method in node.methods:
+                    self.resolve_function(method)
+            finally:
+                self.scopes.pop()
+        
+        elif isinstance(node, IfStatement):
+            self.resolve_node(node.condition)
+            node.then_scope = self.resolve_block(node.then_branch)
+            if node.else_branch:
+                node.else_scope = self.resolve_block(node.else_branch)
+        
+        elif isinstance(node, WhileStatement):
+            self.resolve_node(node.condition)
+            node.body_scope = self.resolve_block(node.body)
+        
+        elif isinstance(node, ForStatement):
+            # The initializer's variable lives in a loop environment around the body's
+            names = declared_names([node.initializer])
+            node.scope = Scope(names) if names else None
+            if node.scope:
+                self.scopes.append(node.scope)
+            try:
+                self.resolve_node(node.initializer)
+                self.resolve_node(node.condition)
+                self.resolve_node(node.increment)
+                node.body_scope = self.resolve_block(node.body)
+            finally:
+                if node.scope:
+                    self.scopes.pop()
+        
+        elif isinstance(node, ReturnStatement):
+            self.resolve_node(node.value)
+        
+        elif isinstance(node, ThisExpression):
+            node.depth, node.slot = self.lookup('this')
+        
+        elif isinstance(node, NewExpression):
+            node.depth, node.slot = self.lookup(node.class_name)
+            for arg in node.arguments:
+                self.resolve_node(arg)
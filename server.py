@@ -0,0 +1,315 @@
+"""
+HTTP server support for the Privvy programming language.
+The built-in Server object routes requests to Privvy functions and serves
+them from the standard library's HTTP server, so a script is parsed once
+and every request runs in the same warm interpreter.
+"""
+
+import json
+import re
+import sys
+import threading
+
+from database import ResultSet
+
+
+class Response:
+    """A handler result with an explicit status code and headers."""
+    
+    def __init__(self, status: int, body, headers: dict = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+class PrivvyServer:
+    """Represents an HTTP server whose routes are Privvy functions.
+    
+    Options (all optional): "host" (default 127.0.0.1), "workers", the
+    number of threads serving connections (default 8), and "keepAlive",
+    how many seconds an idle keep-alive connection is kept open
+    (default 5).
+    
+    Connections are read and written on worker threads, but handlers run
+    one at a time: Privvy code and the interpreter behind it are not
+    thread-safe.
+    """
+    
+    def __init__(self, options: dict = None):
+        options = options or {}
+        self.host = options.get('host', '127.0.0.1')
+        self.workers = int(options.get('workers', 8))
+        self.keep_alive = float(options.get('keepAlive', 5))
+        
+        # Exact paths are found with one dict lookup; paths with :name
+        # segments are matched in the order they were added
+        self.routes = {}
+        self.patterns = []
+        self.lock = threading.Lock()
+        self.httpd = None
+        
+        # Method objects are built once per server, not on every access
+        self.methods = {
+            'get': RouteMethod(self, 'GET'),
+            'post': RouteMethod(self, 'POST'),
+            'put': RouteMethod(self, 'PUT'),
+            'patch': RouteMethod(self, 'PATCH'),
+            'delete': RouteMethod(self, 'DELETE'),
+            'route': RouteMethod(self),
+            'response': ResponseMethod(self),
+            'listen': ListenMethod(self),
+            'stop': StopMethod(self)
+        }
+    
+    def get(self, name: str):
+        """Get a method of the server."""
+        method = self.methods.get(name)
+        if method is not None:
+            return method
+        
+        raise AttributeError(f"Server has no attribute '{name}'")
+    
+    def add_route(self, method: str, path: str, handler):
+        """Register a handler for a method and path."""
+        if ':' not in path:
+            self.routes[(method, path)] = handler
+            return
+        
+        pattern = re.sub(r':(\w+)', r'(?P<\1>[^/]+)', re.escape(path))
+        self.patterns.append((method, re.compile(pattern + '$'), handler))
+    
+    def find_route(self, method: str, path: str):
+        """Return (handler, path parameters) for a request, or (None, None)."""
+        handler = self.routes.get((method, path))
+        if handler is not None:
+            return handler, {}
+        
+        for route_method, pattern, handler in self.patterns:
+            if route_method == method:
+                match = pattern.match(path)
+                if match:
+                    return handler, match.groupdict()
+        return None, None
+    
+    def handle(self, interpreter, request: dict):
+        """Run the handler for a request, returning (status, headers, body bytes)."""
+        handler, params = self.find_route(request['method'], request['path'])
+        if handler is None:
+            return encode(Response(404, {'error': f"No route for {request['method']} {request['path']}"}))
+        request['params'] = params
+        
+        try:
+            # Encoded under the lock too: a query result still streaming
+            # rows shares its connection with the next request's handler
+            with self.lock:
+                return encode(handler.call(interpreter, [request]))
+        except Exception as e:
+            print(f"Error in {request['method']} {request['path']}: {e}", file=sys.stderr)
+            return encode(Response(500, {'error': str(e)}))
+
+
+def encode(result):
+    """Turn a handler's return value into (status, headers, body bytes).
+    
+    Strings are sent as text, null as 204 No Content, and anything else
+    as JSON.
+    """
+    status, headers = 200, {}
+    if isinstance(result, Response):
+        status, headers, result = result.status, result.headers, result.body
+    
+    if result is None:
+        return (204 if status == 200 else status), headers, b''
+    if isinstance(result, str):
+        content_type = 'text/plain; charset=utf-8'
+        body = result.encode()
+    else:
+        content_type = 'application/json'
+        body = json.dumps(result, default=to_json).encode()
+    return status, {'Content-Type': content_type, **headers}, body
+
+
+def to_json(value):
+    """Convert a value json can't encode: query results become arrays."""
+    if isinstance(value, ResultSet):
+        return list(value)
+    return str(value)
+
+
+def make_http_server(server: PrivvyServer, interpreter, port: int):
+    """Build the stdlib HTTP server that serves a Privvy server's routes.
+    
+    http.server is imported here rather than at the top because it pulls
+    in http.client and email, which would slow down every script's
+    startup, and most scripts never serve.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from urllib.parse import parse_qsl, urlsplit
+    
+    class PoolHTTPServer(HTTPServer):
+        """An HTTPServer that serves connections on a fixed pool of threads."""
+        
+        request_queue_size = 128
+        
+        def __init__(self, address, handler_class, server: PrivvyServer, interpreter):
+            super().__init__(address, handler_class)
+            self.privvy_server = server
+            self.interpreter = interpreter
+            self.pool = ThreadPoolExecutor(max_workers=server.workers, thread_name_prefix='privvy-worker')
+        
+        def process_request(self, request, client_address):
+            self.pool.submit(self.process_request_thread, request, client_address)
+        
+        def process_request_thread(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+        
+        def server_close(self):
+            super().server_close()
+            self.pool.shutdown(wait=False)
+    
+    class RequestHandler(BaseHTTPRequestHandler):
+        """Turns HTTP requests into Privvy request dicts and back."""
+        
+        # HTTP/1.1 keeps connections open between requests
+        protocol_version = 'HTTP/1.1'
+        server_version = 'Privvy'
+        
+        # Headers and body are written separately; with Nagle's algorithm
+        # on, a keep-alive client waits on a delayed ACK for the body
+        disable_nagle_algorithm = True
+        
+        def setup(self):
+            # Idle keep-alive connections are closed after this many seconds
+            self.timeout = self.server.privvy_server.keep_alive
+            super().setup()
+        
+        def dispatch(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length).decode('utf-8', 'replace') if length else ''
+            
+            data = None
+            if body and 'json' in (self.headers.get('Content-Type') or ''):
+                try:
+                    data = json.loads(body)
+                except ValueError:
+                    data = None
+            
+            request = {
+                'method': self.command,
+                'path': url.path,
+                'query': dict(parse_qsl(url.query)),
+                'headers': dict(self.headers.items()),
+                'body': body,
+                'json': data
+            }
+            
+            status, headers, payload = self.server.privvy_server.handle(self.server.interpreter, request)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, str(value))
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = dispatch
+        
+        def log_message(self, format, *args):
+            # One line per request on stderr would dominate the cost of serving it
+            pass
+    
+    return PoolHTTPServer((server.host, port), RequestHandler, server, interpreter)
+
+
+class RouteMethod:
+    """app.get(path, handler) and friends, or app.route(method, path, handler).
+    
+    Path segments written as :name are passed to the handler in the
+    request's "params" dict.
+    """
+    
+    def __init__(self, server, method: str = None):
+        self.server = server
+        self.method = method
+    
+    def call(self, interpreter, arguments):
+        if self.method is None:
+            if len(arguments) != 3:
+                raise TypeError("route() requires 3 arguments (method, path, handler)")
+            method, path, handler = arguments
+            method = str(method).upper()
+        else:
+            if len(arguments) != 2:
+                raise TypeError(f"{self.method.lower()}() requires 2 arguments (path, handler)")
+            method = self.method
+            path, handler = arguments
+        
+        if not isinstance(path, str) or not path.startswith('/'):
+            raise TypeError("Route path must be a string starting with '/'")
+        if not hasattr(handler, 'call'):
+            raise TypeError("Route handler must be a function")
+        
+        self.server.add_route(method, path, handler)
+        return None
+
+
+class ResponseMethod:
+    """app.response(status, body, headers?): a result with a status code."""
+    
+    def __init__(self, server):
+        self.server = server
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) not in (2, 3):
+            raise TypeError("response() requires 2 or 3 arguments (status, body, headers)")
+        
+        headers = arguments[2] if len(arguments) == 3 else None
+        if headers is not None and not isinstance(headers, dict):
+            raise TypeError("response() headers must be a dictionary")
+        return Response(int(arguments[0]), arguments[1], headers)
+
+
+class ListenMethod:
+    """app.listen(port): serve requests until the server is stopped."""
+    
+    def __init__(self, server):
+        self.server = server
+    
+    def call(self, interpreter, arguments):
+        if len(arguments) != 1:
+            raise TypeError("listen() requires 1 argument (port)")
+        
+        server = self.server
+        server.httpd = make_http_server(server, interpreter, int(arguments[0]))
+        host, port = server.httpd.server_address[:2]
+        print(f"Serving on http://{host}:{port} ({server.workers} workers)", flush=True)
+        
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+            server.httpd = None
+        return None
+
+
+class StopMethod:
+    """app.stop(): stop a listening server, e.g. from a handler."""
+    
+    def __init__(self, server):
+        self.server = server
+    
+    def call(self, interpreter, arguments):
+        httpd = self.server.httpd
+        if httpd is not None:
+            # shutdown() blocks until serve_forever() notices, so don't make
+            # the handler that asked wait for it
+            threading.Thread(target=httpd.shutdown, daemon=True).start()
+        return None
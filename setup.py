@@ -27,6 +27,13 @@ setup(
         "lexer",
         "parser",
         "interpreter",
+        "compiler",
+        "bytecode",
+        "resolver",
+        "optimizer",
+        "database",
+        "server",
+        "pvcache",
         "ast_nodes",
         "token_types",
     ],
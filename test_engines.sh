@@ -0,0 +1,50 @@
+#!/bin/bash
+# Run every example and test under each execution engine and compare the
+# output. Each run happens in a fresh temporary directory so database
+# examples start from an empty database every time. A test with a .expected
+# file next to it must also print exactly that.
+
+ROOT="$(cd "$(dirname "$0")" && pwd)"
+ENGINES="tree closure vm"
+FAILED=0
+
+echo "Comparing Privvy execution engines..."
+echo "======================================"
+echo ""
+
+for file in "$ROOT"/examples/*.pv "$ROOT"/tests/*.pv; do
+    name=$(basename "$file")
+    expected=""
+    agree=1
+    
+    for engine in $ENGINES; do
+        workdir=$(mktemp -d)
+        cp "$file" "$workdir/$name"
+        output=$(cd "$workdir" && python3 "$ROOT/privvy.py" --engine=$engine "$name" 2>/dev/null)
+        rm -rf "$workdir"
+        
+        if [ "$engine" = "tree" ]; then
+            expected="$output"
+            if [ -f "${file%.pv}.expected" ] && [ "$output" != "$(cat "${file%.pv}.expected")" ]; then
+                echo "❌ $name: output differs from ${name%.pv}.expected"
+                agree=0
+                FAILED=1
+            fi
+        elif [ "$output" != "$expected" ]; then
+            echo "❌ $name: '$engine' output differs from 'tree'"
+            agree=0
+            FAILED=1
+        fi
+    done
+    
+    if [ $agree -eq 1 ]; then
+        echo "✅ $name"
+    fi
+done
+
+echo ""
+if [ $FAILED -ne 0 ]; then
+    echo "Some engines disagree!"
+    exit 1
+fi
+echo "All engines agree!"
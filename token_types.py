@@ -63,11 +63,13 @@ class TokenType(Enum):
     # Special
     NEWLINE = auto()
     EOF = auto()
-    
+
 
 class Token:
     """Represents a single token in the source code."""
     
+    __slots__ = ('type', 'value', 'line', 'column')
+    
     def __init__(self, type: TokenType, value: any, line: int, column: int):
         self.type = type
         self.value = value